@@ -0,0 +1,131 @@
+"""
+Compares the JSON backends on doc.getList responses.
+
+Usage::
+    
+    python benchmarks/json_decode.py [FILE ...]
+    python benchmarks/json_decode.py --record FILE
+
+FILE is a recorded response of doc.getList (the raw JSON as returned by the
+API). Without files, a synthetic response with 100 documents is used.
+``--record`` fetches a response with the credentials of the interactive mode
+(environment variables or ``~/.ipernity.ini``) and saves it to FILE.
+"""
+
+import json
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from timeit import Timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ipernity import IpernityAPI
+from ipernity.jsonlib import backends
+
+
+def synthetic_payload(n: int = 100, page: int = 1, total: int = 5000) -> bytes:
+    """Builds a response shaped like doc.getList with extra=owner,dates,count,geo"""
+    docs = [
+        {
+            'doc_id': str(40000000 + i),
+            'media': 'photo',
+            'title': f'Photo Nr. {i} – Sommer am Meer',
+            'license': '0',
+            'visibility': {'share': '0', 'ispublic': '1', 'isfriend': '0', 'isfamily': '0'},
+            'owner': {
+                'user_id': '123456',
+                'username': 'Example User',
+                'alias': 'example',
+                'is_pro': '1',
+            },
+            'dates': {
+                'created': '1700000000',
+                'posted_at': str(1700000000 + i),
+                'last_comment_at': '0',
+                'last_update': str(1700000100 + i),
+            },
+            'count': {'visits': str(i * 7), 'faves': str(i % 5), 'comments': '0'},
+            'geo': {'lat': f'{48 + i / 1000:.6f}', 'lng': f'{11 + i / 1000:.6f}', 'acc': '15'},
+            'thumb': {
+                'label': '240',
+                'w': '240',
+                'h': '160',
+                'url': f'https://u1.ipernity.com/1/23/45/{40000000 + i}.abcdef.240.jpg',
+            },
+        }
+        for i in range((page - 1) * n, min(page * n, total))
+    ]
+    return json.dumps({
+        'docs': {
+            'total': str(total),
+            'page': str(page),
+            'per_page': str(n),
+            'pages': str((total + n - 1) // n),
+            'count': str(len(docs)),
+            'doc': docs,
+        },
+        'api': {'status': 'ok', 'at': '1700000200', 'elapsed': '0.021'},
+    }).encode('utf-8')
+
+
+def record(filename: str):
+    from ipernity.__main__ import args, get_api_init
+    
+    key, secret, token = get_api_init(args().parse_args([]))
+    with IpernityAPI(key, secret, token) as api:
+        url = api._url + 'doc.getList/json'
+        response = api.auth.do_request(
+            url,
+            'doc.getList',
+            {'per_page': 100, 'extra': 'owner,dates,count,geo'}
+        )
+        response.raise_for_status()
+    with open(filename, 'wb') as f:
+        f.write(response.content)
+    print(f'Saved {len(response.content)} bytes to {filename}')
+
+
+def bench(payloads: list) -> None:
+    size = sum(len(p) for p in payloads)
+    print(f'{len(payloads)} payload(s), {size / 1024:.1f} KiB')
+    results = {}
+    for name, backend in backends.items():
+        loads = backend.loads
+        
+        def run():
+            for p in payloads:
+                loads(p)
+        
+        timer = Timer(run)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(5, number)) / number
+        results[name] = best
+    
+    baseline = results['json']
+    for name, t in results.items():
+        print(
+            f'{name:8} {t * 1e6:10.1f} µs/iteration '
+            f'{size / t / 2**20:8.1f} MiB/s  {baseline / t:5.2f}x'
+        )
+
+
+def main(opts: Namespace):
+    if opts.record:
+        record(opts.record)
+        return
+    if opts.files:
+        payloads = []
+        for filename in opts.files:
+            with open(filename, 'rb') as f:
+                payloads.append(f.read())
+    else:
+        payloads = [synthetic_payload()]
+    bench(payloads)
+
+
+if __name__ == '__main__':
+    a = ArgumentParser(description = 'Compare JSON backends on doc.getList responses')
+    a.add_argument('files', nargs = '*', help = 'Recorded responses')
+    a.add_argument('--record', metavar = 'FILE', help = 'Record a response to FILE')
+    main(a.parse_args())
@@ -0,0 +1,356 @@
+"""
+Benchmarks of the client hot paths, without network access.
+
+Usage::
+    
+    python benchmarks/suite.py [--cassette FILE] [--save] [--compare]
+                               [--baseline FILE] [--tolerance T] [NAME ...]
+
+Every benchmark runs in a separate process and reports the operations per
+second, the peak memory allocated by one run (measured with
+:mod:`tracemalloc`) and the peak resident set size of the process. The API
+calls get synthetic responses from an in-process transport (see
+:mod:`ipernity.transport`), so they include signing, encoding, dispatch and
+decoding, but no network. With ``--cassette``, the calls recorded in a
+cassette (see :mod:`ipernity.cassette`) are replayed as an additional
+benchmark.
+
+The ``transport_*`` benchmarks compare the HTTP transports, calling
+``test.echo`` on a local fake server (see :mod:`ipernity.testing`).
+
+``--save`` stores the results as baseline (default
+``benchmarks/baseline.json``), ``--compare`` compares them with the baseline
+and exits with status 1 if a benchmark is slower or uses more memory than
+the baseline by more than the tolerance (default 0.2, i.e. 20%). Without a
+baseline, ``--compare`` fails.
+
+Baselines depend on the machine, so none is committed (``baseline.json`` is
+ignored by git). Record one on the machine running the comparison, from the
+revision the changes are compared with::
+    
+    git switch main                         # or the last release
+    python benchmarks/suite.py --save
+    git switch my-branch
+    python benchmarks/suite.py --compare
+
+In CI, both steps run in the same job, with the baseline revision checked
+out into a separate directory and ``--baseline`` pointing to a shared file.
+Benchmarks that don't exist in the baseline are reported, but not compared.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from timeit import Timer
+from typing import Any, Callable, Mapping
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ipernity import IpernityAPI
+from ipernity.exceptions import APIRequestError
+from ipernity.multipart import MultipartEncoder
+from ipernity.transport import InProcessTransport, Request, transports
+
+from json_decode import synthetic_payload
+
+try:
+    import resource
+except ImportError:                                         # pragma: no cover
+    resource = None
+
+default_baseline = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#: Benchmarks by name, see :func:`benchmark`
+benchmarks = {}
+
+#: Results that are compared with the baseline, and if higher is better
+metrics = {'ops': True, 'alloc': False, 'rss': False}
+
+
+def benchmark(name: str):
+    """
+    Registers a benchmark.
+    
+    The decorated function prepares the benchmark and returns a tuple of a
+    function running it and the number of operations per run.
+    """
+    def decorator(setup: Callable[[Namespace], tuple[Callable[[], Any], int]]):
+        benchmarks[name] = setup
+        return setup
+    return decorator
+
+
+def offline_api(pages: int = 10) -> IpernityAPI:
+    """Returns an API object answering ``test.echo`` and ``doc.getList``."""
+    total = pages * 100
+    doc_pages = {p: synthetic_payload(100, p, total) for p in range(1, pages + 1)}
+    echo = json.dumps({'echo': 'bench', 'api': {'status': 'ok'}}).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    
+    def app(request: Request) -> tuple[int, Mapping[str, str], bytes]:
+        if '/doc.getList/' in request.url:
+            page = parse_qs(urlsplit(request.url).query).get('page', ['1'])[0]
+            return 200, headers, doc_pages[int(page)]
+        return 200, headers, echo
+    
+    return IpernityAPI(
+        '0123456789abcdef0123456789abcdef',
+        '0123456789abcdef',
+        'token-0123456789',
+        transport = InProcessTransport(app)
+    )
+
+
+@benchmark('import')
+def bench_import(opts: Namespace):
+    # Imports the ipernity modules again, dependencies stay loaded
+    def run():
+        for module in [m for m in sys.modules if m == 'ipernity' or m.startswith('ipernity.')]:
+            del sys.modules[module]
+        importlib.import_module('ipernity')
+    
+    return run, 1
+
+
+@benchmark('sign_request')
+def bench_sign_request(opts: Namespace):
+    auth = offline_api().auth
+    
+    def run():
+        auth._sign_request('doc.getList', user_id = 123456, extra = 'dates', page = 1, per_page = 100)
+    
+    return run, 1
+
+
+@benchmark('method_dispatch')
+def bench_method_dispatch(opts: Namespace):
+    api = offline_api()
+    
+    def run():
+        api.doc.comments.getList
+        api.album.docs.getList
+        api.test.echo
+    
+    return run, 3
+
+
+@benchmark('call_overhead')
+def bench_call_overhead(opts: Namespace):
+    api = offline_api()
+    
+    def run():
+        api.test.echo(echo = 'bench')
+    
+    return run, 1
+
+
+@benchmark('json_decode')
+def bench_json_decode(opts: Namespace):
+    loads = offline_api()._json.loads
+    payload = synthetic_payload(100)
+    
+    def run():
+        loads(payload)
+    
+    return run, 1
+
+
+@benchmark('walk')
+def bench_walk(opts: Namespace):
+    api = offline_api()
+    
+    def run():
+        for _ in api.walk_docs(extra = 'owner,dates,count,geo'):
+            pass
+    
+    return run, 1000
+
+
+@benchmark('walk_stream')
+def bench_walk_stream(opts: Namespace):
+    api = offline_api()
+    
+    def run():
+        for _ in api.walk_docs(extra = 'owner,dates,count,geo', stream = True):
+            pass
+    
+    return run, 1000
+
+
+@benchmark('upload_encoding')
+def bench_upload_encoding(opts: Namespace):
+    data = bytes(16 * 2**20)
+    fields = {'title': 'Benchmark', 'api_key': '0123456789abcdef', 'api_sig': 'x' * 32}
+    
+    def run():
+        for _ in MultipartEncoder(fields, 'file', ('bench.jpg', data)):
+            pass
+    
+    return run, 1
+
+
+@benchmark('cassette_replay')
+def bench_cassette_replay(opts: Namespace):
+    from ipernity.cassette import Cassette
+    
+    if not opts.cassette:
+        return None
+    with Cassette(opts.cassette) as cassette:
+        calls = [(i['method'], i['args']) for i in cassette._interactions]
+    
+    def run():
+        with Cassette(opts.cassette) as cassette:
+            api = IpernityAPI('key', 'secret', cassette = cassette)
+            for method_name, args in calls:
+                try:
+                    api.call(method_name, **args)
+                except APIRequestError:
+                    # Recorded errors are replayed, too
+                    pass
+    
+    return run, len(calls)
+
+
+def bench_transport(name: str):
+    """Registers a benchmark of a transport, with a local fake server."""
+    @benchmark(f'transport_{name}')
+    def setup(opts: Namespace):
+        from ipernity.testing import FakeIpernity
+        
+        server = FakeIpernity().start()
+        api = IpernityAPI(**server.api_args(transport = name))
+        
+        def run():
+            api.test.echo(echo = 'bench')
+        
+        return run, 1
+
+
+for name in transports:
+    bench_transport(name)
+
+
+def peak_rss() -> int | None:
+    """Returns the peak resident set size of the process in bytes."""
+    if resource is None:                                    # pragma: no cover
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run_benchmark(name: str, opts: Namespace) -> dict[str, Any] | None:
+    """Runs a benchmark in this process."""
+    prepared = benchmarks[name](opts)
+    if prepared is None:
+        return None
+    run, n = prepared
+    run()
+    
+    timer = Timer(run)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(opts.repeat, number)) / number
+    
+    tracemalloc.start()
+    try:
+        run()
+        alloc = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    return {'ops': n / best, 'alloc': alloc, 'rss': peak_rss()}
+
+
+def run_child(name: str, opts: Namespace) -> dict[str, Any] | None:
+    """Runs a benchmark in a new process."""
+    args = [sys.executable, __file__, '--child', name, '--repeat', str(opts.repeat)]
+    if opts.cassette:
+        args += ['--cassette', opts.cassette]
+    proc = subprocess.run(args, check = True, stdout = subprocess.PIPE)
+    return json.loads(proc.stdout)
+
+
+def compare(
+    results: Mapping[str, Mapping[str, Any]],
+    baseline: Mapping[str, Mapping[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Returns the regressions against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        for metric, higher_is_better in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            new = result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append(f'{name} {metric}: {old:.6g} -> {new:.6g} ({change:+.0%})')
+    return regressions
+
+
+def main(opts: Namespace) -> int:
+    if opts.child:
+        json.dump(run_benchmark(opts.child, opts), sys.stdout)
+        return 0
+    
+    names = opts.names or list(benchmarks)
+    unknown = set(names) - set(benchmarks)
+    if unknown:
+        sys.exit(f'Unknown benchmarks: {", ".join(sorted(unknown))}')
+    
+    baseline = {}
+    if opts.compare:
+        try:
+            with open(opts.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            sys.exit(f'Baseline {opts.baseline} not found, create it with --save')
+    
+    results = {}
+    print(f'{"benchmark":18} {"ops/s":>12} {"alloc KiB":>10} {"RSS MiB":>8} {"vs. baseline":>13}')
+    for name in names:
+        result = run_child(name, opts)
+        if result is None:
+            continue
+        results[name] = result
+        old = baseline.get(name, {}).get('ops')
+        rss = f'{result["rss"] / 2**20:.1f}' if result['rss'] else '-'
+        ratio = f'{result["ops"] / old:.2f}x' if old else '-'
+        print(
+            f'{name:18} {result["ops"]:12.1f} {result["alloc"] / 1024:10.1f} '
+            f'{rss:>8} {ratio:>13}'
+        )
+    
+    if opts.save:
+        with open(opts.baseline, 'w') as f:
+            json.dump(results, f, indent = 4, sort_keys = True)
+        print(f'Saved baseline to {opts.baseline}')
+    
+    if opts.compare:
+        regressions = compare(results, baseline, opts.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    a = ArgumentParser(description = 'Benchmark the client hot paths')
+    a.add_argument('names', nargs = '*', metavar = 'NAME', help = 'Benchmarks to run (default: all)')
+    a.add_argument('--cassette', metavar = 'FILE', help = 'Cassette to replay')
+    a.add_argument('--baseline', default = default_baseline, metavar = 'FILE', help = 'Baseline file')
+    a.add_argument('--save', action = 'store_true', help = 'Save the results as baseline')
+    a.add_argument('--compare', action = 'store_true', help = 'Compare the results with the baseline')
+    a.add_argument('--tolerance', type = float, default = 0.2, help = 'Allowed relative regression')
+    a.add_argument('--repeat', type = int, default = 5, help = 'Number of timing repetitions')
+    a.add_argument('--child', help = 'Run a benchmark in this process (internal)')
+    sys.exit(main(a.parse_args()))
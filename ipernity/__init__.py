@@ -2,7 +2,19 @@
 Python Ipernity API
 """
 
+from typing import TYPE_CHECKING
+
 from .api import IpernityAPI
 from .exceptions import *
 from ._version import __version__, __version_tuple__
 
+if TYPE_CHECKING:
+    from .aio import AsyncIpernityAPI
+
+
+def __getattr__(name: str):
+    # Import the asynchronous client (and asyncio/httpx) only when used
+    if name == 'AsyncIpernityAPI':
+        from .aio import AsyncIpernityAPI
+        return AsyncIpernityAPI
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
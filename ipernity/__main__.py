@@ -2,9 +2,7 @@
 Ipernity API shell
 """
 
-import json
 import os
-import readline
 import shlex
 import sys
 from configparser import ConfigParser
@@ -39,6 +37,11 @@ def args() -> ArgumentParser:
         help = 'API token',
         action = 'store'
     )
+    a.add_argument(
+        '-j', '--json-backend',
+        help = 'JSON library (orjson, ujson or json), default: fastest available',
+        action = 'store'
+    )
     return a
 
 
@@ -109,9 +112,17 @@ def login(api: IpernityAPI, permissions: Mapping):
 
 
 def main():
-    key, secret, token = get_api_init(args().parse_args())
+    opts = args().parse_args()
     
-    api = IpernityAPI(key, secret, token)
+    # Line editing for input(), imported here as it is slow to load
+    import readline                                         # noqa: F401
+    
+    key, secret, token = get_api_init(opts)
+    
+    try:
+        api = IpernityAPI(key, secret, token, json_backend = opts.json_backend)
+    except ValueError as e:
+        sys.exit(str(e))
     print('Starting Ipernity API interactive mode...')
     
     while True:
@@ -146,10 +157,10 @@ def main():
         
         try:
             res = api.call(method, **params)
-            print(json.dumps(res, indent = 4))
+            print(api.json_backend.dumps(res, indent = 4))
         except IpernityError as e:
             print(e, file = sys.stderr)
 
 
-main()
-
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1118 @@
+"""
+Generated Method Classes
+==========================
+
+Generated by ``update-api-data.py`` from ``methods.json``, do not edit.
+
+Each API namespace (like ``doc.tags``) is a subclass of
+:class:`~ipernity.method.IpernityMethod` with a method for every API
+method. The namespace objects are created once per API object.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from typing import Any, TYPE_CHECKING
+
+from .method import IpernityMethod
+
+if TYPE_CHECKING:
+    from .api import api_arg
+
+
+class _AlbumDocs(IpernityMethod):
+    """Methods ``album.docs.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add one or many docs to an album
+        
+        See :iper:`album.docs.add`.
+        """
+        return self._api.call('album.docs.add', **kwargs)
+    
+    def getContext(self, **kwargs: api_arg) -> Any:
+        """
+        Get the document context in an album
+        
+        See :iper:`album.docs.getContext`.
+        """
+        return self._api.call('album.docs.getContext', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of documents in an album
+        
+        See :iper:`album.docs.getList`.
+        """
+        return self._api.call('album.docs.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove one or many docs from an album
+        
+        See :iper:`album.docs.remove`.
+        """
+        return self._api.call('album.docs.remove', **kwargs)
+    
+    def setList(self, **kwargs: api_arg) -> Any:
+        """
+        Replace all the documents and the cover of an album
+        
+        See :iper:`album.docs.setList`.
+        """
+        return self._api.call('album.docs.setList', **kwargs)
+
+
+class _ApiMethods(IpernityMethod):
+    """Methods ``api.methods.*``"""
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Return information about an API method.
+        
+        See :iper:`api.methods.get`.
+        """
+        return self._api.call('api.methods.get', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the API methods list
+        
+        See :iper:`api.methods.getList`.
+        """
+        return self._api.call('api.methods.getList', **kwargs)
+
+
+class _DocAlbums(IpernityMethod):
+    """Methods ``doc.albums.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add doc in one or many albums
+        
+        See :iper:`doc.albums.add`.
+        """
+        return self._api.call('doc.albums.add', **kwargs)
+
+
+class _DocComments(IpernityMethod):
+    """Methods ``doc.comments.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Comment on a document.
+        
+        See :iper:`doc.comments.add`.
+        """
+        return self._api.call('doc.comments.add', **kwargs)
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Delete a comment on a document.
+        
+        See :iper:`doc.comments.delete`.
+        """
+        return self._api.call('doc.comments.delete', **kwargs)
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a comment on a document.
+        
+        See :iper:`doc.comments.edit`.
+        """
+        return self._api.call('doc.comments.edit', **kwargs)
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Return a comment on a document.
+        
+        See :iper:`doc.comments.get`.
+        """
+        return self._api.call('doc.comments.get', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the comments on a document.
+        
+        See :iper:`doc.comments.getList`.
+        """
+        return self._api.call('doc.comments.getList', **kwargs)
+    
+    def reply(self, **kwargs: api_arg) -> Any:
+        """
+        Reply to a comment on a document.
+        
+        See :iper:`doc.comments.reply`.
+        """
+        return self._api.call('doc.comments.reply', **kwargs)
+
+
+class _DocNotes(IpernityMethod):
+    """Methods ``doc.notes.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add a note to a photo.
+        
+        See :iper:`doc.notes.add`.
+        """
+        return self._api.call('doc.notes.add', **kwargs)
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Remove a note from a photo.
+        
+        See :iper:`doc.notes.delete`.
+        """
+        return self._api.call('doc.notes.delete', **kwargs)
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a note on a photo.
+        
+        See :iper:`doc.notes.edit`.
+        """
+        return self._api.call('doc.notes.edit', **kwargs)
+
+
+class _DocTags(IpernityMethod):
+    """Methods ``doc.tags.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add a tag to a document.
+        
+        See :iper:`doc.tags.add`.
+        """
+        return self._api.call('doc.tags.add', **kwargs)
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit (in fact replace) the tags for a document owned by the calling user.
+        
+        See :iper:`doc.tags.edit`.
+        """
+        return self._api.call('doc.tags.edit', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of tags on a document.
+        
+        See :iper:`doc.tags.getList`.
+        """
+        return self._api.call('doc.tags.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove a tag from a document.
+        
+        See :iper:`doc.tags.remove`.
+        """
+        return self._api.call('doc.tags.remove', **kwargs)
+
+
+class _ExploreDocs(IpernityMethod):
+    """Methods ``explore.docs.*``"""
+    
+    def getPopular(self, **kwargs: api_arg) -> Any:
+        """
+        Return the week most popular documents
+        
+        See :iper:`explore.docs.getPopular`.
+        """
+        return self._api.call('explore.docs.getPopular', **kwargs)
+    
+    def getRecent(self, **kwargs: api_arg) -> Any:
+        """
+        Return some recent documents posted by everyone
+        
+        See :iper:`explore.docs.getRecent`.
+        """
+        return self._api.call('explore.docs.getRecent', **kwargs)
+    
+    def homepage(self, **kwargs: api_arg) -> Any:
+        """
+        Return the homepage focus last 5 items
+        
+        See :iper:`explore.docs.homepage`.
+        """
+        return self._api.call('explore.docs.homepage', **kwargs)
+
+
+class _ExploreGroups(IpernityMethod):
+    """Methods ``explore.groups.*``"""
+    
+    def getRandom(self, **kwargs: api_arg) -> Any:
+        """
+        Return some random interesting groups
+        
+        See :iper:`explore.groups.getRandom`.
+        """
+        return self._api.call('explore.groups.getRandom', **kwargs)
+
+
+class _FavesAlbums(IpernityMethod):
+    """Methods ``faves.albums.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add an album to your faves
+        
+        See :iper:`faves.albums.add`.
+        """
+        return self._api.call('faves.albums.add', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return a list of favorite albums for a given user
+        
+        See :iper:`faves.albums.getList`.
+        """
+        return self._api.call('faves.albums.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove an album from your faves
+        
+        See :iper:`faves.albums.remove`.
+        """
+        return self._api.call('faves.albums.remove', **kwargs)
+
+
+class _FavesDocs(IpernityMethod):
+    """Methods ``faves.docs.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add a document to your faves
+        
+        See :iper:`faves.docs.add`.
+        """
+        return self._api.call('faves.docs.add', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return a list of favorite documents for a given user
+        
+        See :iper:`faves.docs.getList`.
+        """
+        return self._api.call('faves.docs.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove a document from your faves
+        
+        See :iper:`faves.docs.remove`.
+        """
+        return self._api.call('faves.docs.remove', **kwargs)
+
+
+class _FolderAlbums(IpernityMethod):
+    """Methods ``folder.albums.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add one or many albums to a folder
+        
+        See :iper:`folder.albums.add`.
+        """
+        return self._api.call('folder.albums.add', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of albums in a folder
+        
+        See :iper:`folder.albums.getList`.
+        """
+        return self._api.call('folder.albums.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove one or many albums from a folder
+        
+        See :iper:`folder.albums.remove`.
+        """
+        return self._api.call('folder.albums.remove', **kwargs)
+
+
+class _GroupDocs(IpernityMethod):
+    """Methods ``group.docs.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Add one or many docs to a group
+        
+        See :iper:`group.docs.add`.
+        """
+        return self._api.call('group.docs.add', **kwargs)
+    
+    def getContext(self, **kwargs: api_arg) -> Any:
+        """
+        Get the document context in a group
+        
+        See :iper:`group.docs.getContext`.
+        """
+        return self._api.call('group.docs.getContext', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of documents in a group
+        
+        See :iper:`group.docs.getList`.
+        """
+        return self._api.call('group.docs.getList', **kwargs)
+    
+    def remove(self, **kwargs: api_arg) -> Any:
+        """
+        Remove one or many docs from a group
+        
+        See :iper:`group.docs.remove`.
+        """
+        return self._api.call('group.docs.remove', **kwargs)
+
+
+class _NetworkDocs(IpernityMethod):
+    """Methods ``network.docs.*``"""
+    
+    def getRecent(self, **kwargs: api_arg) -> Any:
+        """
+        Return recent uploads of the calling user's network
+        
+        See :iper:`network.docs.getRecent`.
+        """
+        return self._api.call('network.docs.getRecent', **kwargs)
+
+
+class _PostComments(IpernityMethod):
+    """Methods ``post.comments.*``"""
+    
+    def add(self, **kwargs: api_arg) -> Any:
+        """
+        Comment on a post.
+        
+        See :iper:`post.comments.add`.
+        """
+        return self._api.call('post.comments.add', **kwargs)
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Delete a comment on a post.
+        
+        See :iper:`post.comments.delete`.
+        """
+        return self._api.call('post.comments.delete', **kwargs)
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a comment on a post.
+        
+        See :iper:`post.comments.edit`.
+        """
+        return self._api.call('post.comments.edit', **kwargs)
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Return a comment on a post.
+        
+        See :iper:`post.comments.get`.
+        """
+        return self._api.call('post.comments.get', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the comments on a post.
+        
+        See :iper:`post.comments.getList`.
+        """
+        return self._api.call('post.comments.getList', **kwargs)
+    
+    def reply(self, **kwargs: api_arg) -> Any:
+        """
+        Reply to a comment on a post.
+        
+        See :iper:`post.comments.reply`.
+        """
+        return self._api.call('post.comments.reply', **kwargs)
+
+
+class _TagsDocs(IpernityMethod):
+    """Methods ``tags.docs.*``"""
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of documents for a given tag
+        
+        See :iper:`tags.docs.getList`.
+        """
+        return self._api.call('tags.docs.getList', **kwargs)
+
+
+class _TagsUser(IpernityMethod):
+    """Methods ``tags.user.*``"""
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Get the tags list for a given user.
+        
+        See :iper:`tags.user.getList`.
+        """
+        return self._api.call('tags.user.getList', **kwargs)
+    
+    def getPopular(self, **kwargs: api_arg) -> Any:
+        """
+        Get the most used tags for a given user.
+        
+        See :iper:`tags.user.getPopular`.
+        """
+        return self._api.call('tags.user.getPopular', **kwargs)
+
+
+class _Account(IpernityMethod):
+    """Methods ``account.*``"""
+    
+    def getQuota(self, **kwargs: api_arg) -> Any:
+        """
+        Return the calling user upload quota.
+        
+        See :iper:`account.getQuota`.
+        """
+        return self._api.call('account.getQuota', **kwargs)
+
+
+class _Album(IpernityMethod):
+    """Methods ``album.*``"""
+    
+    def create(self, **kwargs: api_arg) -> Any:
+        """
+        Create a new album
+        
+        See :iper:`album.create`.
+        """
+        return self._api.call('album.create', **kwargs)
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Delete an album
+        
+        See :iper:`album.delete`.
+        """
+        return self._api.call('album.delete', **kwargs)
+    
+    @cached_property
+    def docs(self) -> _AlbumDocs:
+        """Methods ``album.docs.*``"""
+        return _AlbumDocs(self._api, 'album.docs')
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit an album
+        
+        See :iper:`album.edit`.
+        """
+        return self._api.call('album.edit', **kwargs)
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get information about an album.
+        
+        See :iper:`album.get`.
+        """
+        return self._api.call('album.get', **kwargs)
+    
+    def getFaves(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of members who have faved a album.
+        
+        See :iper:`album.getFaves`.
+        """
+        return self._api.call('album.getFaves', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the albums list for a given user
+        
+        See :iper:`album.getList`.
+        """
+        return self._api.call('album.getList', **kwargs)
+    
+    def getVisitors(self, **kwargs: api_arg) -> Any:
+        """
+        Return the album latest visitors.
+        
+        See :iper:`album.getVisitors`.
+        """
+        return self._api.call('album.getVisitors', **kwargs)
+    
+    def orderList(self, **kwargs: api_arg) -> Any:
+        """
+        Change the order of your albums
+        
+        See :iper:`album.orderList`.
+        """
+        return self._api.call('album.orderList', **kwargs)
+    
+    def setPerms(self, **kwargs: api_arg) -> Any:
+        """
+        Set permissions for an album
+        
+        See :iper:`album.setPerms`.
+        """
+        return self._api.call('album.setPerms', **kwargs)
+
+
+class _Api(IpernityMethod):
+    """Methods ``api.*``"""
+    
+    @cached_property
+    def methods(self) -> _ApiMethods:
+        """Methods ``api.methods.*``"""
+        return _ApiMethods(self._api, 'api.methods')
+
+
+class _Auth(IpernityMethod):
+    """Methods ``auth.*``"""
+    
+    def checkToken(self, **kwargs: api_arg) -> Any:
+        """
+        Check a token validity.
+        
+        See :iper:`auth.checkToken`.
+        """
+        return self._api.call('auth.checkToken', **kwargs)
+    
+    def getFrob(self, **kwargs: api_arg) -> Any:
+        """
+        Ask for a Frob.
+        
+        See :iper:`auth.getFrob`.
+        """
+        return self._api.call('auth.getFrob', **kwargs)
+    
+    def getToken(self, **kwargs: api_arg) -> Any:
+        """
+        Returns the auth token for the given frob
+        
+        See :iper:`auth.getToken`.
+        """
+        return self._api.call('auth.getToken', **kwargs)
+
+
+class _Doc(IpernityMethod):
+    """Methods ``doc.*``"""
+    
+    @cached_property
+    def albums(self) -> _DocAlbums:
+        """Methods ``doc.albums.*``"""
+        return _DocAlbums(self._api, 'doc.albums')
+    
+    def checkMD5(self, **kwargs: api_arg) -> Any:
+        """
+        Check if a doc exists in your stream using MD5.
+        
+        See :iper:`doc.checkMD5`.
+        """
+        return self._api.call('doc.checkMD5', **kwargs)
+    
+    @cached_property
+    def comments(self) -> _DocComments:
+        """Methods ``doc.comments.*``"""
+        return _DocComments(self._api, 'doc.comments')
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Delete a document.
+        
+        See :iper:`doc.delete`.
+        """
+        return self._api.call('doc.delete', **kwargs)
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get details about document.
+        
+        See :iper:`doc.get`.
+        """
+        return self._api.call('doc.get', **kwargs)
+    
+    def getContainers(self, **kwargs: api_arg) -> Any:
+        """
+        Return all albums and groups the document belongs to.
+        
+        See :iper:`doc.getContainers`.
+        """
+        return self._api.call('doc.getContainers', **kwargs)
+    
+    def getContext(self, **kwargs: api_arg) -> Any:
+        """
+        Get the document context in docstream
+        
+        See :iper:`doc.getContext`.
+        """
+        return self._api.call('doc.getContext', **kwargs)
+    
+    def getExif(self, **kwargs: api_arg) -> Any:
+        """
+        Return the meta information for a document (EXIF/ID3/...).
+        
+        See :iper:`doc.getExif`.
+        """
+        return self._api.call('doc.getExif', **kwargs)
+    
+    def getFaves(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of members who have faved a document.
+        
+        See :iper:`doc.getFaves`.
+        """
+        return self._api.call('doc.getFaves', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the member's list of documents
+        
+        See :iper:`doc.getList`.
+        """
+        return self._api.call('doc.getList', **kwargs)
+    
+    def getMedias(self, **kwargs: api_arg) -> Any:
+        """
+        Get document media urls (thumbs, medias, original,...).
+        
+        See :iper:`doc.getMedias`.
+        """
+        return self._api.call('doc.getMedias', **kwargs)
+    
+    def getPerms(self, **kwargs: api_arg) -> Any:
+        """
+        Return permissions for a document.
+        
+        See :iper:`doc.getPerms`.
+        """
+        return self._api.call('doc.getPerms', **kwargs)
+    
+    def getVisitors(self, **kwargs: api_arg) -> Any:
+        """
+        Return the document latest visitors.
+        
+        See :iper:`doc.getVisitors`.
+        """
+        return self._api.call('doc.getVisitors', **kwargs)
+    
+    @cached_property
+    def notes(self) -> _DocNotes:
+        """Methods ``doc.notes.*``"""
+        return _DocNotes(self._api, 'doc.notes')
+    
+    def search(self, **kwargs: api_arg) -> Any:
+        """
+        Search for documents.
+        
+        See :iper:`doc.search`.
+        """
+        return self._api.call('doc.search', **kwargs)
+    
+    def set(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a document title and description.
+        
+        See :iper:`doc.set`.
+        """
+        return self._api.call('doc.set', **kwargs)
+    
+    def setGeo(self, **kwargs: api_arg) -> Any:
+        """
+        Set longitude and latitude of a document.
+        
+        See :iper:`doc.setGeo`.
+        """
+        return self._api.call('doc.setGeo', **kwargs)
+    
+    def setLicense(self, **kwargs: api_arg) -> Any:
+        """
+        Set the license for a document.
+        
+        See :iper:`doc.setLicense`.
+        """
+        return self._api.call('doc.setLicense', **kwargs)
+    
+    def setPerms(self, **kwargs: api_arg) -> Any:
+        """
+        Set permissions for a document.
+        
+        See :iper:`doc.setPerms`.
+        """
+        return self._api.call('doc.setPerms', **kwargs)
+    
+    def setSafety(self, **kwargs: api_arg) -> Any:
+        """
+        Set the safety for a document.
+        
+        See :iper:`doc.setSafety`.
+        """
+        return self._api.call('doc.setSafety', **kwargs)
+    
+    @cached_property
+    def tags(self) -> _DocTags:
+        """Methods ``doc.tags.*``"""
+        return _DocTags(self._api, 'doc.tags')
+
+
+class _Explore(IpernityMethod):
+    """Methods ``explore.*``"""
+    
+    @cached_property
+    def docs(self) -> _ExploreDocs:
+        """Methods ``explore.docs.*``"""
+        return _ExploreDocs(self._api, 'explore.docs')
+    
+    @cached_property
+    def groups(self) -> _ExploreGroups:
+        """Methods ``explore.groups.*``"""
+        return _ExploreGroups(self._api, 'explore.groups')
+
+
+class _Faves(IpernityMethod):
+    """Methods ``faves.*``"""
+    
+    @cached_property
+    def albums(self) -> _FavesAlbums:
+        """Methods ``faves.albums.*``"""
+        return _FavesAlbums(self._api, 'faves.albums')
+    
+    @cached_property
+    def docs(self) -> _FavesDocs:
+        """Methods ``faves.docs.*``"""
+        return _FavesDocs(self._api, 'faves.docs')
+
+
+class _Folder(IpernityMethod):
+    """Methods ``folder.*``"""
+    
+    @cached_property
+    def albums(self) -> _FolderAlbums:
+        """Methods ``folder.albums.*``"""
+        return _FolderAlbums(self._api, 'folder.albums')
+    
+    def create(self, **kwargs: api_arg) -> Any:
+        """
+        Create a new folder
+        
+        See :iper:`folder.create`.
+        """
+        return self._api.call('folder.create', **kwargs)
+    
+    def delete(self, **kwargs: api_arg) -> Any:
+        """
+        Delete a folder
+        
+        See :iper:`folder.delete`.
+        """
+        return self._api.call('folder.delete', **kwargs)
+    
+    def edit(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a folder
+        
+        See :iper:`folder.edit`.
+        """
+        return self._api.call('folder.edit', **kwargs)
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get information about a folder.
+        
+        See :iper:`folder.get`.
+        """
+        return self._api.call('folder.get', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the folders list for a given user
+        
+        See :iper:`folder.getList`.
+        """
+        return self._api.call('folder.getList', **kwargs)
+    
+    def orderList(self, **kwargs: api_arg) -> Any:
+        """
+        Change the order of your folders
+        
+        See :iper:`folder.orderList`.
+        """
+        return self._api.call('folder.orderList', **kwargs)
+
+
+class _Group(IpernityMethod):
+    """Methods ``group.*``"""
+    
+    @cached_property
+    def docs(self) -> _GroupDocs:
+        """Methods ``group.docs.*``"""
+        return _GroupDocs(self._api, 'group.docs')
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get details about a group.
+        
+        See :iper:`group.get`.
+        """
+        return self._api.call('group.get', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the groups list for a given user
+        
+        See :iper:`group.getList`.
+        """
+        return self._api.call('group.getList', **kwargs)
+    
+    def search(self, **kwargs: api_arg) -> Any:
+        """
+        Search for a group.
+        
+        See :iper:`group.search`.
+        """
+        return self._api.call('group.search', **kwargs)
+
+
+class _Network(IpernityMethod):
+    """Methods ``network.*``"""
+    
+    def autocomplete(self, **kwargs: api_arg) -> Any:
+        """
+        Return the members matching a sub-query.
+        
+        See :iper:`network.autocomplete`.
+        """
+        return self._api.call('network.autocomplete', **kwargs)
+    
+    @cached_property
+    def docs(self) -> _NetworkDocs:
+        """Methods ``network.docs.*``"""
+        return _NetworkDocs(self._api, 'network.docs')
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return members of someone's network.
+        
+        See :iper:`network.getList`.
+        """
+        return self._api.call('network.getList', **kwargs)
+
+
+class _Post(IpernityMethod):
+    """Methods ``post.*``"""
+    
+    @cached_property
+    def comments(self) -> _PostComments:
+        """Methods ``post.comments.*``"""
+        return _PostComments(self._api, 'post.comments')
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get details about a post.
+        
+        See :iper:`post.get`.
+        """
+        return self._api.call('post.get', **kwargs)
+    
+    def getContext(self, **kwargs: api_arg) -> Any:
+        """
+        Get the post context in posts stream
+        
+        See :iper:`post.getContext`.
+        """
+        return self._api.call('post.getContext', **kwargs)
+    
+    def getFaves(self, **kwargs: api_arg) -> Any:
+        """
+        Return the list of members who have faved a post.
+        
+        See :iper:`post.getFaves`.
+        """
+        return self._api.call('post.getFaves', **kwargs)
+    
+    def getList(self, **kwargs: api_arg) -> Any:
+        """
+        Return the member's list of posts
+        
+        See :iper:`post.getList`.
+        """
+        return self._api.call('post.getList', **kwargs)
+    
+    def getVisitors(self, **kwargs: api_arg) -> Any:
+        """
+        Return the post latest visitors.
+        
+        See :iper:`post.getVisitors`.
+        """
+        return self._api.call('post.getVisitors', **kwargs)
+    
+    def search(self, **kwargs: api_arg) -> Any:
+        """
+        Search for posts.
+        
+        See :iper:`post.search`.
+        """
+        return self._api.call('post.search', **kwargs)
+    
+    def set(self, **kwargs: api_arg) -> Any:
+        """
+        Edit a article title and description.
+        
+        See :iper:`post.set`.
+        """
+        return self._api.call('post.set', **kwargs)
+
+
+class _Tags(IpernityMethod):
+    """Methods ``tags.*``"""
+    
+    @cached_property
+    def docs(self) -> _TagsDocs:
+        """Methods ``tags.docs.*``"""
+        return _TagsDocs(self._api, 'tags.docs')
+    
+    @cached_property
+    def user(self) -> _TagsUser:
+        """Methods ``tags.user.*``"""
+        return _TagsUser(self._api, 'tags.user')
+
+
+class _Test(IpernityMethod):
+    """Methods ``test.*``"""
+    
+    def echo(self, **kwargs: api_arg) -> Any:
+        """
+        A simple echo test.
+        
+        See :iper:`test.echo`.
+        """
+        return self._api.call('test.echo', **kwargs)
+    
+    def hello(self, **kwargs: api_arg) -> Any:
+        """
+        Hello world!
+        
+        See :iper:`test.hello`.
+        """
+        return self._api.call('test.hello', **kwargs)
+
+
+class _Upload(IpernityMethod):
+    """Methods ``upload.*``"""
+    
+    def checkTickets(self, **kwargs: api_arg) -> Any:
+        """
+        Check the status of one or more upload tickets.
+        
+        See :iper:`upload.checkTickets`.
+        """
+        return self._api.call('upload.checkTickets', **kwargs)
+    
+    def file(self, **kwargs: api_arg) -> Any:
+        """
+        Upload a new file.
+        
+        See :iper:`upload.file`.
+        """
+        return self._api.call('upload.file', **kwargs)
+    
+    def replace(self, **kwargs: api_arg) -> Any:
+        """
+        Replace a file.
+        
+        See :iper:`upload.replace`.
+        """
+        return self._api.call('upload.replace', **kwargs)
+
+
+class _User(IpernityMethod):
+    """Methods ``user.*``"""
+    
+    def get(self, **kwargs: api_arg) -> Any:
+        """
+        Get information about a user
+        
+        See :iper:`user.get`.
+        """
+        return self._api.call('user.get', **kwargs)
+
+
+class GeneratedMethods:
+    """
+    Mixin with the top-level namespaces for :class:`~ipernity.api.IpernityAPI`
+    """
+    
+    @cached_property
+    def account(self) -> _Account:
+        """Methods ``account.*``"""
+        return _Account(self, 'account')
+    
+    @cached_property
+    def album(self) -> _Album:
+        """Methods ``album.*``"""
+        return _Album(self, 'album')
+    
+    @cached_property
+    def api(self) -> _Api:
+        """Methods ``api.*``"""
+        return _Api(self, 'api')
+    
+    @cached_property
+    def doc(self) -> _Doc:
+        """Methods ``doc.*``"""
+        return _Doc(self, 'doc')
+    
+    @cached_property
+    def explore(self) -> _Explore:
+        """Methods ``explore.*``"""
+        return _Explore(self, 'explore')
+    
+    @cached_property
+    def faves(self) -> _Faves:
+        """Methods ``faves.*``"""
+        return _Faves(self, 'faves')
+    
+    @cached_property
+    def folder(self) -> _Folder:
+        """Methods ``folder.*``"""
+        return _Folder(self, 'folder')
+    
+    @cached_property
+    def group(self) -> _Group:
+        """Methods ``group.*``"""
+        return _Group(self, 'group')
+    
+    @cached_property
+    def network(self) -> _Network:
+        """Methods ``network.*``"""
+        return _Network(self, 'network')
+    
+    @cached_property
+    def post(self) -> _Post:
+        """Methods ``post.*``"""
+        return _Post(self, 'post')
+    
+    @cached_property
+    def tags(self) -> _Tags:
+        """Methods ``tags.*``"""
+        return _Tags(self, 'tags')
+    
+    @cached_property
+    def test(self) -> _Test:
+        """Methods ``test.*``"""
+        return _Test(self, 'test')
+    
+    @cached_property
+    def upload(self) -> _Upload:
+        """Methods ``upload.*``"""
+        return _Upload(self, 'upload')
+    
+    @cached_property
+    def user(self) -> _User:
+        """Methods ``user.*``"""
+        return _User(self, 'user')
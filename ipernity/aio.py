@@ -0,0 +1,687 @@
+"""
+Asynchronous API Class
+========================
+
+:class:`AsyncIpernityAPI` provides the functionality of
+:class:`~ipernity.api.IpernityAPI` for :mod:`asyncio` applications. API calls
+are coroutines and the ``walk_*`` methods are asynchronous generators:
+
+.. code-block:: python
+    
+    import asyncio
+    from ipernity import AsyncIpernityAPI
+    
+    async def main():
+        async with AsyncIpernityAPI(key, secret, token) as api:
+            user = await api.user.get(user_id = 4711)
+            async for doc in api.walk_docs():
+                print(doc['title'])
+    
+    asyncio.run(main())
+
+``AsyncIpernityAPI`` requires `HTTPX <https://www.python-httpx.org/>`_, which
+can be installed with
+
+.. code-block:: shell-session
+    
+    $ pip install PyIpernity[async]
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from logging import getLogger
+from typing import AsyncIterator, Iterable, Mapping, TYPE_CHECKING
+
+try:
+    import httpx
+except ImportError:                                         # pragma: no cover
+    httpx = None
+
+from .api import IpernityAPI
+from .exceptions import APIRequestError, TransportError, UploadError
+from .stream import ListStreamParser
+
+if TYPE_CHECKING:
+    from .api import api_arg, timeout_arg
+    from .auth import AuthHandler
+    from .cache import ResponseCache
+    from .cassette import Cassette
+    from .checkpoint import Checkpoint
+    from .jsonlib import JSONBackend
+    from .metrics import MetricsRegistry
+    from .ratelimit import RateLimiter
+    from .records import Record
+    from .retry import RetryPolicy
+    from .transport import AsyncTransport, Response
+
+log = getLogger(__name__)
+
+
+class AsyncIpernityAPI(IpernityAPI):
+    """
+    Asynchronous version of :class:`~ipernity.api.IpernityAPI`.
+    
+    API methods are called like in :class:`~ipernity.api.IpernityAPI`, but
+    the calls return awaitables. Request signing, the authentication handlers
+    and method validation are the same as in the synchronous version.
+    
+    Args:
+        api_key:    The API key obtained from Ipernity.
+        api_secret: The secret belonging to the API key.
+        token:      API token, see :class:`~ipernity.api.IpernityAPI`.
+        auth:       Authentication method, see
+                    :class:`~ipernity.api.IpernityAPI`.
+        url:        API URL, should normally be left alone.
+        auth_url_base:  Base for Authentication URLs, should normally be left
+                        alone.
+        max_connections:    Maximum number of concurrent connections to the
+                            API server.
+        timeout:    Timeout for HTTP requests in seconds. Can be a single
+                    number or a tuple ``(connect timeout, read timeout)``.
+        rate_limiter:   A :class:`~ipernity.ratelimit.RateLimiter` that limits
+                        the rate of API calls. Waiting for the limiter does
+                        not block the event loop.
+        retry:      A :class:`~ipernity.retry.RetryPolicy` for failed read
+                    methods.
+        cache:      A response cache (see :mod:`ipernity.cache`) for read
+                    methods.
+        json_backend:   The :mod:`JSON backend <ipernity.jsonlib>` for
+                        decoding responses.
+        metrics:    A :class:`~ipernity.metrics.MetricsRegistry` that counts
+                    calls and requests.
+        cassette:   A :class:`~ipernity.cassette.Cassette` for recording or
+                    replaying requests.
+        transport:  The asynchronous :mod:`transport <ipernity.transport>`,
+                    as name (``httpx``) or
+                    :class:`~ipernity.transport.AsyncTransport`. The default
+                    is ``httpx``.
+    
+    .. note::
+        :attr:`user_info` and :attr:`permissions` are not fetched
+        automatically. They are set if the token is given as a mapping, by
+        :meth:`~ipernity.auth.AuthHandler.getToken`, or by :meth:`check_token`.
+    """
+    
+    # Name of the default transport
+    _default_transport = 'httpx'
+    
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        token: str | Mapping | None = None,
+        auth: str | AuthHandler = 'desktop',
+        url: str = 'https://api.ipernity.com/api/',
+        auth_url_base: str = 'https://www.ipernity.com/apps/authorize',
+        max_connections: int = 100,
+        timeout: timeout_arg = None,
+        rate_limiter: RateLimiter | None = None,
+        retry: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        json_backend: str | JSONBackend | None = None,
+        metrics: MetricsRegistry | None = None,
+        cassette: Cassette | None = None,
+        transport: str | AsyncTransport | None = None,
+    ):
+        if httpx is None and (transport is None or isinstance(transport, str)):
+            raise ImportError('AsyncIpernityAPI requires httpx')
+        super().__init__(
+            api_key,
+            api_secret,
+            token,
+            auth = auth,
+            url = url,
+            auth_url_base = auth_url_base,
+            pool_size = max_connections,
+            timeout = timeout,
+            rate_limiter = rate_limiter,
+            retry = retry,
+            cache = cache,
+            json_backend = json_backend,
+            metrics = metrics,
+            cassette = cassette,
+            transport = transport,
+        )
+    
+    
+    async def __aenter__(self) -> AsyncIpernityAPI:
+        return self
+    
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    
+    async def aclose(self):
+        """
+        Closes the HTTP connections.
+        
+        The API object can still be used afterwards, a new client is created
+        on the next call.
+        """
+        if self._transport is not None:
+            await self._transport.aclose()
+        self.close()
+    
+    
+    @property
+    def transport(self) -> AsyncTransport:
+        """
+        The asynchronous transport sending the HTTP requests
+        
+        A transport given by name is created on first use.
+        """
+        return super().transport
+    
+    
+    @staticmethod
+    def _transport_types() -> Mapping[str, type]:
+        from .transport import async_transports
+        return async_transports
+    
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The HTTP client used for API calls
+        
+        The client is created on first use. Only available with the ``httpx``
+        transport (:class:`~ipernity.transport.AsyncHTTPXTransport`).
+        """
+        return self.transport.client
+    
+    
+    @property
+    def user_info(self) -> dict | None:
+        """
+        Information about the current user
+        
+        Unlike in :class:`~ipernity.api.IpernityAPI`, this is not fetched
+        automatically, use :meth:`check_token`.
+        """
+        return self._user
+    
+    
+    @property
+    def permissions(self) -> dict | None:
+        """
+        Information about the current permissions
+        
+        Unlike in :class:`~ipernity.api.IpernityAPI`, this is not fetched
+        automatically, use :meth:`check_token`.
+        """
+        return self._perm
+    
+    
+    async def check_token(self) -> dict:
+        """
+        Fetches :attr:`user_info` and :attr:`permissions` for the current token.
+        
+        Returns:
+            The ``auth`` part of the :iper:`auth.checkToken` result.
+        """
+        auth = (await self.auth.checkToken(self.token))['auth']
+        self._user = auth['user']
+        self._perm = auth['permissions']
+        return auth
+    
+    
+    async def call(self, method_name: str, **kwargs: api_arg) -> dict:
+        """
+        Makes an API call.
+        
+        Args:
+            method_name:    API method to call
+            kwargs:         API arguments
+        
+        Raises:
+            UnknownMethod:      Tried to call a method not contained in
+                                :iper:`api.methods.getList`.
+            APIRequestError:    The API call returned an error, or the HTTP
+                                request failed.
+        """
+        url = self._method_url(method_name)
+        
+        if self._cache is not None:
+            result = self._cached(method_name, kwargs)
+            if result is not None:
+                if self._metrics is not None:
+                    self._metrics.count_cached(method_name)
+                return result
+        
+        if self._metrics is None:
+            return await self._fetch(url, method_name, kwargs)
+        with self._metrics.track_call(method_name):
+            return await self._fetch(url, method_name, kwargs)
+    
+    
+    async def _fetch(self, url: str, method_name: str, kwargs: Mapping[str, api_arg]) -> dict:
+        """Runs an API call and updates the cache."""
+        response = await self._request(url, method_name, kwargs)
+        
+        result = self._json.loads(response.content)
+        self._check_result(result, method_name, kwargs)
+        
+        if self._cache is not None:
+            self._update_cache(method_name, kwargs, result)
+        
+        log.debug('Returning %s', result)
+        return result
+    
+    
+    async def _request(
+        self,
+        url: str,
+        method_name: str,
+        kwargs: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """
+        Runs the HTTP request for an API call.
+        
+        Waits for the rate limiter, and retries failed requests if allowed by
+        the retry policy. With ``stream``, the response body is not read.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._rate_limiter is not None:
+                wait = self._rate_limiter.reserve(self._api_key, method_name)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            
+            try:
+                response = await self._do_request(url, method_name, kwargs, stream)
+            except TransportError as e:
+                error = APIRequestError(
+                    'httperror',
+                    0,
+                    e.message,
+                    method_name,
+                    kwargs
+                )
+                error.__cause__ = e
+                status = retry_after = None
+            else:
+                # Check for HTTP errors
+                if response.ok:
+                    return response
+                error = APIRequestError(
+                    'httperror',
+                    response.status_code,
+                    response.reason,
+                    method_name,
+                    kwargs
+                )
+                status = response.status_code
+                retry_after = response.headers.get('Retry-After')
+                await response.aclose()
+            
+            delay = self._retry_delay(method_name, attempt, status, retry_after)
+            if delay is None:
+                raise error
+            log.info(
+                'Attempt %d of %s failed (%s), retrying in %.1fs',
+                attempt,
+                method_name,
+                error,
+                delay
+            )
+            await asyncio.sleep(delay)
+    
+    
+    async def _do_request(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """Signs and runs a request, counting it in :attr:`metrics`."""
+        if self._metrics is None:
+            return await self._send(url, method_name, method_args, stream)
+        with self._metrics.track_request(method_name) as info:
+            response = await self._send(url, method_name, method_args, stream)
+            info.set_response(
+                response.url,
+                response.request_headers,
+                response.status_code,
+                response.headers,
+                None if stream else response.content
+            )
+            return response
+    
+    
+    async def _send(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """Runs a request, or replays it from the cassette."""
+        if self._cassette is None:
+            return await self._http_request(url, method_name, method_args, stream)
+        return await self._cassette.do_request_async(
+            self,
+            url,
+            method_name,
+            method_args,
+            lambda: self._http_request(url, method_name, method_args, stream)
+        )
+    
+    
+    async def _http_request(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """Signs a request with the authentication handler and runs it."""
+        return await self.transport.request(
+            **self.auth._prepare(url, method_name, method_args),
+            timeout = self._timeout,
+            stream = stream
+        )
+    
+    
+    async def _stream_page(
+        self,
+        method_name: str,
+        parser: ListStreamParser,
+        kwargs: Mapping[str, api_arg],
+    ) -> AsyncIterator[dict]:
+        """Yields the elements of a result page while it is received."""
+        url = self._method_url(method_name)
+        response = await self._request(url, method_name, kwargs, stream = True)
+        try:
+            async for chunk in response.aiter_bytes(self._stream_chunk_size):
+                for elem in parser.feed(chunk):
+                    yield elem
+            for elem in parser.close():
+                yield elem
+        finally:
+            await response.aclose()
+        
+        self._check_result(parser.result, method_name, kwargs)
+    
+    
+    async def batch(
+        self,
+        calls: Iterable[tuple[str, Mapping[str, api_arg]]],
+        max_workers: int = 8,
+        ordered: bool = True,
+    ) -> AsyncIterator[tuple[int, dict | Exception]]:
+        """
+        Makes many API calls concurrently.
+        
+        Like :meth:`IpernityAPI.batch() <ipernity.api.IpernityAPI.batch>`, but
+        the calls are run as tasks, at most ``max_workers`` at a time.
+        
+        Yields:
+            Tuples ``(index, result)``, where ``index`` is the position of the
+            call in ``calls`` and ``result`` is the return value of
+            :meth:`call` or the exception raised by it.
+        """
+        calls = enumerate(calls)
+        window = 2 * max_workers
+        semaphore = asyncio.Semaphore(max_workers)
+        pending = {} if not ordered else deque()
+        
+        async def run(method_name: str, kwargs: Mapping[str, api_arg]):
+            async with semaphore:
+                try:
+                    return await self.call(method_name, **kwargs)
+                except Exception as e:
+                    log.debug('Batch call %s failed: %r', method_name, e)
+                    return e
+        
+        def submit() -> bool:
+            for index, (method_name, kwargs) in calls:
+                task = asyncio.ensure_future(run(method_name, kwargs))
+                if ordered:
+                    pending.append((index, task))
+                else:
+                    pending[task] = index
+                return True
+            return False
+        
+        try:
+            while len(pending) < window and submit():
+                pass
+            while pending:
+                if ordered:
+                    index, task = pending.popleft()
+                    results = [(index, await task)]
+                else:
+                    done, _ = await asyncio.wait(
+                        pending,
+                        return_when = asyncio.FIRST_COMPLETED
+                    )
+                    results = [(pending.pop(t), t.result()) for t in done]
+                while len(pending) < window and submit():
+                    pass
+                for result in results:
+                    yield result
+        finally:
+            # Don't start more calls if the consumer stops early
+            for task in ([t for _, t in pending] if ordered else pending):
+                task.cancel()
+    
+    
+    async def upload_file(self, filename: str, **kwargs: api_arg) -> str:
+        """
+        Simplified interface to uploading a file
+        
+        Args:
+            filename:   The file to be uploaded. Can be relative or absolute.
+            kwargs:     Additional attributes for :iper:`upload.file`.
+        
+        Returns:
+            The ``doc_id`` of the uploaded file.
+        
+        Raises:
+            UploadError:    The ticket gets invalid.
+        """
+        ticket = (await self.upload.file(file=filename, **kwargs))['ticket']
+        id_ = None
+        while id_ is None:
+            status = (await self.upload.checkTickets(tickets = ticket))['tickets']['ticket'][0]
+            id_ = self._ticket_doc_id(status, filename, ticket)
+            if id_ is None:
+                await asyncio.sleep(int(status['eta']))
+        log.debug('Got id=%s for filename=%s', id_, filename)
+        return id_
+    
+    
+    async def upload_files(
+        self,
+        filenames: Iterable[str],
+        max_workers: int = 4,
+        ticket_timeout: float | None = 600,
+        **kwargs: api_arg
+    ) -> AsyncIterator[tuple[str, str | UploadError]]:
+        """
+        Uploads many files concurrently.
+        
+        Like :meth:`IpernityAPI.upload_files()
+        <ipernity.api.IpernityAPI.upload_files>`, but the uploads are run as
+        tasks, at most ``max_workers`` at a time.
+        
+        Yields:
+            Tuples ``(filename, result)`` in the order the uploads finish.
+        """
+        loop = asyncio.get_running_loop()
+        filenames = iter(filenames)
+        window = 2 * max_workers
+        semaphore = asyncio.Semaphore(max_workers)
+        uploads = {}        # task -> filename
+        tickets = {}        # ticket -> filename
+        deadlines = {}      # ticket -> time
+        next_check = 0.0
+        
+        async def upload(filename: str) -> dict:
+            async with semaphore:
+                return await self.upload.file(file = filename, **kwargs)
+        
+        def submit() -> bool:
+            for filename in filenames:
+                uploads[asyncio.ensure_future(upload(filename))] = filename
+                return True
+            return False
+        
+        try:
+            while len(uploads) < window and submit():
+                pass
+            while uploads or tickets:
+                # Wait for uploads until the next ticket check is due
+                timeout = max(0.0, next_check - loop.time()) if tickets else None
+                if uploads:
+                    done, _ = await asyncio.wait(
+                        uploads,
+                        timeout = timeout,
+                        return_when = asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(timeout)
+                    done = ()
+                for task in done:
+                    filename = uploads.pop(task)
+                    try:
+                        ticket = task.result()['ticket']
+                    except Exception as e:
+                        yield filename, self._upload_error(filename, e)
+                    else:
+                        tickets[ticket] = filename
+                        if ticket_timeout is not None:
+                            deadlines[ticket] = loop.time() + ticket_timeout
+                while len(uploads) < window and submit():
+                    pass
+                
+                if tickets and loop.time() >= next_check:
+                    try:
+                        res = await self.upload.checkTickets(tickets = ','.join(tickets))
+                        results, eta = self._ticket_results(res, tickets)
+                    except Exception as e:
+                        log.warning('Checking upload tickets failed: %s', e)
+                        results, eta = [], 1
+                    results += self._expired_tickets(tickets, deadlines, loop.time())
+                    next_check = min([loop.time() + eta, *deadlines.values()])
+                    for result in results:
+                        yield result
+        finally:
+            # Don't start more uploads if the consumer stops early
+            for task in uploads:
+                task.cancel()
+    
+    
+    async def walk_data(
+        self,
+        method_name: str,
+        elem_name: str | None = None,
+        prefetch: int = 0,
+        stream: bool = False,
+        checkpoint: Checkpoint | None = None,
+        record: type[Record] | None = None,
+        **kwargs: api_arg
+    ) -> AsyncIterator[dict]:
+        """
+        Iterates asynchronously over an arbitrary API search/list.
+        
+        See :meth:`IpernityAPI.walk_data() <ipernity.api.IpernityAPI.walk_data>`
+        for the arguments. With ``prefetch``, the pages are fetched by
+        concurrent tasks instead of threads. With ``stream``, the elements are
+        parsed while the response is received. The ``checkpoint`` is saved
+        synchronously. The ``walk_*`` helpers like
+        :meth:`walk_docs` return asynchronous generators, too.
+        
+        Yields:
+            ``dict`` containing the element data, or a ``record``.
+        """
+        if prefetch and stream:
+            raise ValueError('prefetch and stream cannot be combined')
+        if record is not None:
+            async for elem in self.walk_data(
+                method_name,
+                elem_name,
+                prefetch,
+                stream,
+                checkpoint,
+                **kwargs
+            ):
+                yield record.from_data(elem)
+            return
+        
+        list_name, elem_name = self._walk_keys(method_name, elem_name, kwargs)
+        
+        page = kwargs.pop('page', 1)
+        progress = None
+        if checkpoint is not None:
+            from .checkpoint import WalkProgress
+            
+            progress = WalkProgress(checkpoint, method_name, elem_name, kwargs, page)
+            page = progress.page
+        pages = page       # total pages
+        
+        while page <= pages:
+            log.debug(f'Fetching page {page} of {method_name} {kwargs}')
+            if progress is not None:
+                progress.start_page(page)
+            if stream:
+                parser = ListStreamParser(list_name + [elem_name])
+                async for elem in self._stream_page(method_name, parser, dict(kwargs, page = page)):
+                    if progress is None or progress.accept(elem):
+                        yield elem
+                _, pages = self._page_data(parser.result, list_name)
+            else:
+                res = await self.call(method_name, page = page, **kwargs)
+                res, pages = self._page_data(res, list_name)
+                if prefetch > 0 and page < pages:
+                    break
+                for elem in self._page_elements(res, elem_name):
+                    if progress is None or progress.accept(elem):
+                        yield elem
+            if progress is not None:
+                progress.page_done(page, pages)
+            page += 1
+        else:
+            return
+        
+        # Number of pages is known now, fetch the rest concurrently
+        pending = deque()
+        next_pages = iter(range(page + 1, pages + 1))
+        
+        def submit():
+            for next_page in next_pages:
+                log.debug(f'Prefetching page {next_page} of {method_name} {kwargs}')
+                pending.append((next_page, asyncio.ensure_future(
+                    self.call(method_name, page = next_page, **kwargs)
+                )))
+                return
+        
+        try:
+            for _ in range(prefetch):
+                submit()
+            while True:
+                for elem in self._page_elements(res, elem_name):
+                    if progress is None or progress.accept(elem):
+                        yield elem
+                if progress is not None:
+                    progress.page_done(page, pages)
+                if not pending:
+                    break
+                page, task = pending.popleft()
+                res = await task
+                submit()
+                res, _ = self._page_data(res, list_name)
+                if progress is not None:
+                    progress.start_page(page)
+        finally:
+            # Don't fetch more pages if the consumer stops early
+            for _, task in pending:
+                task.cancel()
@@ -10,18 +10,40 @@ from __future__ import annotations
 
 import json
 import os
+from collections import deque
+from contextlib import closing
 from logging import getLogger
-from time import sleep
-from typing import Any, Iterable, Mapping, Union, TYPE_CHECKING
-
-import requests
+from threading import Lock
+from time import monotonic, sleep
+from typing import (
+    Any, Generator, Iterable, Iterator, Mapping, Tuple, Union, TYPE_CHECKING
+)
 
 from .auth import AuthHandler, auth_methods
+from ._generated import GeneratedMethods
 from .method import IpernityMethod
-from .exceptions import APIRequestError, UnknownMethod, UploadError
+from .exceptions import (
+    APIRequestError, IpernityError, TransportError, UnknownMethod, UploadError
+)
+from .jsonlib import JSONBackend, get_backend
+from .pagination import get_pagination
+from .stream import ListStreamParser
 
 if TYPE_CHECKING:
     api_arg = Union[str, float, int]
+    timeout_arg = Union[float, Tuple[float, float], None]
+    
+    import requests
+    
+    from .cache import ResponseCache
+    from .cassette import Cassette
+    from .checkpoint import Checkpoint
+    from .metrics import MetricsRegistry
+    from .records import Record
+    from .ratelimit import RateLimiter
+    from .retry import RetryPolicy
+    from .sync import SyncResult
+    from .transport import Response, Transport
 
 log = getLogger(__name__)
 
@@ -29,11 +51,57 @@ methodsfile = os.path.join(
     os.path.dirname(__file__),
     'methods.json'
 )
-with open(methodsfile, 'r') as mf:
-    _methods: Mapping[str, Mapping[str, Any]] = json.load(mf)
 
 
-class IpernityAPI:
+class _MethodTable(Mapping):
+    """
+    The method data from ``methods.json``, loaded on first access.
+    """
+    
+    def __init__(self, filename: str):
+        self._filename = filename
+        self._data = None
+        self._read_methods = None
+        self._lock = Lock()
+    
+    def _load(self) -> dict[str, Mapping[str, Any]]:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    log.debug('Loading %s', self._filename)
+                    with open(self._filename, 'r') as mf:
+                        data = json.load(mf)
+                    self._read_methods = frozenset(
+                        name
+                        for name, method in data.items()
+                        if not int(method['authentication'].get('post', '0'))
+                    )
+                    self._data = data
+        return self._data
+    
+    def __getitem__(self, name: str) -> Mapping[str, Any]:
+        return (self._data or self._load())[name]
+    
+    def __contains__(self, name: object) -> bool:
+        return name in (self._data or self._load())
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data or self._load())
+    
+    def __len__(self) -> int:
+        return len(self._data or self._load())
+    
+    @property
+    def read_methods(self) -> frozenset[str]:
+        """Names of the methods that don't need HTTP POST"""
+        self._load()
+        return self._read_methods
+
+
+_methods: Mapping[str, Mapping[str, Any]] = _MethodTable(methodsfile)
+
+
+class IpernityAPI(GeneratedMethods):
     """
     Encapsulates Ipernity functionality.
     
@@ -56,10 +124,51 @@ class IpernityAPI:
         url:        API URL, should normally be left alone.
         auth_url_base:  Base for Authentication URLs, should normally be left
                         alone.
+        pool_size:  Maximum number of keep-alive connections kept open to
+                    the API server.
+        timeout:    Timeout for HTTP requests in seconds. Can be a single
+                    number or a tuple ``(connect timeout, read timeout)``.
+                    ``None`` (the default) waits forever.
+        rate_limiter:   A :class:`~ipernity.ratelimit.RateLimiter` that limits
+                        the rate of API calls.
+        retry:      A :class:`~ipernity.retry.RetryPolicy` for read methods
+                    that failed due to network errors or transient HTTP
+                    errors. By default, failed calls are not retried.
+        cache:      A response cache (see :mod:`ipernity.cache`) for read
+                    methods.
+        json_backend:   The :mod:`JSON backend <ipernity.jsonlib>` for
+                        decoding responses, as name or
+                        :class:`~ipernity.jsonlib.JSONBackend`. By default,
+                        the fastest installed backend is used.
+        metrics:    A :class:`~ipernity.metrics.MetricsRegistry` that counts
+                    calls and requests.
+        cassette:   A :class:`~ipernity.cassette.Cassette` for recording or
+                    replaying requests.
+        transport:  The :mod:`transport <ipernity.transport>` sending the
+                    HTTP requests, as name (``requests``, ``httpx`` or
+                    ``urllib3``) or :class:`~ipernity.transport.Transport`.
+                    The default is ``requests``.
+    
+    The API object keeps a pool of persistent HTTP connections, so consecutive
+    calls do not need a new connection and TLS handshake. The connections are
+    released by :meth:`close`. ``IpernityAPI`` can also be used as a context
+    manager:
+    
+    .. code-block:: python
+        
+        with IpernityAPI(key, secret, token) as api:
+            for doc in api.walk_docs():
+                ...
     
     .. seealso::
         * `Ipernity API methods <http://www.ipernity.com/help/api>`_
     
+    .. versionchanged:: 0.4.0
+        * New arguments ``pool_size``, ``timeout``, ``rate_limiter``,
+          ``retry``, ``cache``, ``json_backend``, ``metrics``,
+          ``cassette`` and ``transport``
+        * Connections are reused between API calls
+    
     .. versionchanged:: 0.3.1
         * New argument ``auth_url_base``
         * URLs default to HTTPS
@@ -69,8 +178,15 @@ class IpernityAPI:
     """
     
     # Methods data retrieved from http://api.ipernity.com/api/api.methods.getList/json
+    # (loaded on first use)
     __methods__ = _methods
     
+    # Size of chunks read by walk_data(stream = True)
+    _stream_chunk_size = 16384
+    
+    # Name of the default transport
+    _default_transport = 'requests'
+    
     def __init__(
         self,
         api_key: str,
@@ -78,14 +194,40 @@ class IpernityAPI:
         token: str | Mapping | None = None,
         auth: str | AuthHandler = 'desktop',
         url: str = 'https://api.ipernity.com/api/',
-        auth_url_base: str = 'https://www.ipernity.com/apps/authorize'
+        auth_url_base: str = 'https://www.ipernity.com/apps/authorize',
+        pool_size: int = 10,
+        timeout: timeout_arg = None,
+        rate_limiter: RateLimiter | None = None,
+        retry: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        json_backend: str | JSONBackend | None = None,
+        metrics: MetricsRegistry | None = None,
+        cassette: Cassette | None = None,
+        transport: str | Transport | None = None,
     ):
         log.debug('Creating API object with key %s', api_key)
         self._api_key = api_key
         self._api_secret = api_secret
         self.token = token
         self._url = url
+        self._urls = {}         # method name -> URL
         self._auth_url_base = auth_url_base
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._session_lock = Lock()
+        if transport is None or isinstance(transport, str):
+            self._transport_name = transport or self._default_transport
+            if self._transport_name not in self._transport_types():
+                raise ValueError(f'Transport {transport} is not supported')
+            self._transport = None
+        else:
+            self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._retry = retry
+        self._cache = cache
+        self._json = get_backend(json_backend)
+        self._metrics = metrics
+        self._cassette = cassette
         if isinstance(auth, type) and issubclass(auth, AuthHandler):
             self._auth = auth(self)
         elif auth in auth_methods:
@@ -99,7 +241,175 @@ class IpernityAPI:
         if name.startswith('_'):
             raise AttributeError(f'Attribute {name} not found')
         
-        return IpernityMethod(self, name)
+        method = self.__dict__[name] = IpernityMethod(self, name)
+        return method
+    
+    
+    def __enter__(self) -> IpernityAPI:
+        return self
+    
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    
+    def close(self):
+        """
+        Closes the pooled HTTP connections.
+        
+        The API object can still be used afterwards, a new connection pool is
+        created on the next call.
+        
+        .. versionadded:: 0.4.0
+        """
+        with self._session_lock:
+            if self._transport is not None:
+                self._transport.close()
+    
+    
+    @property
+    def transport(self) -> Transport:
+        """
+        The transport sending the HTTP requests
+        
+        A transport given by name is created on first use.
+        
+        .. versionadded:: 0.4.0
+        """
+        if self._transport is None:
+            with self._session_lock:
+                if self._transport is None:
+                    transport_type = self._transport_types()[self._transport_name]
+                    self._transport = transport_type(pool_size = self._pool_size)
+        return self._transport
+    
+    
+    @staticmethod
+    def _transport_types() -> Mapping[str, type]:
+        """Returns the transports that can be given by name."""
+        from .transport import transports
+        return transports
+    
+    
+    @property
+    def session(self) -> requests.Session:
+        """
+        The HTTP session used for API calls
+        
+        The session is created on first use. It keeps up to ``pool_size``
+        connections alive. Only available with the ``requests`` transport
+        (:class:`~ipernity.transport.RequestsTransport`).
+        
+        .. versionadded:: 0.4.0
+        """
+        return self.transport.session
+    
+    
+    @property
+    def timeout(self) -> timeout_arg:
+        """
+        Timeout for HTTP requests
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._timeout
+    
+    
+    @timeout.setter
+    def timeout(self, value: timeout_arg):
+        self._timeout = value
+    
+    
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """
+        The rate limiter for API calls, or ``None``
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._rate_limiter
+    
+    
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter | None):
+        self._rate_limiter = value
+    
+    
+    @property
+    def retry(self) -> RetryPolicy | None:
+        """
+        The retry policy for failed requests, or ``None``
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._retry
+    
+    
+    @retry.setter
+    def retry(self, value: RetryPolicy | None):
+        self._retry = value
+    
+    
+    @property
+    def cache(self) -> ResponseCache | None:
+        """
+        The response cache, or ``None``
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._cache
+    
+    
+    @cache.setter
+    def cache(self, value: ResponseCache | None):
+        self._cache = value
+    
+    
+    @property
+    def json_backend(self) -> JSONBackend:
+        """
+        The JSON backend for decoding responses
+        
+        Can be set to a backend name or a :class:`~ipernity.jsonlib.JSONBackend`.
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._json
+    
+    
+    @json_backend.setter
+    def json_backend(self, value: str | JSONBackend | None):
+        self._json = get_backend(value)
+    
+    
+    @property
+    def metrics(self) -> MetricsRegistry | None:
+        """
+        The metrics registry, or ``None``
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._metrics
+    
+    
+    @metrics.setter
+    def metrics(self, value: MetricsRegistry | None):
+        self._metrics = value
+    
+    
+    @property
+    def cassette(self) -> Cassette | None:
+        """
+        The cassette for recording or replaying requests, or ``None``
+        
+        .. versionadded:: 0.4.0
+        """
+        return self._cassette
+    
+    
+    @cassette.setter
+    def cassette(self, value: Cassette | None):
+        self._cassette = value
     
     
     @property
@@ -243,28 +553,180 @@ class IpernityAPI:
             APIRequestError:    The API call returned an error, or the HTTP
                                 request failed.
         
+        .. versionchanged:: 0.4.0
+            *   Waits for the :attr:`rate_limiter` if one is set.
+            *   Retries failed requests according to :attr:`retry`.
+            *   Uses the response :attr:`cache` if one is set.
+            *   Network errors raise ``APIRequestError`` with code 0.
+            *   Counts the call in :attr:`metrics` if set.
+        
         .. versionchanged:: 0.2.0
             An HTTP error raises ``APIRequestError`` instead of ``HTTPError``.
         """
-        if method_name not in self.__methods__:
-            raise UnknownMethod(method_name)
+        url = self._method_url(method_name)
         
-        url = self._url + method_name + '/json'
-        response = self.auth.do_request(url, method_name, kwargs)
+        if self._cache is not None:
+            result = self._cached(method_name, kwargs)
+            if result is not None:
+                if self._metrics is not None:
+                    self._metrics.count_cached(method_name)
+                return result
         
-        # Check for HTTP errors
-        if not response.ok:
-            raise APIRequestError(
-                'httperror',
-                response.status_code,
-                response.reason,
+        if self._metrics is None:
+            return self._fetch(url, method_name, kwargs)
+        with self._metrics.track_call(method_name):
+            return self._fetch(url, method_name, kwargs)
+    
+    
+    def _fetch(self, url: str, method_name: str, kwargs: Mapping[str, api_arg]) -> dict:
+        """Runs an API call and updates the cache."""
+        response = self._request(url, method_name, kwargs)
+        
+        result = self._json.loads(response.content)
+        self._check_result(result, method_name, kwargs)
+        
+        if self._cache is not None:
+            self._update_cache(method_name, kwargs, result)
+        
+        log.debug('Returning %s', result)
+        return result
+    
+    
+    def _method_url(self, method_name: str) -> str:
+        """
+        Returns the URL of an API method.
+        
+        Raises:
+            UnknownMethod:  The method is not known.
+        """
+        try:
+            return self._urls[method_name]
+        except KeyError:
+            if method_name not in self.__methods__:
+                raise UnknownMethod(method_name) from None
+            url = self._urls[method_name] = self._url + method_name + '/json'
+            return url
+    
+    
+    def _cached(self, method_name: str, kwargs: Mapping[str, api_arg]) -> dict | None:
+        """Returns the cached result of a call, or ``None``."""
+        if (
+            self.is_read_method(method_name) and
+            self._cache.cacheable(method_name)
+        ):
+            return self._cache.get(method_name, kwargs, self._token)
+        return None
+    
+    
+    def _update_cache(
+        self,
+        method_name: str,
+        kwargs: Mapping[str, api_arg],
+        result: dict
+    ):
+        """Stores the result of a read method, or invalidates after a write."""
+        service = self.__methods__[method_name]['service']
+        if not self.is_read_method(method_name):
+            self._cache.invalidate(method_name, service, kwargs)
+        elif self._cache.cacheable(method_name):
+            self._cache.set(method_name, service, kwargs, self._token, result)
+    
+    
+    def _request(
+        self,
+        url: str,
+        method_name: str,
+        kwargs: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """
+        Runs the HTTP request for an API call.
+        
+        Waits for the rate limiter, and retries failed requests if allowed by
+        the retry policy. With ``stream``, the response body is not read.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(self._api_key, method_name)
+            
+            try:
+                if stream:
+                    response = self.auth.do_request(url, method_name, kwargs, stream = True)
+                else:
+                    response = self.auth.do_request(url, method_name, kwargs)
+            except TransportError as e:
+                error = APIRequestError(
+                    'httperror',
+                    0,
+                    e.message,
+                    method_name,
+                    kwargs
+                )
+                error.__cause__ = e
+                status = retry_after = None
+            else:
+                # Check for HTTP errors
+                if response.ok:
+                    return response
+                error = APIRequestError(
+                    'httperror',
+                    response.status_code,
+                    response.reason,
+                    method_name,
+                    kwargs
+                )
+                status = response.status_code
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+            
+            delay = self._retry_delay(method_name, attempt, status, retry_after)
+            if delay is None:
+                raise error
+            log.info(
+                'Attempt %d of %s failed (%s), retrying in %.1fs',
+                attempt,
                 method_name,
-                kwargs
+                error,
+                delay
             )
-                
-        result = response.json()
+            sleep(delay)
+    
+    
+    def _retry_delay(
+        self,
+        method_name: str,
+        attempt: int,
+        status: int | None,
+        retry_after: str | None
+    ) -> float | None:
+        """Returns the delay before retrying a request, or ``None``."""
+        if self._retry is None or not self.is_read_method(method_name):
+            return None
+        return self._retry.delay(attempt, status, retry_after)
+    
+    
+    @classmethod
+    def is_read_method(cls, method_name: str) -> bool:
+        """
+        Checks if an API method only reads data.
+        
+        Read methods are called with HTTP GET, write methods with HTTP POST
+        (according to :iper:`api.methods.getList`). Calling a read method
+        repeatedly is safe.
         
-        # Check return data for errors
+        .. versionadded:: 0.4.0
+        """
+        methods = cls.__methods__
+        if isinstance(methods, _MethodTable):
+            return method_name in methods.read_methods
+        return not int(methods[method_name]['authentication'].get('post', '0'))
+    
+    
+    @staticmethod
+    def _check_result(result: Mapping, method_name: str, kwargs: Mapping):
+        """Raises :class:`APIRequestError` if the API returned an error."""
         if result['api']['status'] != 'ok':
             raise APIRequestError(
                 result['api']['status'],
@@ -273,9 +735,102 @@ class IpernityAPI:
                 method_name,
                 kwargs
             )
+    
+    
+    def batch(
+        self,
+        calls: Iterable[tuple[str, Mapping[str, api_arg]]],
+        max_workers: int = 8,
+        ordered: bool = True,
+    ) -> Iterator[tuple[int, dict | Exception]]:
+        """
+        Makes many API calls concurrently.
         
-        log.debug(f'Returning {result}')
-        return result
+        The calls are run by up to ``max_workers`` threads. ``calls`` is
+        consumed lazily, so it can be an unbounded generator: only a limited
+        number of calls is started ahead of the results being consumed.
+        
+        A failing call does not abort the batch. Instead, the exception
+        (usually an :class:`~ipernity.exceptions.APIRequestError`, but also
+        e.g. a :class:`ValueError` for a response that is not valid JSON) is
+        returned as the result of that call.
+        
+        Example:
+        
+        .. code-block:: python
+            
+            calls = (('doc.get', {'doc_id': id_}) for id_ in doc_ids)
+            for index, result in api.batch(calls, max_workers = 16):
+                if isinstance(result, Exception):
+                    print(f'{doc_ids[index]} failed: {result}')
+        
+        Args:
+            calls:          Iterable of ``(method_name, kwargs)`` tuples.
+            max_workers:    Maximum number of concurrent calls. The
+                            ``pool_size`` of the API object should be at
+                            least this value.
+            ordered:        If ``True`` (the default), results are returned in
+                            the order of ``calls``, otherwise in the order
+                            the calls complete.
+        
+        Yields:
+            Tuples ``(index, result)``, where ``index`` is the position of the
+            call in ``calls`` and ``result`` is the return value of
+            :meth:`call` or the exception raised by it.
+        
+        .. versionadded:: 0.4.0
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        
+        calls = enumerate(calls)
+        window = 2 * max_workers
+        pending = {} if not ordered else deque()
+        
+        with ThreadPoolExecutor(
+            max_workers = max_workers,
+            thread_name_prefix = 'ipernity-batch'
+        ) as executor:
+            
+            def submit() -> bool:
+                for index, (method_name, kwargs) in calls:
+                    future = executor.submit(self._batch_call, method_name, kwargs)
+                    if ordered:
+                        pending.append((index, future))
+                    else:
+                        pending[future] = index
+                    return True
+                return False
+            
+            try:
+                while len(pending) < window and submit():
+                    pass
+                while pending:
+                    if ordered:
+                        index, future = pending.popleft()
+                        results = [(index, future.result())]
+                    else:
+                        done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                        results = [(pending.pop(f), f.result()) for f in done]
+                    while len(pending) < window and submit():
+                        pass
+                    yield from results
+            finally:
+                # Don't start more calls if the consumer stops early
+                for future in ([f for _, f in pending] if ordered else pending):
+                    future.cancel()
+    
+    
+    def _batch_call(
+        self,
+        method_name: str,
+        kwargs: Mapping[str, api_arg]
+    ) -> dict | Exception:
+        """Calls a method for :meth:`batch`, returns exceptions instead of raising."""
+        try:
+            return self.call(method_name, **kwargs)
+        except Exception as e:
+            log.debug('Batch call %s failed: %r', method_name, e)
+            return e
     
     
     def upload_file(self, filename: str, **kwargs: api_arg) -> str:
@@ -283,51 +838,267 @@ class IpernityAPI:
         Simplified interface to uploading a file
         
         Args:
-            filename:   The file to be uploaded. Can be relative or absolute.
-            kwargs:     Additional attributes for :iper:`upload.file`.
+            filename:   The file to be uploaded. Can be relative or absolute,
+                        or any other file argument described in
+                        :mod:`ipernity.multipart`.
+            kwargs:     Additional attributes for :iper:`upload.file`, and
+                        optionally a ``progress`` callback.
             
         Returns:
             The ``doc_id`` of the uploaded file.
         
         Raises:
             UploadError:    The ticket gets invalid.
+        
+        .. versionchanged:: 0.4.0
+            Accepts file objects and buffers, and a ``progress`` callback.
         """                                                 # noqa: E501
         ticket = self.upload.file(file=filename, **kwargs)['ticket']
-        done = False
-        while not done:
+        id_ = None
+        while id_ is None:
             status = self.upload.checkTickets(tickets = ticket)['tickets']['ticket'][0]
-            if status['id'] != ticket:
-                raise UploadError(
-                    filename,
-                    ticket,
-                    f'{filename}: API returned incorrect ticket {status["id"]}, expected {ticket}'
-                )
-            if int(status.get('invalid', '0')):
-                raise UploadError(
-                    filename,
-                    ticket
-                )
-            done = int(status.get('done', '0'))
-            if done:
-                id_ = status['doc_id']
-            else:
+            id_ = self._ticket_doc_id(status, filename, ticket)
+            if id_ is None:
                 sleep(int(status['eta']))
         log.debug('Got id=%s for filename=%s', id_, filename)
         return id_
     
     
+    def upload_files(
+        self,
+        filenames: Iterable[str],
+        max_workers: int = 4,
+        ticket_timeout: float | None = 600,
+        **kwargs: api_arg
+    ) -> Iterator[tuple[str, str | UploadError]]:
+        """
+        Uploads many files concurrently.
+        
+        The files are uploaded by up to ``max_workers`` threads. The tickets
+        of all uploads that are being processed by Ipernity are checked
+        together, with one :iper:`upload.checkTickets` call per poll interval.
+        Like in :meth:`batch`, ``filenames`` is consumed lazily.
+        
+        Example:
+        
+        .. code-block:: python
+            
+            for filename, result in api.upload_files(glob('*.jpg')):
+                if isinstance(result, UploadError):
+                    print(f'{filename} failed: {result}')
+        
+        Args:
+            filenames:      The files to be uploaded.
+            max_workers:    Maximum number of concurrent uploads.
+            ticket_timeout: Maximum time in seconds to wait for Ipernity to
+                            process an uploaded file. ``None`` waits forever.
+            kwargs:         Additional attributes for :iper:`upload.file`,
+                            used for all files.
+        
+        Yields:
+            Tuples ``(filename, result)`` in the order the uploads finish.
+            ``result`` is the ``doc_id`` of the uploaded file, or an
+            :class:`~ipernity.exceptions.UploadError` if the upload failed,
+            e.g. because the file cannot be read, or its ticket is not
+            finished within ``ticket_timeout``. The original exception of a
+            failed :iper:`upload.file` call is the error's ``__cause__``.
+        
+        .. versionadded:: 0.4.0
+        """
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        
+        filenames = iter(filenames)
+        window = 2 * max_workers
+        uploads = {}        # future -> filename
+        tickets = {}        # ticket -> filename
+        deadlines = {}      # ticket -> time
+        next_check = 0.0
+        
+        with ThreadPoolExecutor(
+            max_workers = max_workers,
+            thread_name_prefix = 'ipernity-upload'
+        ) as executor:
+            
+            def submit() -> bool:
+                for filename in filenames:
+                    future = executor.submit(self.upload.file, file = filename, **kwargs)
+                    uploads[future] = filename
+                    return True
+                return False
+            
+            try:
+                while len(uploads) < window and submit():
+                    pass
+                while uploads or tickets:
+                    # Wait for uploads until the next ticket check is due
+                    timeout = max(0.0, next_check - monotonic()) if tickets else None
+                    done, _ = wait(uploads, timeout = timeout, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        filename = uploads.pop(future)
+                        try:
+                            ticket = future.result()['ticket']
+                        except Exception as e:
+                            yield filename, self._upload_error(filename, e)
+                        else:
+                            tickets[ticket] = filename
+                            if ticket_timeout is not None:
+                                deadlines[ticket] = monotonic() + ticket_timeout
+                    while len(uploads) < window and submit():
+                        pass
+                    
+                    if tickets and monotonic() >= next_check:
+                        try:
+                            res = self.upload.checkTickets(tickets = ','.join(tickets))
+                            results, eta = self._ticket_results(res, tickets)
+                        except Exception as e:
+                            log.warning('Checking upload tickets failed: %s', e)
+                            results, eta = [], 1
+                        yield from results
+                        yield from self._expired_tickets(tickets, deadlines, monotonic())
+                        next_check = min([monotonic() + eta, *deadlines.values()])
+            finally:
+                # Don't start more uploads if the consumer stops early
+                for future in uploads:
+                    future.cancel()
+    
+    
+    @staticmethod
+    def _upload_error(filename: str, e: Exception) -> UploadError:
+        """Returns the error for a failed :iper:`upload.file` call."""
+        log.debug('Upload of %s failed: %r', filename, e)
+        error = UploadError(filename, None, f'{filename}: {e}')
+        error.__cause__ = e
+        return error
+    
+    
+    @staticmethod
+    def _expired_tickets(
+        tickets: dict[str, str],
+        deadlines: dict[str, float],
+        now: float,
+    ) -> list[tuple[str, UploadError]]:
+        """
+        Removes the tickets that are not finished before their deadline.
+        
+        Returns:
+            The failed uploads as ``(filename, UploadError)``.
+        """
+        results = []
+        for ticket, deadline in list(deadlines.items()):
+            if ticket not in tickets:
+                del deadlines[ticket]
+            elif deadline <= now:
+                filename = tickets.pop(ticket)
+                del deadlines[ticket]
+                log.warning('Upload ticket %s of %s timed out', ticket, filename)
+                results.append((filename, UploadError(
+                    filename,
+                    ticket,
+                    f'{filename}: ticket {ticket} not finished in time'
+                )))
+        return results
+    
+    
+    @classmethod
+    def _ticket_results(
+        cls,
+        res: Mapping,
+        tickets: dict[str, str],
+    ) -> tuple[list[tuple[str, str | UploadError]], float]:
+        """
+        Evaluates the result of :iper:`upload.checkTickets` for many tickets.
+        
+        Finished tickets are removed from ``tickets`` (ticket -> filename).
+        
+        Returns:
+            The finished uploads as ``(filename, doc_id | UploadError)`` and
+            the time until the next check.
+        """
+        results = []
+        eta = None
+        for status in res['tickets']['ticket']:
+            filename = tickets.get(status['id'])
+            if filename is None:
+                log.warning('upload.checkTickets returned unknown ticket %s', status['id'])
+                continue
+            try:
+                id_ = cls._ticket_doc_id(status, filename, status['id'])
+            except UploadError as e:
+                id_ = e
+            if id_ is None:
+                ticket_eta = int(status.get('eta', '0'))
+                eta = ticket_eta if eta is None else min(eta, ticket_eta)
+            else:
+                log.debug('Got %s for filename=%s', id_, filename)
+                del tickets[status['id']]
+                results.append((filename, id_))
+        # Poll at most once per second
+        return results, max(1, eta or 0)
+    
+    
+    @staticmethod
+    def _ticket_doc_id(status: Mapping, filename: str, ticket: str) -> str | None:
+        """
+        Checks the status of an upload ticket.
+        
+        Returns the ``doc_id`` if the upload is done, ``None`` if it is still
+        in progress.
+        """
+        if status['id'] != ticket:
+            raise UploadError(
+                filename,
+                ticket,
+                f'{filename}: API returned incorrect ticket {status["id"]}, expected {ticket}'
+            )
+        if int(status.get('invalid', '0')):
+            raise UploadError(
+                filename,
+                ticket
+            )
+        if int(status.get('done', '0')):
+            return status['doc_id']
+        return None
+    
+    
+    def sync_directory(
+        self,
+        path: str,
+        **kwargs: Any
+    ) -> Iterator[SyncResult]:
+        """
+        Uploads the files of a directory that are not on Ipernity yet.
+        
+        Files are compared by their MD5 hash (see :iper:`doc.checkMD5`). This
+        calls :func:`ipernity.sync.sync_directory`, see there for the
+        arguments.
+        
+        Yields:
+            A :class:`~ipernity.sync.SyncResult` for every file.
+        
+        .. versionadded:: 0.4.0
+        """
+        from .sync import sync_directory
+        
+        return sync_directory(self, path, **kwargs)
+    
+    
     def walk_data(
         self,
         method_name: str,
         elem_name: str | None = None,
+        prefetch: int = 0,
+        stream: bool = False,
+        checkpoint: Checkpoint | None = None,
+        record: type[Record] | None = None,
         **kwargs: api_arg
     ) -> Iterable[dict]:
         """
         Iterates over an arbitrary API search/list.
         
-        ``walk_data`` guesses the structure of the returned JSON object from the
-        API method used. If this does not work, the ``elem_name`` argument can
-        be given to specify the object keys:
+        ``walk_data`` knows the structure of the returned JSON object for the
+        paginated API methods (see :mod:`ipernity.pagination`), and guesses it
+        from the method name for other methods. If this does not work, the
+        ``elem_name`` argument can be given to specify the object keys:
         
         *   If ``elem_name`` contains dots, the last part is taken to be the
             innermost key that points to the list of elements to iterate over,
@@ -340,56 +1111,227 @@ class IpernityAPI:
             method_name:    Search method to call. The method must accept
                             the ``page`` argument.
             elem_name:      Name of list elements.
+            prefetch:       Number of pages to fetch in advance. If greater
+                            than 0, the pages after the first one are fetched
+                            concurrently in background threads, while the
+                            elements are still yielded in page order. At most
+                            ``prefetch`` pages are fetched or kept in memory
+                            ahead of the page being yielded. The
+                            ``pool_size`` of the API object should be at least
+                            ``prefetch``.
+            stream:         Parse the responses incrementally and yield each
+                            element as soon as it is received, instead of
+                            reading and parsing the complete page first. This
+                            reduces memory usage and the time to the first
+                            element for large pages. Streamed calls bypass
+                            the response :attr:`cache`. Cannot be combined
+                            with ``prefetch``.
+            checkpoint:     Save the position after each page and resume
+                            from a saved position, see
+                            :mod:`ipernity.checkpoint`.
+            record:         Yield records of this type instead of ``dict``
+                            objects, see :mod:`ipernity.records`.
             kwargs:         Argument for the search method. Use ``per_page``
                             to set the number of returned elements per method
-                            call.
+                            call, the default is the maximum of the method.
         Yields:
-            ``dict`` containing the element data.
-        """
-        if elem_name is None:
-            # Guess element name if not given.
-            mparts = method_name.split('.')
-            if len(mparts) == 2:
-                elem_name = mparts[0]
-                list_name = [elem_name + 's']
-            else:
-                list_name = mparts[0:-1]
-                elem_name = mparts[-2][:-1]
-        else:
-            if '.' in elem_name:
-                mparts = elem_name.split('.')
-                list_name = mparts[:-1]
-                elem_name = mparts[-1]
-            else:
-                list_name = [elem_name + 's']
+            ``dict`` containing the element data, or a ``record``.
+        
+        .. versionchanged:: 0.4.0
+            New arguments ``prefetch``, ``stream``, ``checkpoint`` and
+            ``record``. The default ``per_page`` is the maximum of the method.
+        """
+        if prefetch and stream:
+            raise ValueError('prefetch and stream cannot be combined')
+        if record is not None:
+            yield from map(record.from_data, self.walk_data(
+                method_name,
+                elem_name,
+                prefetch,
+                stream,
+                checkpoint,
+                **kwargs
+            ))
+            return
+        
+        list_name, elem_name = self._walk_keys(method_name, elem_name, kwargs)
         
         if 'page' in kwargs:
             page = kwargs['page']
             del kwargs['page']
         else:
             page = 1
+        progress = None
+        if checkpoint is not None:
+            from .checkpoint import WalkProgress
+            
+            progress = WalkProgress(checkpoint, method_name, elem_name, kwargs, page)
+            page = progress.page
         pages = page       # total pages
         
         while page <= pages:
             log.debug(f'Fetching page {page} of {method_name} {kwargs}')
+            if progress is not None:
+                progress.start_page(page)
+            if stream:
+                elements = self._stream_page(
+                    method_name,
+                    list_name,
+                    elem_name,
+                    dict(kwargs, page = page)
+                )
+                if progress is not None:
+                    elements = progress.filter(elements)
+                pages = yield from elements
+                if progress is not None:
+                    progress.page_done(page, pages)
+                page += 1
+                continue
             res = self.call(method_name, page = page, **kwargs)
-            for key in list_name:
-                res = res[key]
-            if 'pages' in res:
-                pages = int(res['pages'])
+            res, pages = self._page_data(res, list_name)
+            if prefetch > 0 and page < pages:
+                # Number of pages is known now, fetch the rest concurrently
+                for page, elements in self._walk_prefetch(
+                    method_name,
+                    list_name,
+                    elem_name,
+                    self._page_elements(res, elem_name),
+                    range(page, pages + 1),
+                    prefetch,
+                    kwargs
+                ):
+                    if progress is None:
+                        yield from elements
+                        continue
+                    progress.start_page(page)
+                    yield from progress.filter(elements)
+                    progress.page_done(page, pages)
+                return
+            elements = self._page_elements(res, elem_name)
+            if progress is None:
+                yield from elements
             else:
-                total = int(res['total'])
-                per_page = int(res['per_page'])
-                pages = total // per_page
-                if total % per_page:
-                    pages += 1
-            
-            if elem_name in res:
-                yield from res[elem_name]
-            else:
-                log.debug('No key %s in result', elem_name)
+                yield from progress.filter(elements)
+                progress.page_done(page, pages)
             page += 1
     
+    
+    def _stream_page(
+        self,
+        method_name: str,
+        list_name: list,
+        elem_name: str,
+        kwargs: Mapping[str, api_arg],
+    ) -> Generator[dict, None, int]:
+        """
+        Yields the elements of a result page while it is received.
+        
+        Returns the number of pages.
+        """
+        url = self._method_url(method_name)
+        parser = ListStreamParser(list_name + [elem_name])
+        with closing(self._request(url, method_name, kwargs, stream = True)) as response:
+            for chunk in response.iter_content(self._stream_chunk_size):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        
+        self._check_result(parser.result, method_name, kwargs)
+        return self._page_data(parser.result, list_name)[1]
+    
+    
+    def _walk_prefetch(
+        self,
+        method_name: str,
+        list_name: list,
+        elem_name: str,
+        first: list,
+        pages: range,
+        prefetch: int,
+        kwargs: Mapping[str, api_arg],
+    ) -> Iterator[tuple[int, list]]:
+        """
+        Yields the page numbers and elements of the given pages.
+        
+        ``first`` are the elements of the first page, which has been fetched
+        already. Up to ``prefetch`` pages are fetched in advance.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        pages = iter(pages)
+        first_page = next(pages)
+        pending = deque()
+        
+        def submit():
+            for page in pages:
+                log.debug(f'Prefetching page {page} of {method_name} {kwargs}')
+                pending.append((
+                    page,
+                    executor.submit(self.call, method_name, page = page, **kwargs)
+                ))
+                return
+        
+        with ThreadPoolExecutor(
+            max_workers = prefetch,
+            thread_name_prefix = 'ipernity-walk'
+        ) as executor:
+            try:
+                for _ in range(prefetch):
+                    submit()
+                yield first_page, first
+                while pending:
+                    page, future = pending.popleft()
+                    res = future.result()
+                    submit()
+                    res, _ = self._page_data(res, list_name)
+                    yield page, self._page_elements(res, elem_name)
+            finally:
+                # Don't fetch more pages if the consumer stops early
+                for _, future in pending:
+                    future.cancel()
+    
+    
+    @staticmethod
+    def _walk_keys(
+        method_name: str,
+        elem_name: str | None,
+        kwargs: dict[str, api_arg],
+    ) -> tuple[list, str]:
+        """
+        Determines the keys of the result list for :meth:`walk_data`.
+        
+        Sets ``per_page`` in ``kwargs`` to the maximum of the method if it is
+        not given. Returns a list of the outer keys and the element key.
+        """
+        pagination = get_pagination(method_name, elem_name)
+        if pagination.max_per_page is not None:
+            kwargs.setdefault('per_page', pagination.max_per_page)
+        return list(pagination.list_keys), pagination.elem_key
+    
+    
+    @staticmethod
+    def _page_data(res: Mapping, list_name: list) -> tuple[Mapping, int]:
+        """Returns the list object of a result page and the number of pages."""
+        for key in list_name:
+            res = res[key]
+        if 'pages' in res:
+            pages = int(res['pages'])
+        else:
+            total = int(res['total'])
+            per_page = int(res['per_page'])
+            pages = total // per_page
+            if total % per_page:
+                pages += 1
+        return res, pages
+    
+    
+    @staticmethod
+    def _page_elements(res: Mapping, elem_name: str) -> list:
+        """Returns the elements of a result page."""
+        if elem_name in res:
+            return res[elem_name]
+        log.debug('No key %s in result', elem_name)
+        return []
+    
 
     def walk_albums(self, **kwargs: api_arg) -> Iterable[dict]:
         """
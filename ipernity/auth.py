@@ -15,19 +15,55 @@ The authentication handlers provide access to the ``auth.*`` API methods and
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable as AwaitableABC
 from hashlib import md5
-from logging import getLogger
+from logging import DEBUG, getLogger
 from urllib.parse import urlencode
-from typing import Mapping, TYPE_CHECKING
+from typing import Any, Awaitable, Mapping, TYPE_CHECKING
 
-import requests
+from .multipart import MultipartEncoder
 
 if TYPE_CHECKING:
     from .api import IpernityAPI, api_arg
+    from .multipart import progress_callback
+    from .transport import Response
 
 log = getLogger(__name__)
 
 
+def api_signature(
+    params: Mapping[str, api_arg],
+    api_secret: str,
+    method_name: str | None = None
+) -> str:
+    """
+    Returns the signature (``api_sig``) of a request.
+    
+    The signature is the MD5 hash of the parameters sorted by name (without
+    ``file``), the method name and the API secret.
+    
+    Args:
+        params:         The request parameters, including ``api_key`` and
+                        ``auth_token``, but not ``api_sig``.
+        api_secret:     The secret belonging to the API key.
+        method_name:    The API method, ``None`` for authorization URLs.
+    
+    .. versionadded:: 0.4.0
+    """
+    sig_str = ''.join([
+        f'{k}{params[k]}'
+        for k in sorted(params.keys())
+        if k != 'file'
+    ])
+    
+    if method_name:
+        sig_str += method_name
+    
+    sig_str += api_secret
+    # potentially dangerous log.debug(f'  signature string is {sig_str}')
+    return md5(sig_str.encode('utf-8')).hexdigest()
+
+
 class AuthHandler(ABC):
     """
     Generic authentication handler
@@ -69,8 +105,21 @@ class AuthHandler(ABC):
         
         .. versionchanged: 0.1.3
             Parameter ``store_token``
+        
+        .. versionchanged: 0.4.0
+            Returns an awaitable if called on an
+            :class:`~ipernity.aio.AsyncIpernityAPI`.
         """
         result = self.api.call('auth.getToken', frob = frob, **kwargs)
+        # inspect.isawaitable() would be equivalent, but inspect is slow to import
+        if isinstance(result, AwaitableABC):
+            return self._store_token_async(result, store_token)
+        if store_token:
+            self.api.token = result['auth']
+        return result
+    
+    async def _store_token_async(self, result: Awaitable[dict], store_token: bool) -> dict:
+        result = await result
         if store_token:
             self.api.token = result['auth']
         return result
@@ -98,8 +147,9 @@ class AuthHandler(ABC):
         self,
         url: str,
         method_name: str,
-        method_args: Mapping[str, api_arg]
-    ) -> requests.Response:
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
         """
         Signs and runs a request.
         
@@ -110,53 +160,142 @@ class AuthHandler(ABC):
             url:            Request URL.
             method_name:    The method to be called (needed for signing).
             method_args:    Arguments of the method call.
+            stream:         Don't read the response body immediately.
+        
+        .. versionchanged:: 0.4.0
+            *   Sends the request with the transport of the API object
+                (:attr:`IpernityAPI.transport
+                <ipernity.api.IpernityAPI.transport>`) and returns a
+                :class:`~ipernity.transport.Response`.
+            *   New argument ``stream``
+            *   Files are streamed with a
+                :class:`~ipernity.multipart.MultipartEncoder` and can be given
+                as file objects or buffers. The ``progress`` argument is
+                passed to the encoder instead of being sent.
+            *   Requests are counted in :attr:`IpernityAPI.metrics
+                <ipernity.api.IpernityAPI.metrics>` if set.
+            *   Requests are recorded or replayed by :attr:`IpernityAPI.cassette
+                <ipernity.api.IpernityAPI.cassette>` if set.
         """
-        data = self._sign_request(method_name, **method_args)
-        log.debug(
-            'Calling %s with %s',
+        metrics = self.api.metrics
+        if metrics is None:
+            return self._send(url, method_name, method_args, stream)
+        with metrics.track_request(method_name) as info:
+            response = self._send(url, method_name, method_args, stream)
+            info.set_response(
+                response.url,
+                response.request_headers,
+                response.status_code,
+                response.headers,
+                None if stream else response.content
+            )
+            return response
+    
+    def _send(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """Runs a request, or replays it from the cassette."""
+        cassette = self.api.cassette
+        if cassette is None:
+            return self._http_request(url, method_name, method_args, stream)
+        return cassette.do_request(
+            self.api,
             url,
-            ', '.join([
-                # Censor potentially sensitive data
-                f'{k}=XXX' if k in ['api_key', 'auth_token'] else f'{k}={v}'
-                for k, v in data.items()
-            ])
+            method_name,
+            method_args,
+            lambda: self._http_request(url, method_name, method_args, stream)
         )
+    
+    def _http_request(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        stream: bool = False
+    ) -> Response:
+        """Signs and runs a request with the transport of the API object."""
+        return self.api.transport.request(
+            **self._prepare(url, method_name, method_args),
+            timeout = self.api.timeout,
+            stream = stream
+        )
+    
+    def _prepare(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg]
+    ) -> dict[str, Any]:
+        """
+        Signs a request and chooses how to send it.
         
-        # Do request, use POST if required
-        if int(self.api.__methods__[method_name]['authentication'].get('post', "0")):
+        Returns:
+            The arguments for :meth:`Transport.request
+            <ipernity.transport.Transport.request>`: the HTTP ``method``, the
+            ``url`` and the signed arguments as ``params`` (GET), ``data``
+            (POST) or ``encoder`` (POST with a file).
+        """
+        progress, method_args = self._pop_progress(method_args)
+        post, data = self._request_data(url, method_name, method_args)
+        
+        # Use POST if required
+        if post:
             if 'file' in data:
-                with open(data['file'], 'rb') as f:
-                    del data['file']
-                    return requests.post(
-                        url,
-                        data = data,
-                        files = {'file': f}
-                    )
-            
-            return requests.post(url, data = data)
+                encoder = MultipartEncoder(data, 'file', data.pop('file'), progress)
+                return {'method': 'POST', 'url': url, 'encoder': encoder}
+            return {'method': 'POST', 'url': url, 'data': data}
+        return {'method': 'GET', 'url': url, 'params': data}
+    
+    @staticmethod
+    def _pop_progress(
+        method_args: Mapping[str, api_arg]
+    ) -> tuple[progress_callback | None, Mapping[str, api_arg]]:
+        """Separates the upload progress callback from the method arguments"""
+        if 'progress' not in method_args:
+            return None, method_args
+        method_args = dict(method_args)
+        return method_args.pop('progress'), method_args
+    
+    def _request_data(
+        self,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg]
+    ) -> tuple[bool, dict]:
+        """
+        Prepares a request.
         
-        return requests.get(url, params = data)
+        Returns:
+            A tuple ``(post, data)``. ``post`` is ``True`` if the method must
+            be called with HTTP POST, ``data`` contains the signed arguments.
+        """
+        data = self._sign_request(method_name, **method_args)
+        if log.isEnabledFor(DEBUG):
+            log.debug(
+                'Calling %s with %s',
+                url,
+                ', '.join([
+                    # Censor potentially sensitive data
+                    f'{k}=XXX' if k in ['api_key', 'auth_token'] else
+                    f'{k}=<{type(v).__name__}>' if k == 'file' and not isinstance(v, str) else
+                    f'{k}={v}'
+                    for k, v in data.items()
+                ])
+            )
+        return not self.api.is_read_method(method_name), data
     
     def _sign_request(self, method_name: str | None = None, **kwargs: api_arg) -> dict:
         """Signs a request."""
-        log.debug(f'Generating signature for {method_name} {kwargs}')
+        log.debug('Generating signature for %s %s', method_name, kwargs)
         kwargs['api_key'] = self.api.api_key
         if self.api.token:
             kwargs['auth_token'] = self.api.token
-        
-        sig_str = ''.join([
-            f'{k}{kwargs[k]}'
-            for k in sorted(kwargs.keys())
-            if k != 'file'
-        ])
-        
-        if method_name:
-            sig_str += method_name
-        
-        sig_str += self.api.api_secret
-        # potentially dangerous log.debug(f'  signature string is {sig_str}')
         kwargs.update({
-            'api_sig':  md5(sig_str.encode('utf-8')).hexdigest(),
+            'api_sig':  api_signature(kwargs, self.api.api_secret, method_name),
         })
         return kwargs
     
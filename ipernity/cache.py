@@ -0,0 +1,651 @@
+"""
+Response Caching
+==================
+
+A response cache stores the results of read methods, so that repeated calls
+with the same arguments do not go to the network:
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.cache import MemoryCache
+    
+    api = IpernityAPI(key, secret, token, cache = MemoryCache(ttl = 600))
+    api.album.get(album_id = 4711)      # Calls Ipernity
+    api.album.get(album_id = 4711)      # Returned from cache
+
+Entries are keyed on the method name, the arguments and the API token. The
+cached methods are the read methods (see
+:meth:`~ipernity.api.IpernityAPI.is_read_method`) except
+``auth.*`` and ``upload.*``. This can be changed with the ``methods`` and
+``exclude`` arguments of the cache.
+
+Write methods invalidate the entries they might have changed:
+
+*   entries that have an ID argument (like ``doc_id`` or ``album_id``) with
+    the same value as the write method, and
+*   entries of the same service (as given in :iper:`api.methods.getList`)
+    that do not have any of the ID arguments of the write method, e.g.
+    ``doc.getList`` when a document is deleted.
+
+For example, ``album.docs.add(album_id = 1, doc_id = 2)`` removes
+``album.get(album_id = 1)``, ``album.docs.getList(album_id = 1)``,
+``doc.get(doc_id = 2)`` and ``album.getList()``, but keeps
+``album.get(album_id = 3)``.
+
+.. note::
+    Changes made by other clients or on the Ipernity website are only seen
+    after the entries expire.
+
+Two caches are available: :class:`MemoryCache` keeps the entries in memory,
+:class:`SQLiteCache` stores them in a database file, so they survive restarts
+and can be shared by several processes:
+
+.. code-block:: python
+
+    cache = SQLiteCache(
+        '/var/cache/ipernity.db',
+        ttls = {'doc.getExif': 30 * 86400, 'doc.get': 86400},
+        max_size = 500_000_000
+    )
+    api = IpernityAPI(key, secret, token, cache = cache)
+
+.. _cache-cli:
+
+Command line interface
+-----------------------
+
+The contents of an :class:`SQLiteCache` can be shown and removed from the
+command line:
+
+.. code-block:: shell-session
+
+    $ python -m ipernity.cache /var/cache/ipernity.db info
+    $ python -m ipernity.cache /var/cache/ipernity.db purge
+    $ python -m ipernity.cache /var/cache/ipernity.db clear --method 'doc.*'
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import zlib
+from abc import ABC, abstractmethod
+from argparse import ArgumentParser
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from hashlib import sha256
+from logging import getLogger
+from threading import Lock, local
+from time import monotonic, time
+from typing import Any, Iterable, Mapping, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import api_arg
+
+log = getLogger(__name__)
+
+
+# Write methods of these services also change data of other services
+_related_services = {
+    'upload':   ('doc',),
+}
+
+
+class ResponseCache(ABC):
+    """
+    Base class for response caches.
+    
+    Args:
+        ttl:        Lifetime of entries in seconds.
+        ttls:       Lifetimes for specific methods. The keys are method
+                    patterns (see :mod:`fnmatch`), the first matching pattern
+                    is used. Methods not matching any pattern use ``ttl``.
+        methods:    Patterns of read methods that are cached. Default is all
+                    read methods.
+        exclude:    Patterns of read methods that are never cached.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 300,
+        ttls: Mapping[str, float] | None = None,
+        methods: Iterable[str] = ('*',),
+        exclude: Iterable[str] = ('auth.*', 'upload.*'),
+    ):
+        self._ttl = ttl
+        self._ttls = dict(ttls or {})
+        self._methods = tuple(methods)
+        self._exclude = tuple(exclude)
+        self._cacheable = {}
+        self._method_ttls = {}
+    
+    def ttl(self, method_name: str) -> float:
+        """Returns the lifetime of entries for a method."""
+        try:
+            return self._method_ttls[method_name]
+        except KeyError:
+            for pattern, ttl in self._ttls.items():
+                if fnmatchcase(method_name, pattern):
+                    break
+            else:
+                ttl = self._ttl
+            self._method_ttls[method_name] = ttl
+            return ttl
+    
+    def cacheable(self, method_name: str) -> bool:
+        """Checks if a read method is cached."""
+        try:
+            return self._cacheable[method_name]
+        except KeyError:
+            result = (
+                any(fnmatchcase(method_name, p) for p in self._methods) and
+                not any(fnmatchcase(method_name, p) for p in self._exclude)
+            )
+            self._cacheable[method_name] = result
+            return result
+    
+    def get(
+        self,
+        method_name: str,
+        kwargs: Mapping[str, api_arg],
+        token: str | None
+    ) -> dict | None:
+        """
+        Looks up the result of an API call.
+        
+        Returns:
+            A copy of the cached result, or ``None``.
+        """
+        result = self._get(self.make_key(method_name, kwargs, token), method_name)
+        if result is None:
+            log.debug('Cache miss for %s', method_name)
+            return None
+        log.debug('Cache hit for %s', method_name)
+        return result
+    
+    def set(
+        self,
+        method_name: str,
+        service: str,
+        kwargs: Mapping[str, api_arg],
+        token: str | None,
+        result: dict
+    ):
+        """Stores the result of an API call."""
+        self._set(
+            self.make_key(method_name, kwargs, token),
+            method_name,
+            service,
+            self._ids(kwargs),
+            result
+        )
+    
+    def invalidate(
+        self,
+        method_name: str,
+        service: str,
+        kwargs: Mapping[str, api_arg]
+    ):
+        """Removes the entries that might be changed by a write method."""
+        services = (service,) + _related_services.get(service, ())
+        ids = self._ids(kwargs)
+        log.debug('Invalidating cache for %s %s', method_name, ids)
+        self._invalidate(services, ids)
+    
+    @abstractmethod
+    def clear(self):
+        """Removes all entries."""
+        pass
+    
+    @abstractmethod
+    def _get(self, key: str, method_name: str) -> dict | None:
+        """Returns a copy of a valid entry, or ``None``."""
+        pass
+    
+    @abstractmethod
+    def _set(
+        self,
+        key: str,
+        method_name: str,
+        service: str,
+        ids: Mapping[str, str],
+        result: dict
+    ):
+        """Stores an entry."""
+        pass
+    
+    @abstractmethod
+    def _invalidate(self, services: Iterable[str], ids: Mapping[str, str]):
+        """
+        Removes entries that have one of the given ID values, or belong to one
+        of the services and have none of the ID keys.
+        """
+        pass
+    
+    @staticmethod
+    def make_key(
+        method_name: str,
+        kwargs: Mapping[str, api_arg],
+        token: str | None
+    ) -> str:
+        """Generates the cache key for an API call."""
+        parts = [method_name, token or '']
+        parts.extend(f'{k}={kwargs[k]}' for k in sorted(kwargs))
+        return sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _ids(kwargs: Mapping[str, api_arg]) -> dict[str, str]:
+        return {k: str(v) for k, v in kwargs.items() if k.endswith('_id')}
+
+
+class MemoryCache(ResponseCache):
+    """
+    LRU cache in memory.
+    
+    The cache is thread-safe.
+    
+    Args:
+        maxsize:    Maximum number of entries. If the cache is full, the least
+                    recently used entry is removed.
+        ttl:        Lifetime of entries in seconds.
+        ttls:       See :class:`ResponseCache`.
+        methods:    See :class:`ResponseCache`.
+        exclude:    See :class:`ResponseCache`.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300,
+        ttls: Mapping[str, float] | None = None,
+        methods: Iterable[str] = ('*',),
+        exclude: Iterable[str] = ('auth.*', 'upload.*'),
+    ):
+        super().__init__(ttl, ttls, methods, exclude)
+        self._maxsize = maxsize
+        self._lock = Lock()
+        # key -> (expires, result, service, ids)
+        self._entries = OrderedDict()
+        # Indexes for invalidation
+        self._by_id = {}
+        self._by_service = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_id.clear()
+            self._by_service.clear()
+    
+    def _get(self, key: str, method_name: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return _copy(entry[1])
+    
+    def _set(
+        self,
+        key: str,
+        method_name: str,
+        service: str,
+        ids: Mapping[str, str],
+        result: dict
+    ):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (
+                monotonic() + self.ttl(method_name),
+                _copy(result),
+                service,
+                ids
+            )
+            self._by_service.setdefault(service, set()).add(key)
+            for id_ in ids.items():
+                self._by_id.setdefault(id_, set()).add(key)
+            while len(self._entries) > self._maxsize:
+                self._remove(next(iter(self._entries)))
+    
+    def _invalidate(self, services: Iterable[str], ids: Mapping[str, str]):
+        with self._lock:
+            keys = set()
+            for id_ in ids.items():
+                keys.update(self._by_id.get(id_, ()))
+            for service in services:
+                for key in self._by_service.get(service, ()):
+                    if not any(k in self._entries[key][3] for k in ids):
+                        keys.add(key)
+            for key in keys:
+                self._remove(key)
+    
+    def _remove(self, key: str):
+        _, _, service, ids = self._entries.pop(key)
+        self._by_service[service].discard(key)
+        for id_ in ids.items():
+            keys = self._by_id[id_]
+            keys.discard(key)
+            if not keys:
+                del self._by_id[id_]
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Persistent cache in an SQLite database.
+    
+    The cache survives restarts and can be used by several processes at the
+    same time. Results are stored as compressed JSON.
+    
+    The cache can be inspected and purged from the command line, see
+    :ref:`cache-cli`.
+    
+    Args:
+        path:       Name of the database file.
+        ttl:        Lifetime of entries in seconds.
+        ttls:       See :class:`ResponseCache`.
+        max_size:   Maximum size of the stored (compressed) results in bytes.
+                    If it is exceeded, expired and then least recently used
+                    entries are removed. ``None`` means no limit.
+        methods:    See :class:`ResponseCache`.
+        exclude:    See :class:`ResponseCache`.
+        timeout:    Time in seconds to wait for other processes that are
+                    writing to the database.
+    """
+    
+    _schema = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key         TEXT PRIMARY KEY,
+            method      TEXT NOT NULL,
+            service     TEXT NOT NULL,
+            expires     REAL NOT NULL,
+            accessed    REAL NOT NULL,
+            size        INTEGER NOT NULL,
+            data        BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_service ON entries (service);
+        CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+        CREATE TABLE IF NOT EXISTS entry_ids (
+            key         TEXT NOT NULL REFERENCES entries (key) ON DELETE CASCADE,
+            name        TEXT NOT NULL,
+            value       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entry_ids_value ON entry_ids (name, value);
+        CREATE INDEX IF NOT EXISTS entry_ids_key ON entry_ids (key);
+    """
+    
+    # Check the size limit after writing this fraction of max_size
+    _size_check_fraction = 0.05
+    
+    # Don't update access time more often
+    _access_resolution = 60
+    
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86400,
+        ttls: Mapping[str, float] | None = None,
+        max_size: int | None = None,
+        methods: Iterable[str] = ('*',),
+        exclude: Iterable[str] = ('auth.*', 'upload.*'),
+        timeout: float = 30,
+    ):
+        super().__init__(ttl, ttls, methods, exclude)
+        self._path = path
+        self._max_size = max_size
+        self._timeout = timeout
+        self._local = local()
+        self._written = 0       # bytes written since the last size check
+        self._lock = Lock()
+        with self._connection() as conn:
+            conn.executescript(self._schema)
+    
+    @property
+    def path(self) -> str:
+        """Name of the database file"""
+        return self._path
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the database connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            log.debug('Opening cache database %s', self._path)
+            conn = sqlite3.connect(self._path, timeout = self._timeout)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('PRAGMA foreign_keys = ON')
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        """Closes the database connection of the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+    
+    def clear(self, method: str | None = None):
+        """
+        Removes all entries.
+        
+        Args:
+            method: Only remove the entries of methods matching this pattern.
+        """
+        with self._connection() as conn:
+            if method is None:
+                conn.execute('DELETE FROM entries')
+            else:
+                conn.execute('DELETE FROM entries WHERE method GLOB ?', (method,))
+    
+    def purge(self) -> int:
+        """
+        Removes expired entries and enforces the size limit.
+        
+        Returns:
+            The number of removed entries.
+        """
+        with self._connection() as conn:
+            removed = conn.execute(
+                'DELETE FROM entries WHERE expires < ?',
+                (time(),)
+            ).rowcount
+            removed += self._enforce_size(conn)
+        return removed
+    
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns statistics about the cache.
+        
+        The result contains the number of ``entries``, the ``size`` of the
+        stored results, the number of ``expired`` entries and the number of
+        entries per method (``methods``).
+        """
+        conn = self._connection()
+        entries, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()
+        expired = conn.execute(
+            'SELECT COUNT(*) FROM entries WHERE expires < ?',
+            (time(),)
+        ).fetchone()[0]
+        methods = dict(conn.execute(
+            'SELECT method, COUNT(*) FROM entries GROUP BY method ORDER BY method'
+        ))
+        return {
+            'entries':  entries,
+            'size':     size,
+            'expired':  expired,
+            'methods':  methods,
+        }
+    
+    def _get(self, key: str, method_name: str) -> dict | None:
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT expires, accessed, data FROM entries WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        expires, accessed, data = row
+        now = time()
+        if expires < now:
+            with conn:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            return None
+        if now - accessed > self._access_resolution:
+            with conn:
+                conn.execute(
+                    'UPDATE entries SET accessed = ? WHERE key = ?',
+                    (now, key)
+                )
+        return json.loads(zlib.decompress(data))
+    
+    def _set(
+        self,
+        key: str,
+        method_name: str,
+        service: str,
+        ids: Mapping[str, str],
+        result: dict
+    ):
+        data = zlib.compress(
+            json.dumps(result, separators = (',', ':')).encode('utf-8')
+        )
+        now = time()
+        with self._connection() as conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            conn.execute(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    key,
+                    method_name,
+                    service,
+                    now + self.ttl(method_name),
+                    now,
+                    len(data),
+                    data
+                )
+            )
+            conn.executemany(
+                'INSERT INTO entry_ids VALUES (?, ?, ?)',
+                [(key, name, value) for name, value in ids.items()]
+            )
+            if self._max_size is not None:
+                with self._lock:
+                    self._written += len(data)
+                    check = self._written >= self._max_size * self._size_check_fraction
+                    if check:
+                        self._written = 0
+                if check:
+                    self._enforce_size(conn)
+    
+    def _invalidate(self, services: Iterable[str], ids: Mapping[str, str]):
+        services = list(services)
+        id_names = list(ids)
+        with self._connection() as conn:
+            for name, value in ids.items():
+                conn.execute(
+                    'DELETE FROM entries WHERE key IN '
+                    '(SELECT key FROM entry_ids WHERE name = ? AND value = ?)',
+                    (name, value)
+                )
+            conn.execute(
+                f"""
+                    DELETE FROM entries
+                    WHERE service IN ({', '.join('?' * len(services))})
+                    AND NOT EXISTS (
+                        SELECT 1 FROM entry_ids
+                        WHERE entry_ids.key = entries.key
+                        AND name IN ({', '.join('?' * len(id_names))})
+                    )
+                """,
+                services + id_names
+            )
+    
+    def _enforce_size(self, conn: sqlite3.Connection) -> int:
+        """Removes entries until the size limit is met."""
+        if self._max_size is None:
+            return 0
+        size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if size <= self._max_size:
+            return 0
+        
+        log.debug('Cache size %d exceeds %d', size, self._max_size)
+        removed = conn.execute('DELETE FROM entries WHERE expires < ?', (time(),)).rowcount
+        size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        
+        # Leave some room, so we don't have to evict on every write
+        target = self._max_size * 0.9
+        keys = []
+        for key, entry_size in conn.execute(
+            'SELECT key, size FROM entries ORDER BY accessed'
+        ):
+            if size <= target:
+                break
+            keys.append((key,))
+            size -= entry_size
+        conn.executemany('DELETE FROM entries WHERE key = ?', keys)
+        return removed + len(keys)
+
+
+def _copy(data: Any) -> Any:
+    """Copies parsed JSON data."""
+    if isinstance(data, dict):
+        return {k: _copy(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_copy(v) for v in data]
+    return data
+
+
+
+def main():
+    """Command line interface for :class:`SQLiteCache`."""
+    parser = ArgumentParser(
+        'python -m ipernity.cache',
+        description = 'Inspect or purge a PyIpernity SQLite cache'
+    )
+    parser.add_argument('path', help = 'Cache database file')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    commands.add_parser('info', help = 'Show statistics')
+    commands.add_parser('purge', help = 'Remove expired entries')
+    clear = commands.add_parser('clear', help = 'Remove entries')
+    clear.add_argument(
+        '-m', '--method',
+        help = 'Only remove entries of methods matching this pattern',
+        action = 'store'
+    )
+    opts = parser.parse_args()
+    
+    if not os.path.isfile(opts.path):
+        parser.error(f'{opts.path} does not exist')
+    cache = SQLiteCache(opts.path)
+    
+    if opts.command == 'info':
+        stats = cache.stats()
+        print(f'Entries:    {stats["entries"]}')
+        print(f'Expired:    {stats["expired"]}')
+        print(f'Size:       {stats["size"]} bytes')
+        for method, count in stats['methods'].items():
+            print(f'    {method:30s} {count:8d}')
+    elif opts.command == 'purge':
+        print(f'Removed {cache.purge()} entries')
+    elif opts.command == 'clear':
+        cache.clear(opts.method)
+    
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+Recording and Replaying Requests
+==================================
+
+A :class:`Cassette` records the HTTP requests of an API object and their
+responses to a file, and replays them later without network access. This
+makes benchmarks and tests repeatable and independent of an Ipernity account:
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.cassette import Cassette
+    
+    # Record
+    with Cassette('docs.json.gz', mode = 'record') as cassette:
+        api = IpernityAPI(key, secret, token, cassette = cassette)
+        docs = list(api.walk_docs(extra = 'dates'))
+    
+    # Replay, without credentials
+    with Cassette('docs.json.gz') as cassette:
+        api = IpernityAPI('key', 'secret', cassette = cassette)
+        assert list(api.walk_docs(extra = 'dates')) == docs
+
+Requests are matched by the API method and the arguments, ignoring the
+signature and credentials. If the same request was recorded several times,
+the responses are replayed in order, and the last one is repeated. File
+contents of uploads are not recorded, uploads match any file.
+
+The recording does not contain the API key, the signature and the
+authentication token; they are removed from the arguments and replaced by
+``REDACTED`` in the responses. Other personal data in the responses, like
+user names, is kept.
+
+Modes:
+
+``replay``
+    Only replay, raise :class:`~ipernity.exceptions.CassetteError` for
+    requests that are not in the cassette.
+``record``
+    Send all requests and record them, replacing the previous contents.
+``auto``
+    Replay recorded requests, send and record the others.
+
+Cassettes are JSON files, compressed with gzip if the file name ends with
+``.gz``. They are written by :meth:`Cassette.save`, or when the cassette is
+used as a context manager.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from base64 import b64decode, b64encode
+from logging import getLogger
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Awaitable, Callable, Mapping, TYPE_CHECKING
+
+from .exceptions import CassetteError
+from .transport import Headers, Response
+
+if TYPE_CHECKING:
+    from .api import IpernityAPI, api_arg
+
+log = getLogger(__name__)
+
+#: Replacement for secrets
+REDACTED = 'REDACTED'
+
+# Arguments that are not recorded
+_secret_args = frozenset(['api_key', 'api_sig', 'auth_token', 'progress'])
+# Keys whose values are removed from responses
+_secret_keys = frozenset(['token', 'auth_token', 'api_key', 'api_secret'])
+# Response headers that are recorded
+_headers = ('Content-Type', 'Retry-After')
+
+
+class Cassette:
+    """
+    Recorded requests and responses.
+    
+    Args:
+        path:       Name of the cassette file.
+        mode:       ``replay``, ``record`` or ``auto``, see above.
+        latency:    Factor for the recorded duration of requests when
+                    replaying. With 1, replayed requests take as long as the
+                    recorded ones, with 0 (the default), they return at once.
+    """
+    
+    def __init__(self, path: str, mode: str = 'replay', latency: float = 0):
+        if mode not in ('replay', 'record', 'auto'):
+            raise ValueError(f'Invalid cassette mode {mode}')
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = Lock()
+        self._interactions = []
+        self._index = {}        # key -> interactions
+        self._played = {}       # key -> number of replayed interactions
+        self._changed = False
+        if mode != 'record':
+            self._load()
+    
+    def __enter__(self) -> Cassette:
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.save()
+    
+    def __len__(self) -> int:
+        return len(self._interactions)
+    
+    def _load(self):
+        try:
+            opener = gzip.open if self.path.endswith('.gz') else open
+            with opener(self.path, 'rt', encoding = 'utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            if self.mode == 'replay':
+                raise
+            return
+        for interaction in data['interactions']:
+            self._append(interaction)
+        log.debug('Loaded %d interactions from %s', len(self._interactions), self.path)
+    
+    def _append(self, interaction: dict):
+        self._interactions.append(interaction)
+        key = self._key(interaction['method'], interaction['args'])
+        self._index.setdefault(key, []).append(interaction)
+    
+    def save(self):
+        """Writes the cassette file if requests were recorded."""
+        with self._lock:
+            if not self._changed:
+                return
+            tmp = f'{self.path}.tmp'
+            opener = gzip.open if self.path.endswith('.gz') else open
+            with opener(tmp, 'wt', encoding = 'utf-8') as f:
+                json.dump(
+                    {'version': 1, 'interactions': self._interactions},
+                    f,
+                    separators = (',', ':'),
+                    ensure_ascii = False
+                )
+            os.replace(tmp, self.path)
+            self._changed = False
+        log.debug('Saved %d interactions to %s', len(self._interactions), self.path)
+    
+    @staticmethod
+    def _args(method_args: Mapping[str, api_arg]) -> dict[str, str]:
+        """Returns the arguments as recorded."""
+        return {
+            str(k): str(v) if k != 'file' else '<file>'
+            for k, v in sorted(method_args.items())
+            if k not in _secret_args
+        }
+    
+    @staticmethod
+    def _key(method_name: str, args: Mapping[str, str]) -> str:
+        return json.dumps([method_name, args], sort_keys = True)
+    
+    def _find(self, method_name: str, args: dict[str, str]) -> dict | None:
+        """Returns the next recorded interaction for a request."""
+        key = self._key(method_name, args)
+        with self._lock:
+            interactions = self._index.get(key)
+            if not interactions:
+                return None
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            return interactions[min(played, len(interactions) - 1)]
+    
+    def _record(
+        self,
+        api: IpernityAPI,
+        method_name: str,
+        args: dict[str, str],
+        status: int,
+        reason: str,
+        headers: Mapping[str, str],
+        content: bytes,
+        elapsed: float,
+    ):
+        interaction = {
+            'method':   method_name,
+            'args':     args,
+            'status':   status,
+            'reason':   reason,
+            'headers':  {h: headers[h] for h in _headers if h in headers},
+            'elapsed':  round(elapsed, 4),
+        }
+        interaction.update(self._encode_body(api, content))
+        with self._lock:
+            self._append(interaction)
+            # Recorded requests are not replayed in the same session
+            key = self._key(method_name, args)
+            self._played[key] = len(self._index[key])
+            self._changed = True
+    
+    @staticmethod
+    def _encode_body(api: IpernityAPI, content: bytes) -> dict[str, Any]:
+        """Returns the body for the cassette, with secrets removed."""
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return {'body_base64': b64encode(content).decode('ascii')}
+        
+        # Short values (like in tests) would also match unrelated strings
+        secrets = [
+            s for s in (api.api_key, api.token, api._api_secret)
+            if isinstance(s, str) and len(s) >= 8
+        ]
+        
+        def redact(obj: Any) -> Any:
+            if isinstance(obj, dict):
+                return {
+                    k: REDACTED if k in _secret_keys and isinstance(v, str) else redact(v)
+                    for k, v in obj.items()
+                }
+            if isinstance(obj, list):
+                return [redact(v) for v in obj]
+            if isinstance(obj, str):
+                for secret in secrets:
+                    obj = obj.replace(secret, REDACTED)
+            return obj
+        
+        return {'body': redact(data)}
+    
+    @staticmethod
+    def _decode_body(interaction: dict) -> bytes:
+        if 'body' in interaction:
+            return json.dumps(interaction['body'], ensure_ascii = False).encode('utf-8')
+        return b64decode(interaction['body_base64'])
+    
+    def _response(self, url: str, interaction: dict) -> Response:
+        """Returns the recorded response."""
+        return Response(
+            interaction['status'],
+            interaction['reason'],
+            Headers(interaction['headers']),
+            url,
+            content = self._decode_body(interaction)
+        )
+    
+    def _replay(self, method_name: str, args: dict[str, str]) -> dict | None:
+        """Returns the interaction to replay, ``None`` if it must be sent."""
+        if self.mode == 'record':
+            return None
+        interaction = self._find(method_name, args)
+        if interaction is None and self.mode == 'replay':
+            raise CassetteError(method_name, args)
+        if interaction is not None:
+            log.debug('Replaying %s %s', method_name, args)
+        return interaction
+    
+    def do_request(
+        self,
+        api: IpernityAPI,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        send: Callable[[], Response],
+    ) -> Response:
+        """
+        Replays or records a request of :meth:`AuthHandler.do_request
+        <ipernity.auth.AuthHandler.do_request>`.
+        
+        Args:
+            api:            The API object.
+            url:            Request URL.
+            method_name:    The API method.
+            method_args:    Arguments of the method call.
+            send:           Function sending the request.
+        """
+        args = self._args(method_args)
+        interaction = self._replay(method_name, args)
+        if interaction is not None:
+            if self.latency:
+                sleep(interaction['elapsed'] * self.latency)
+            return self._response(url, interaction)
+        
+        start = monotonic()
+        response = send()
+        # Reads the body of streamed responses, too
+        content = response.content
+        self._record(
+            api,
+            method_name,
+            args,
+            response.status_code,
+            response.reason,
+            response.headers,
+            content,
+            monotonic() - start
+        )
+        return response
+    
+    async def do_request_async(
+        self,
+        api: IpernityAPI,
+        url: str,
+        method_name: str,
+        method_args: Mapping[str, api_arg],
+        send: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        """Like :meth:`do_request` for :class:`~ipernity.aio.AsyncIpernityAPI`."""
+        import asyncio
+        
+        args = self._args(method_args)
+        interaction = self._replay(method_name, args)
+        if interaction is not None:
+            if self.latency:
+                await asyncio.sleep(interaction['elapsed'] * self.latency)
+            return self._response(url, interaction)
+        
+        start = monotonic()
+        response = await send()
+        content = await response.aread()
+        self._record(
+            api,
+            method_name,
+            args,
+            response.status_code,
+            response.reason,
+            response.headers,
+            content,
+            monotonic() - start
+        )
+        return response
@@ -0,0 +1,222 @@
+"""
+Walk Checkpoints
+==================
+
+A checkpoint stores the position of
+:meth:`~ipernity.api.IpernityAPI.walk_data` (and the ``walk_*`` helpers)
+after each page, so a walk that was interrupted by an error or a restart
+continues where it stopped instead of starting over:
+
+.. code-block:: python
+    
+    from ipernity.checkpoint import FileCheckpoint
+    
+    checkpoint = FileCheckpoint('walk-docs.json')
+    for doc in api.walk_docs(user_id = user_id, checkpoint = checkpoint):
+        process(doc)
+
+A checkpoint is saved when all elements of a page have been consumed; it
+contains the IDs of the elements of this page and the page before. A resumed
+walk fetches the last completed page again, because documents added or
+removed in the meantime shift the page boundaries. Elements with a saved ID
+are skipped on this page and the next one, so an element that moved by less
+than a page is not processed twice. The IDs are taken from the key
+``<elem_name>_id`` (like ``doc_id``). Elements of an incomplete page are
+processed again after a restart.
+
+When the walk is complete, the checkpoint is cleared. A checkpoint that was
+saved for a different method or different arguments is ignored.
+
+Checkpoints can be kept elsewhere by subclassing :class:`Checkpoint`.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from abc import ABC, abstractmethod
+from logging import getLogger
+from typing import Any, Generator, Iterable, Mapping, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import api_arg
+
+log = getLogger(__name__)
+
+
+class Checkpoint(ABC):
+    """
+    Base class for checkpoint stores.
+    
+    A checkpoint store holds the state of one walk, a JSON serializable
+    ``dict``.
+    """
+    
+    @abstractmethod
+    def load(self) -> dict | None:
+        """Returns the saved state, ``None`` if there is none."""
+    
+    @abstractmethod
+    def save(self, state: dict):
+        """Saves the state."""
+    
+    @abstractmethod
+    def clear(self):
+        """Removes the saved state."""
+
+
+class MemoryCheckpoint(Checkpoint):
+    """Checkpoint kept in memory, e.g. for retrying a walk in the same process"""
+    
+    def __init__(self):
+        self.state = None
+    
+    def load(self) -> dict | None:
+        return self.state
+    
+    def save(self, state: dict):
+        self.state = state
+    
+    def clear(self):
+        self.state = None
+
+
+class FileCheckpoint(Checkpoint):
+    """
+    Checkpoint stored in a JSON file.
+    
+    The file is replaced atomically, so it is intact even if the process is
+    killed while it is saved.
+    
+    Args:
+        path:   Name of the file.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            log.warning('Invalid checkpoint %s, ignoring it', self.path)
+            return None
+    
+    def save(self, state: dict):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+    
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class WalkProgress:
+    """
+    Connects a walk with a :class:`Checkpoint`.
+    
+    Used by :meth:`~ipernity.api.IpernityAPI.walk_data`: :attr:`page` is the
+    first page to fetch, the elements are passed through :meth:`accept` (or
+    :meth:`filter`), and :meth:`page_done` is called after each page.
+    
+    Args:
+        checkpoint:     The checkpoint store.
+        method_name:    Method of the walk.
+        elem_name:      Key of the elements.
+        kwargs:         Arguments of the method, without ``page``.
+        page:           First page if there is no matching checkpoint.
+    """
+    
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        method_name: str,
+        elem_name: str,
+        kwargs: Mapping[str, api_arg],
+        page: int = 1,
+    ):
+        self._checkpoint = checkpoint
+        self._method_name = method_name
+        self._id_key = f'{elem_name}_id'
+        # Normalized like the saved state, for comparing
+        self._kwargs = json.loads(json.dumps(kwargs, sort_keys = True, default = str))
+        self._ids = []
+        self._prev_ids = []
+        self._skip = set()
+        self._skip_pages = ()
+        
+        state = checkpoint.load()
+        if state is not None and (
+            state.get('method') != method_name or state.get('kwargs') != self._kwargs
+        ):
+            log.warning('Ignoring checkpoint of a different walk: %s', state.get('method'))
+            state = None
+        if state is not None:
+            page = state['page']
+            log.info('Resuming %s at page %d of %d', method_name, page, state['pages'])
+            self._skip = set(state['ids'])
+            self._skip_pages = (page, page + 1)
+        self.page = page
+        self._current = page
+    
+    def _elem_id(self, elem: Mapping) -> Any:
+        try:
+            return elem[self._id_key]
+        except (KeyError, TypeError):
+            return json.dumps(elem, sort_keys = True, default = str)
+    
+    def start_page(self, page: int):
+        """Starts recording the elements of a page."""
+        self._current = page
+        self._prev_ids = self._ids
+        self._ids = []
+    
+    def accept(self, elem: Mapping) -> bool:
+        """Checks if an element is new and records it."""
+        id_ = self._elem_id(elem)
+        if self._current in self._skip_pages and id_ in self._skip:
+            return False
+        self._ids.append(id_)
+        return True
+    
+    def filter(self, elements: Iterable[dict]) -> Generator[dict, None, Any]:
+        """
+        Yields the new elements.
+        
+        Returns the return value of ``elements`` if it is a generator.
+        """
+        elements = iter(elements)
+        while True:
+            try:
+                elem = next(elements)
+            except StopIteration as e:
+                return e.value
+            if self.accept(elem):
+                yield elem
+    
+    def page_done(self, page: int, pages: int):
+        """Saves the checkpoint after all elements of a page were consumed."""
+        if page in self._skip_pages:
+            # Still skip the elements of before the restart on the next page
+            self._ids.extend(self._skip.difference(self._ids))
+        if page >= pages:
+            self._checkpoint.clear()
+            return
+        self._checkpoint.save({
+            'method':   self._method_name,
+            'kwargs':   self._kwargs,
+            'page':     page,
+            'pages':    pages,
+            'ids':      self._prev_ids + self._ids,
+        })
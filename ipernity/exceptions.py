@@ -69,7 +69,8 @@ class APIRequestError(IpernityError):
         Error code.
         
         If :attr:`status` is ``'httperror'``, this attribute contains the HTTP
-        result code. Otherwise, it is the error code returned by Ipernity.
+        result code, or 0 if the request failed due to a network error.
+        Otherwise, it is the error code returned by Ipernity.
     
     .. property:: message
         :type: str
@@ -131,4 +132,49 @@ class UploadError(IpernityError):
             message = f'Error uploading {filename}, ticket {ticket}'
         self.filename = filename
         self.ticket = ticket
-        self.message = message
\ No newline at end of file
+        self.message = message
+
+class CassetteError(IpernityError):
+    """
+    A request was not found in a :class:`~ipernity.cassette.Cassette` in
+    replay mode.
+    
+    .. versionadded:: 0.4.0
+    
+    .. property:: method
+        :type: str
+        
+        The API method of the request.
+    
+    .. property:: params
+        :type: dict
+        
+        The arguments of the request, as recorded.
+    """
+    def __init__(
+        self,
+        method: str|None = None,
+        params: Mapping|None = None,
+        message: str|None = None
+    ):
+        if message is None:
+            message = f'Request {method} {params} not in cassette'
+        self.method = method
+        self.params = params
+        self.message = message
+        super().__init__(message)
+
+
+class TransportError(IpernityError):
+    """
+    An HTTP request failed due to a network error.
+    
+    Raised by the :mod:`transports <ipernity.transport>`, and converted to
+    :class:`APIRequestError` with status ``'httperror'`` and code 0 by the
+    API objects.
+    
+    .. versionadded:: 0.4.0
+    """
+    def __init__(self, message: str = 'Request failed'):
+        self.message = message
+        super().__init__(message)
@@ -0,0 +1,214 @@
+"""
+Exporting Walks
+=================
+
+The functions in this module write the elements of a walk (like
+:meth:`~ipernity.api.IpernityAPI.walk_docs`) to a file while they are
+fetched, in batches, so the memory usage does not depend on the number of
+elements:
+
+.. code-block:: python
+    
+    from ipernity.export import export
+    
+    n = export(api.walk_docs(extra = 'dates,count', prefetch = 4), 'docs.parquet')
+
+Nested objects are flattened, with dots between the keys (``dates.created``),
+lists are stored as JSON. The columns and their types are taken from the
+first batch; columns that only appear later are left out. Records (see
+:mod:`ipernity.records`) can be exported, too, and keep their types.
+
+Supported formats:
+
+``csv``
+    Comma-separated values, with the column names in the first line.
+``parquet``
+    `Apache Parquet <https://parquet.apache.org/>`_, one row group per batch.
+``arrow``
+    Arrow IPC file format (also known as Feather V2).
+
+Parquet and Arrow need `pyarrow <https://pypi.org/project/pyarrow/>`_, which
+can be installed with the extra ``export``.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from itertools import islice
+from logging import getLogger
+from typing import Any, Iterable, Iterator, Mapping, TYPE_CHECKING
+
+from .records import Record
+
+if TYPE_CHECKING:
+    import pyarrow
+
+log = getLogger(__name__)
+
+#: File name extensions of the formats
+extensions = {
+    '.csv':     'csv',
+    '.parquet': 'parquet',
+    '.arrow':   'arrow',
+    '.feather': 'arrow',
+    '.ipc':     'arrow',
+}
+
+
+def flatten(elem: Mapping[str, Any] | Record, prefix: str = '') -> dict[str, Any]:
+    """Flattens nested objects, joining the keys with dots."""
+    if isinstance(elem, Record):
+        return elem.as_dict()
+    result = {}
+    for key, value in elem.items():
+        if isinstance(value, Mapping):
+            result.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, list):
+            result[prefix + key] = json.dumps(value, ensure_ascii = False)
+        else:
+            result[prefix + key] = value
+    return result
+
+
+def batches(
+    elements: Iterable[Mapping[str, Any] | Record],
+    batch_size: int = 1000,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yields lists of up to ``batch_size`` flattened elements."""
+    elements = iter(elements)
+    while True:
+        batch = [flatten(elem) for elem in islice(elements, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _columns(batch: list[dict[str, Any]]) -> list[str]:
+    """Returns the keys of a batch in order of appearance."""
+    columns = {}
+    for row in batch:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def export_csv(
+    elements: Iterable[Mapping[str, Any] | Record],
+    path: str,
+    batch_size: int = 1000,
+    columns: list[str] | None = None,
+) -> int:
+    """
+    Writes elements to a CSV file.
+    
+    Args:
+        elements:   The elements, e.g. a walk.
+        path:       Name of the file.
+        batch_size: Number of elements per batch.
+        columns:    The columns, default is the columns of the first batch.
+    
+    Returns:
+        The number of written elements.
+    """
+    count = 0
+    with open(path, 'w', newline = '', encoding = 'utf-8') as f:
+        writer = None
+        for batch in batches(elements, batch_size):
+            if writer is None:
+                writer = csv.DictWriter(
+                    f,
+                    columns or _columns(batch),
+                    extrasaction = 'ignore'
+                )
+                writer.writeheader()
+            writer.writerows(batch)
+            count += len(batch)
+    log.debug('Wrote %d rows to %s', count, path)
+    return count
+
+
+def _arrow_schema(batch: list[dict[str, Any]], columns: list[str] | None) -> pyarrow.Schema:
+    import pyarrow as pa
+    
+    columns = columns or _columns(batch)
+    schema = pa.Table.from_pylist([{c: row.get(c) for c in columns} for row in batch]).schema
+    # Columns without values in the first batch are assumed to be strings
+    return pa.schema([
+        field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ])
+
+
+def _export_arrow(
+    elements: Iterable[Mapping[str, Any] | Record],
+    path: str,
+    fmt: str,
+    batch_size: int,
+    columns: list[str] | None,
+) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+    except ImportError:                                     # pragma: no cover
+        raise ImportError(f'Exporting to {fmt} requires pyarrow') from None
+    
+    count = 0
+    writer = None
+    try:
+        for batch in batches(elements, batch_size):
+            if writer is None:
+                schema = _arrow_schema(batch, columns)
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(path, schema)
+                else:
+                    writer = pa.ipc.new_file(path, schema)
+            table = pa.Table.from_pylist(batch, schema = schema)
+            writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        log.warning('No elements, %s not written', path)
+    log.debug('Wrote %d rows to %s', count, path)
+    return count
+
+
+def export(
+    elements: Iterable[Mapping[str, Any] | Record],
+    path: str,
+    format: str | None = None,
+    batch_size: int = 1000,
+    columns: list[str] | None = None,
+) -> int:
+    """
+    Writes elements to a file.
+    
+    Args:
+        elements:   The elements, e.g. a walk.
+        path:       Name of the file.
+        format:     ``csv``, ``parquet`` or ``arrow``. Default is determined
+                    by the file name extension.
+        batch_size: Number of elements per batch.
+        columns:    The columns (flattened names like ``dates.created``).
+                    Default is the columns of the first batch.
+    
+    Returns:
+        The number of written elements.
+    """
+    if format is None:
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            format = extensions[ext]
+        except KeyError:
+            raise ValueError(f'Unknown export format for {path}') from None
+    if format == 'csv':
+        return export_csv(elements, path, batch_size, columns)
+    if format in ('parquet', 'arrow'):
+        return _export_arrow(elements, path, format, batch_size, columns)
+    raise ValueError(f'Unknown export format {format}')
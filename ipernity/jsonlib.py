@@ -0,0 +1,107 @@
+"""
+JSON Backends
+===============
+
+API responses are decoded by a :class:`JSONBackend`. The standard library's
+:mod:`json` module always works, but `orjson <https://pypi.org/project/orjson/>`_
+and `ujson <https://pypi.org/project/ujson/>`_ decode large responses several
+times faster. If one of them is installed, it is used automatically (orjson is
+preferred). A backend can also be selected by name:
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    
+    api = IpernityAPI(key, secret, token, json_backend = 'json')
+
+The fast backends can be installed with the ``fastjson`` extra, e.g.
+``pip install PyIpernity[fastjson]``. A comparison of the backends is found
+in ``benchmarks/json_decode.py``.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:                                         # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:                                         # pragma: no cover
+    ujson = None
+
+
+class JSONBackend:
+    """
+    Functions for decoding and encoding JSON.
+    
+    Args:
+        name:   Name of the backend.
+        loads:  Decodes JSON data, given as :class:`bytes` or :class:`str`.
+        dumps:  Encodes an object to a :class:`str`, takes an optional
+                ``indent`` argument.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[bytes | str], Any],
+        dumps: Callable[..., str],
+    ):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+    
+    def __repr__(self) -> str:
+        return f'<JSONBackend {self.name}>'
+
+
+def _orjson_dumps(obj: Any, indent: int | None = None) -> str:
+    # orjson only supports an indentation of 2 spaces
+    option = orjson.OPT_INDENT_2 if indent else 0
+    return orjson.dumps(obj, option = option).decode('utf-8')
+
+
+def _ujson_dumps(obj: Any, indent: int | None = None) -> str:
+    return ujson.dumps(obj, indent = indent or 0, ensure_ascii = False)
+
+
+def _json_dumps(obj: Any, indent: int | None = None) -> str:
+    return json.dumps(obj, indent = indent, ensure_ascii = False)
+
+
+#: Available backends, in order of preference
+backends: dict[str, JSONBackend] = {}
+if orjson is not None:
+    backends['orjson'] = JSONBackend('orjson', orjson.loads, _orjson_dumps)
+if ujson is not None:
+    backends['ujson'] = JSONBackend('ujson', ujson.loads, _ujson_dumps)
+backends['json'] = JSONBackend('json', json.loads, _json_dumps)
+
+
+def get_backend(backend: str | JSONBackend | None = None) -> JSONBackend:
+    """
+    Returns a JSON backend.
+    
+    Args:
+        backend:    Name of the backend (``orjson``, ``ujson`` or ``json``),
+                    or a :class:`JSONBackend`, which is returned unchanged.
+                    ``None`` selects the fastest available backend.
+    
+    Raises:
+        ValueError: The backend is not installed.
+    """
+    if isinstance(backend, JSONBackend):
+        return backend
+    if backend is None:
+        return next(iter(backends.values()))
+    try:
+        return backends[backend]
+    except KeyError:
+        raise ValueError(f'JSON backend {backend} is not available') from None
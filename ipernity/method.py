@@ -33,7 +33,9 @@ class IpernityMethod:
         if name.startswith('_'):
             raise AttributeError(f'Attribute {name} not found')
         
-        return IpernityMethod(self._api, f'{self._name}.{name}')
+        # Cache the object, __getattr__ is not called again for the name
+        method = self.__dict__[name] = IpernityMethod(self._api, f'{self._name}.{name}')
+        return method
     
     def __call__(self, **kwargs: api_arg) -> Any:
         """Actually calls the method."""
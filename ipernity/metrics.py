@@ -0,0 +1,331 @@
+"""
+Metrics
+=========
+
+A :class:`MetricsRegistry` counts the API calls and HTTP requests of an API
+object per method: number of calls, errors, cache hits, latency, bytes sent
+and received, and calls in progress.
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.metrics import MetricsRegistry
+    
+    metrics = MetricsRegistry()
+    api = IpernityAPI(key, secret, token, metrics = metrics)
+    ...
+    print(metrics.snapshot()['doc.getList'])
+    print(metrics.prometheus())
+
+Calls are counted in :meth:`~ipernity.api.IpernityAPI.call`, including calls
+answered from the response cache, and HTTP requests in
+:meth:`~ipernity.auth.AuthHandler.do_request`, including retries. The
+duration of a call includes waiting for the rate limiter and retries. Pages
+fetched by ``walk_data(stream = True)`` are only counted as requests.
+
+:meth:`MetricsRegistry.prometheus` returns the metrics in the `Prometheus
+text format <https://prometheus.io/docs/instrumenting/exposition_formats/>`_,
+e.g. for serving them on a ``/metrics`` endpoint:
+
+=========================================== ===================================
+``ipernity_calls_total``                    Calls by ``method`` and ``outcome``
+                                            (``ok``, ``error`` or ``cached``)
+``ipernity_call_errors_total``              Failed calls by ``method``,
+                                            ``status`` and ``code`` of the
+                                            :class:`~ipernity.exceptions.APIRequestError`
+``ipernity_call_duration_seconds``          Histogram of call durations
+``ipernity_calls_in_progress``              Calls in progress
+``ipernity_requests_total``                 HTTP requests by ``method`` and
+                                            HTTP ``status`` (0 for network
+                                            errors)
+``ipernity_request_duration_seconds``       Histogram of request durations
+``ipernity_requests_in_progress``           Requests in progress
+``ipernity_request_bytes_total``            Bytes sent (query string and body)
+``ipernity_response_bytes_total``           Bytes received (response body)
+=========================================== ===================================
+
+The registry is thread-safe and can be shared by several API objects.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+from typing import Any, Iterator, Mapping, Sequence
+from urllib.parse import urlsplit
+
+from .exceptions import APIRequestError
+
+#: Default upper bounds of the histogram buckets in seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Distribution of values in buckets"""
+    
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+    
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        """Adds a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Returns the upper bounds and cumulative counts, ending with infinity."""
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+    
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'count':    self.count,
+            'sum':      self.sum,
+            'buckets':  dict(self.cumulative()),
+        }
+
+
+class MethodStats:
+    """Metrics of one API method"""
+    
+    def __init__(self, buckets: Sequence[float]):
+        #: Calls by outcome (``ok``, ``error``, ``cached``)
+        self.calls = {}
+        #: Failed calls by (status, code)
+        self.errors = {}
+        self.call_duration = Histogram(buckets)
+        self.calls_in_progress = 0
+        #: Requests by HTTP status
+        self.requests = {}
+        self.request_duration = Histogram(buckets)
+        self.requests_in_progress = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+    
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'calls':                dict(self.calls),
+            'errors':               {f'{s}/{c}': n for (s, c), n in self.errors.items()},
+            'call_duration':        self.call_duration.as_dict(),
+            'calls_in_progress':    self.calls_in_progress,
+            'requests':             dict(self.requests),
+            'request_duration':     self.request_duration.as_dict(),
+            'requests_in_progress': self.requests_in_progress,
+            'request_bytes':        self.request_bytes,
+            'response_bytes':       self.response_bytes,
+        }
+
+
+class RequestInfo:
+    """Collects the data of an HTTP request for :meth:`MetricsRegistry.track_request`"""
+    
+    __slots__ = ('status', 'sent', 'received')
+    
+    def __init__(self):
+        self.status = 0
+        self.sent = 0
+        self.received = 0
+    
+    def set_response(
+        self,
+        url: str,
+        request_headers: Mapping[str, str],
+        status: int,
+        response_headers: Mapping[str, str],
+        content: bytes | None = None,
+    ):
+        """
+        Sets the data from a request and its response.
+        
+        Args:
+            url:                The request URL, including the query string.
+            request_headers:    Headers of the request.
+            status:             HTTP status of the response.
+            response_headers:   Headers of the response.
+            content:            The response body, if it has been read.
+        """
+        self.status = status
+        self.sent = len(urlsplit(str(url)).query) + int(request_headers.get('Content-Length', 0))
+        length = response_headers.get('Content-Length')
+        if length is not None:
+            self.received = int(length)
+        elif content is not None:
+            self.received = len(content)
+
+
+class MetricsRegistry:
+    """
+    Metrics of API calls and requests.
+    
+    Args:
+        buckets:    Upper bounds of the latency histogram buckets in seconds.
+        prefix:     Prefix of the metric names in :meth:`prometheus`.
+    """
+    
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        prefix: str = 'ipernity',
+    ):
+        self._buckets = tuple(sorted(buckets))
+        self._prefix = prefix
+        self._lock = Lock()
+        self._methods = {}
+    
+    def _stats(self, method_name: str) -> MethodStats:
+        # Called with the lock held
+        try:
+            return self._methods[method_name]
+        except KeyError:
+            stats = self._methods[method_name] = MethodStats(self._buckets)
+            return stats
+    
+    @contextmanager
+    def track_call(self, method_name: str) -> Iterator[None]:
+        """Context manager measuring an API call."""
+        with self._lock:
+            self._stats(method_name).calls_in_progress += 1
+        start = monotonic()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = monotonic() - start
+            with self._lock:
+                stats = self._stats(method_name)
+                stats.calls_in_progress -= 1
+                stats.call_duration.observe(duration)
+                outcome = 'ok' if error is None else 'error'
+                stats.calls[outcome] = stats.calls.get(outcome, 0) + 1
+                if isinstance(error, APIRequestError):
+                    key = (error.status, error.code)
+                    stats.errors[key] = stats.errors.get(key, 0) + 1
+    
+    def count_cached(self, method_name: str):
+        """Counts a call answered from the response cache."""
+        with self._lock:
+            stats = self._stats(method_name)
+            stats.calls['cached'] = stats.calls.get('cached', 0) + 1
+    
+    @contextmanager
+    def track_request(self, method_name: str) -> Iterator[RequestInfo]:
+        """
+        Context manager measuring an HTTP request.
+        
+        The caller sets the data of the response in the returned
+        :class:`RequestInfo`. Requests raising an exception are counted with
+        status 0.
+        """
+        with self._lock:
+            self._stats(method_name).requests_in_progress += 1
+        info = RequestInfo()
+        start = monotonic()
+        try:
+            yield info
+        except BaseException:
+            info.status = 0
+            raise
+        finally:
+            duration = monotonic() - start
+            with self._lock:
+                stats = self._stats(method_name)
+                stats.requests_in_progress -= 1
+                stats.request_duration.observe(duration)
+                stats.requests[info.status] = stats.requests.get(info.status, 0) + 1
+                stats.request_bytes += info.sent
+                stats.response_bytes += info.received
+    
+    def reset(self):
+        """Removes all metrics."""
+        with self._lock:
+            self._methods.clear()
+    
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Returns the metrics by method name, see :class:`MethodStats`."""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._methods.items())}
+    
+    def prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text format."""
+        snapshot = self.snapshot()
+        p = self._prefix
+        lines = []
+        
+        def family(name: str, type_: str, help_: str):
+            lines.append(f'# HELP {p}_{name} {help_}')
+            lines.append(f'# TYPE {p}_{name} {type_}')
+        
+        def sample(name: str, labels: Mapping[str, Any], value: Any):
+            label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f'{p}_{name}{{{label_str}}} {_format(value)}')
+        
+        def histogram(name: str, key: str, help_: str):
+            family(name, 'histogram', help_)
+            for method, stats in snapshot.items():
+                hist = stats[key]
+                if not hist['count']:
+                    continue
+                for bound, count in hist['buckets'].items():
+                    sample(f'{name}_bucket', {'method': method, 'le': bound}, count)
+                sample(f'{name}_sum', {'method': method}, hist['sum'])
+                sample(f'{name}_count', {'method': method}, hist['count'])
+        
+        family('calls_total', 'counter', 'API calls')
+        for method, stats in snapshot.items():
+            for outcome, count in sorted(stats['calls'].items()):
+                sample('calls_total', {'method': method, 'outcome': outcome}, count)
+        family('call_errors_total', 'counter', 'Failed API calls')
+        for method, stats in snapshot.items():
+            for key, count in sorted(stats['errors'].items()):
+                status, code = key.split('/', 1)
+                sample('call_errors_total', {'method': method, 'status': status, 'code': code}, count)
+        histogram('call_duration_seconds', 'call_duration', 'Duration of API calls')
+        family('calls_in_progress', 'gauge', 'API calls in progress')
+        for method, stats in snapshot.items():
+            sample('calls_in_progress', {'method': method}, stats['calls_in_progress'])
+        family('requests_total', 'counter', 'HTTP requests')
+        for method, stats in snapshot.items():
+            for status, count in sorted(stats['requests'].items()):
+                sample('requests_total', {'method': method, 'status': status}, count)
+        histogram('request_duration_seconds', 'request_duration', 'Duration of HTTP requests')
+        family('requests_in_progress', 'gauge', 'HTTP requests in progress')
+        for method, stats in snapshot.items():
+            sample('requests_in_progress', {'method': method}, stats['requests_in_progress'])
+        family('request_bytes_total', 'counter', 'Bytes sent')
+        for method, stats in snapshot.items():
+            sample('request_bytes_total', {'method': method}, stats['request_bytes'])
+        family('response_bytes_total', 'counter', 'Bytes received')
+        for method, stats in snapshot.items():
+            sample('response_bytes_total', {'method': method}, stats['response_bytes'])
+        
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: Any) -> str:
+    if isinstance(value, float):
+        return _format(value)
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
@@ -0,0 +1,449 @@
+"""
+Local Account Mirror
+======================
+
+A :class:`Mirror` keeps a copy of the metadata of an Ipernity account in an
+SQLite database: documents, albums, folders, the documents of each album and
+the albums of each folder. The first :meth:`~Mirror.sync` fetches everything,
+later calls only fetch what changed:
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.mirror import Mirror
+    
+    api = IpernityAPI(key, secret, token)
+    with Mirror(api, 'account.db') as mirror:
+        mirror.sync()
+        for doc in mirror.album_docs(album_id):
+            print(doc['title'])
+
+An incremental sync
+
+*   fetches the documents updated since the last sync with :iper:`doc.search`
+    (``updated_min``) and stores those whose data changed (if the API
+    ignores ``updated_min``, the result is the same, only slower),
+*   removes deleted documents, if the number of documents on Ipernity differs
+    from the mirror (this needs a listing of all document IDs), and
+*   fetches the lists of albums and folders, and the contents of the albums
+    and folders whose data (like the number of documents or the update time)
+    has changed.
+
+The data is stored as returned by the API, in JSON columns. Besides the
+query methods of :class:`Mirror`, the database can be read with SQL, e.g.
+``SELECT json_extract(data, '$.title') FROM docs``. Tables:
+
+=================== ==========================================================
+``docs``            ``doc_id``, ``last_update``, ``data``
+``albums``          ``album_id``, ``data``
+``folders``         ``folder_id``, ``data``
+``album_docs``      ``album_id``, ``doc_id``, ``position``
+``folder_albums``   ``folder_id``, ``album_id``, ``position``
+=================== ==========================================================
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from logging import getLogger
+from time import time
+from typing import Any, Callable, Iterable, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import IpernityAPI
+
+log = getLogger(__name__)
+
+
+class Mirror:
+    """
+    Local copy of the metadata of an Ipernity account.
+    
+    The mirror uses one database connection and must only be used by one
+    thread at a time. The API calls of :meth:`sync` are made concurrently,
+    though.
+    
+    Args:
+        api:        The API object.
+        path:       Name of the database file.
+        user_id:    The account to mirror, defaults to the user of the API
+                    token.
+        extra:      ``extra`` argument for the document lists, ``dates`` is
+                    always added.
+        workers:    Number of concurrent API calls for fetching the contents
+                    of albums and folders.
+        margin:     Overlap in seconds of incremental syncs, to allow for
+                    clock differences.
+    """
+    
+    _schema = """
+        CREATE TABLE IF NOT EXISTS docs (
+            doc_id      TEXT PRIMARY KEY,
+            last_update INTEGER,
+            data        TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS albums (
+            album_id    TEXT PRIMARY KEY,
+            data        TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS folders (
+            folder_id   TEXT PRIMARY KEY,
+            data        TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS album_docs (
+            album_id    TEXT NOT NULL,
+            doc_id      TEXT NOT NULL,
+            position    INTEGER NOT NULL,
+            PRIMARY KEY (album_id, doc_id)
+        );
+        CREATE INDEX IF NOT EXISTS album_docs_doc ON album_docs (doc_id);
+        CREATE TABLE IF NOT EXISTS folder_albums (
+            folder_id   TEXT NOT NULL,
+            album_id    TEXT NOT NULL,
+            position    INTEGER NOT NULL,
+            PRIMARY KEY (folder_id, album_id)
+        );
+        CREATE INDEX IF NOT EXISTS folder_albums_album ON folder_albums (album_id);
+        CREATE TABLE IF NOT EXISTS state (
+            name        TEXT PRIMARY KEY,
+            value       TEXT NOT NULL
+        );
+    """
+    
+    def __init__(
+        self,
+        api: IpernityAPI,
+        path: str,
+        user_id: str | None = None,
+        extra: str = 'dates',
+        workers: int = 4,
+        margin: float = 300,
+    ):
+        self._api = api
+        self._path = path
+        self._user_id = user_id
+        extras = [e for e in extra.split(',') if e]
+        if 'dates' not in extras:
+            extras.append('dates')
+        self._extra = ','.join(extras)
+        self._workers = workers
+        self._margin = margin
+        log.debug('Opening mirror database %s', path)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        with self._conn:
+            self._conn.executescript(self._schema)
+    
+    def __enter__(self) -> Mirror:
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Closes the database."""
+        self._conn.close()
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The database connection, for custom queries"""
+        return self._conn
+    
+    @property
+    def last_sync(self) -> float | None:
+        """Start time of the last successful :meth:`sync` (Unix time)"""
+        value = self._state('last_sync')
+        return float(value) if value is not None else None
+    
+    @property
+    def user_id(self) -> str:
+        """The mirrored account"""
+        if self._user_id is None:
+            self._user_id = self._state('user_id')
+        if self._user_id is None:
+            if self._api.user_info is not None:
+                self._user_id = self._api.user_info['user_id']
+            else:
+                self._user_id = self._api.user.get()['user']['user_id']
+        return self._user_id
+    
+    def _state(self, name: str) -> str | None:
+        row = self._conn.execute(
+            'SELECT value FROM state WHERE name = ?',
+            (name,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _set_state(self, name: str, value: Any):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)',
+            (name, str(value))
+        )
+    
+    def sync(self, full: bool = False) -> dict[str, int]:
+        """
+        Updates the mirror.
+        
+        Args:
+            full:   Fetch everything, including the contents of all albums and
+                    folders, even if the mirror was synced before. This is
+                    done automatically on the first sync.
+        
+        Returns:
+            The number of added or changed ``docs``, ``albums`` and
+            ``folders``, and of ``deleted`` objects.
+        """
+        start = time()
+        last_sync = None if full else self.last_sync
+        stats = {'docs': 0, 'albums': 0, 'folders': 0, 'deleted': 0}
+        with self._conn:
+            self._set_state('user_id', self.user_id)
+        
+        self._sync_docs(last_sync, stats)
+        changed_albums = self._sync_list(
+            'albums',
+            'album_id',
+            self._api.walk_albums(user_id = self.user_id, per_page = 100),
+            stats,
+            last_sync is None
+        )
+        self._sync_members(
+            'albums',
+            'album_docs',
+            'album_id',
+            'doc_id',
+            changed_albums,
+            lambda album_id: self._api.walk_album_docs(album_id, per_page = 100)
+        )
+        changed_folders = self._sync_list(
+            'folders',
+            'folder_id',
+            self._api.walk_folders(user_id = self.user_id, per_page = 100),
+            stats,
+            last_sync is None
+        )
+        self._sync_members(
+            'folders',
+            'folder_albums',
+            'folder_id',
+            'album_id',
+            changed_folders,
+            lambda folder_id: self._api.walk_folder_albums(folder_id, per_page = 100)
+        )
+        
+        with self._conn:
+            self._set_state('last_sync', start)
+        log.info('Mirror sync finished in %.1fs: %s', time() - start, stats)
+        return stats
+    
+    def _sync_docs(self, last_sync: float | None, stats: dict[str, int]):
+        if last_sync is None:
+            log.debug('Fetching all documents')
+            docs = self._api.walk_docs(
+                user_id = self.user_id,
+                extra = self._extra,
+                per_page = 100,
+                prefetch = self._workers
+            )
+            with self._conn:
+                self._conn.execute('DELETE FROM docs')
+                stats['docs'] += self._store_docs(docs)
+            return
+        
+        since = int(last_sync - self._margin)
+        log.debug('Fetching documents updated since %d', since)
+        docs = self._api.walk_doc_search(
+            user_id = self.user_id,
+            updated_min = since,
+            extra = self._extra,
+            per_page = 100
+        )
+        with self._conn:
+            stats['docs'] += self._store_docs(docs)
+        
+        # Deleted documents don't show up in the search
+        total = int(self._api.doc.getList(user_id = self.user_id, per_page = 1)['docs']['total'])
+        local = self._conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+        if total != local:
+            log.debug('%d documents on Ipernity, %d in mirror, checking IDs', total, local)
+            ids = {
+                doc['doc_id']
+                for doc in self._api.walk_docs(
+                    user_id = self.user_id,
+                    per_page = 100,
+                    prefetch = self._workers
+                )
+            }
+            with self._conn:
+                stats['deleted'] += self._delete_missing('docs', 'doc_id', ids)
+    
+    def _store_docs(self, docs: Iterable[dict]) -> int:
+        """Stores changed documents, returns their number."""
+        changed = 0
+        for doc in docs:
+            last_update = _last_update(doc)
+            row = self._conn.execute(
+                'SELECT last_update, data FROM docs WHERE doc_id = ?',
+                (doc['doc_id'],)
+            ).fetchone()
+            data = json.dumps(doc, sort_keys = True)
+            if row is not None and row[1] == data:
+                continue
+            self._conn.execute(
+                'INSERT OR REPLACE INTO docs (doc_id, last_update, data) VALUES (?, ?, ?)',
+                (doc['doc_id'], last_update, data)
+            )
+            changed += 1
+        return changed
+    
+    def _sync_list(
+        self,
+        table: str,
+        id_column: str,
+        objects: Iterable[dict],
+        stats: dict[str, int],
+        full: bool = False,
+    ) -> dict[str, str]:
+        """
+        Deletes the removed albums or folders and finds the changed ones.
+        
+        The rows of changed objects are not written here, but by
+        :meth:`_sync_members` together with their contents. If fetching the
+        contents fails, the stored data stays unchanged, so the object is
+        fetched again on the next sync.
+        
+        Returns:
+            The data of the new or changed objects (all objects if ``full``)
+            by ID, as JSON.
+        """
+        changed = {}
+        ids = set()
+        for obj in objects:
+            id_ = obj[id_column]
+            ids.add(id_)
+            data = json.dumps(obj, sort_keys = True)
+            row = self._conn.execute(
+                f'SELECT data FROM {table} WHERE {id_column} = ?',
+                (id_,)
+            ).fetchone()
+            if row is None or row[0] != data:
+                stats[table] += 1
+            elif not full:
+                continue
+            changed[id_] = data
+        with self._conn:
+            stats['deleted'] += self._delete_missing(table, id_column, ids)
+        return changed
+    
+    def _delete_missing(self, table: str, id_column: str, ids: set[str]) -> int:
+        """Deletes the rows whose ID is not in ``ids``."""
+        stored = {
+            row[0]
+            for row in self._conn.execute(f'SELECT {id_column} FROM {table}')
+        }
+        deleted = stored - ids
+        for id_ in deleted:
+            self._conn.execute(f'DELETE FROM {table} WHERE {id_column} = ?', (id_,))
+            if table == 'albums':
+                self._conn.execute('DELETE FROM album_docs WHERE album_id = ?', (id_,))
+            elif table == 'folders':
+                self._conn.execute('DELETE FROM folder_albums WHERE folder_id = ?', (id_,))
+        return len(deleted)
+    
+    def _sync_members(
+        self,
+        parent_table: str,
+        table: str,
+        parent_column: str,
+        child_column: str,
+        parents: dict[str, str],
+        walk: Callable[[str], Iterable[dict]],
+    ):
+        """
+        Fetches the contents of changed albums or folders.
+        
+        Each object is stored with its contents in one transaction.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        if not parents:
+            return
+        log.debug('Fetching %s of %d objects', table, len(parents))
+        with ThreadPoolExecutor(
+            max_workers = self._workers,
+            thread_name_prefix = 'ipernity-mirror'
+        ) as executor:
+            members = executor.map(
+                lambda parent: [m[child_column] for m in walk(parent)],
+                parents
+            )
+            for parent, children in zip(parents, members):
+                with self._conn:
+                    self._conn.execute(
+                        f'INSERT OR REPLACE INTO {parent_table} ({parent_column}, data) VALUES (?, ?)',
+                        (parent, parents[parent])
+                    )
+                    self._conn.execute(
+                        f'DELETE FROM {table} WHERE {parent_column} = ?',
+                        (parent,)
+                    )
+                    self._conn.executemany(
+                        f'INSERT OR IGNORE INTO {table} ({parent_column}, {child_column}, position) '
+                        'VALUES (?, ?, ?)',
+                        [(parent, child, i) for i, child in enumerate(children)]
+                    )
+    
+    def _query(self, sql: str, args: tuple = ()) -> Iterator[dict]:
+        for row in self._conn.execute(sql, args):
+            yield json.loads(row[0])
+    
+    def doc(self, doc_id: str) -> dict | None:
+        """Returns a document, ``None`` if it is not in the mirror."""
+        return next(self._query('SELECT data FROM docs WHERE doc_id = ?', (str(doc_id),)), None)
+    
+    def docs(self) -> Iterator[dict]:
+        """Iterates over all documents."""
+        return self._query('SELECT data FROM docs ORDER BY CAST(doc_id AS INTEGER)')
+    
+    def albums(self) -> Iterator[dict]:
+        """Iterates over all albums."""
+        return self._query('SELECT data FROM albums ORDER BY CAST(album_id AS INTEGER)')
+    
+    def folders(self) -> Iterator[dict]:
+        """Iterates over all folders."""
+        return self._query('SELECT data FROM folders ORDER BY CAST(folder_id AS INTEGER)')
+    
+    def album_docs(self, album_id: str) -> Iterator[dict]:
+        """Iterates over the documents of an album, in album order."""
+        return self._query(
+            'SELECT d.data FROM album_docs a JOIN docs d USING (doc_id) '
+            'WHERE a.album_id = ? ORDER BY a.position',
+            (str(album_id),)
+        )
+    
+    def folder_albums(self, folder_id: str) -> Iterator[dict]:
+        """Iterates over the albums of a folder, in folder order."""
+        return self._query(
+            'SELECT a.data FROM folder_albums f JOIN albums a USING (album_id) '
+            'WHERE f.folder_id = ? ORDER BY f.position',
+            (str(folder_id),)
+        )
+    
+    def doc_albums(self, doc_id: str) -> Iterator[dict]:
+        """Iterates over the albums containing a document."""
+        return self._query(
+            'SELECT a.data FROM album_docs d JOIN albums a USING (album_id) '
+            'WHERE d.doc_id = ? ORDER BY CAST(a.album_id AS INTEGER)',
+            (str(doc_id),)
+        )
+
+
+def _last_update(doc: dict) -> int | None:
+    """Returns the last update time of a document, if included."""
+    try:
+        return int(doc['dates']['last_update'])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,195 @@
+"""
+Streaming Uploads
+===================
+
+:class:`MultipartEncoder` creates the ``multipart/form-data`` body for
+:iper:`upload.file` and :iper:`upload.replace` while it is sent, so the
+memory usage does not depend on the file size. It is used automatically for
+the ``file`` argument of these methods, which can be
+
+*   the name of a file,
+*   a binary file object (reading starts at its current position),
+*   a :class:`bytes`-like object, including :class:`mmap.mmap`, or
+*   a tuple ``(filename, data)``, where ``data`` is one of the above. This
+    sets the file name sent to Ipernity, which is otherwise taken from the
+    file (or ``file`` for data without name).
+
+The ``progress`` argument of these methods is an optional callback, which is
+called as ``progress(sent, total, elapsed)`` after each chunk of the file:
+``sent`` is the number of bytes sent so far, ``total`` is the file size
+(``None`` if it is unknown), and ``elapsed`` is the time since the start of
+the upload in seconds. The ``progress`` argument is not sent to Ipernity.
+
+.. code-block:: python
+    
+    def progress(sent, total, elapsed):
+        print(f'{sent} of {total} bytes, {sent / elapsed / 1e6:.1f} MB/s')
+    
+    with open('video.mp4', 'rb') as f:
+        api.upload.file(file = f, progress = progress)
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import os
+from time import monotonic
+from typing import (
+    Any, AsyncIterator, BinaryIO, Callable, Iterator, Mapping, Tuple, Union,
+    TYPE_CHECKING
+)
+from uuid import uuid4
+
+if TYPE_CHECKING:
+    from .api import api_arg
+    
+    file_data = Union[str, os.PathLike, BinaryIO, bytes, bytearray, memoryview]
+    file_arg = Union[file_data, Tuple[str, file_data]]
+    progress_callback = Callable[[int, Union[int, None], float], Any]
+
+
+class MultipartEncoder:
+    """
+    Iterable ``multipart/form-data`` body with form fields and one file.
+    
+    Args:
+        fields:     Form fields, sent before the file.
+        file_field: Name of the file field.
+        file:       The file, see above for the possible types.
+        progress:   Progress callback, see above.
+        chunk_size: Size of the chunks read from the file.
+    """
+    
+    def __init__(
+        self,
+        fields: Mapping[str, api_arg],
+        file_field: str,
+        file: file_arg,
+        progress: progress_callback | None = None,
+        chunk_size: int = 65536,
+    ):
+        self.boundary = uuid4().hex
+        self.progress = progress
+        self.chunk_size = chunk_size
+        
+        if isinstance(file, tuple):
+            filename, file = file
+        else:
+            filename = None
+        self._file = file
+        self._path = None
+        if isinstance(file, (str, os.PathLike)):
+            self._path = os.fspath(file)
+            self.file_size = os.path.getsize(self._path)
+            filename = filename or self._path
+        elif self._is_buffer(file):
+            with memoryview(file) as view:
+                self.file_size = view.nbytes
+        else:
+            self.file_size = self._remaining_size(file)
+            name = getattr(file, 'name', None)
+            filename = filename or (name if isinstance(name, str) else None)
+        filename = os.path.basename(filename or 'file')
+        
+        self._head = b''.join(
+            self._part_header(name) + str(value).encode('utf-8') + b'\r\n'
+            for name, value in fields.items()
+        )
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self._head += self._part_header(
+            file_field,
+            f'; filename="{self._quote(filename)}"\r\nContent-Type: {content_type}'
+        )
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('ascii')
+    
+    def _part_header(self, name: str, extra: str = '') -> bytes:
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{self._quote(name)}"{extra}\r\n\r\n'
+        ).encode('utf-8')
+    
+    @staticmethod
+    def _quote(value: str) -> str:
+        return value.replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+    
+    @staticmethod
+    def _is_buffer(data: Any) -> bool:
+        # mmap objects have a read method, too, but are used as buffers
+        try:
+            memoryview(data).release()
+        except TypeError:
+            return False
+        return True
+    
+    @staticmethod
+    def _remaining_size(f: BinaryIO) -> int | None:
+        """Returns the number of bytes from the position to the end of a file"""
+        try:
+            if not f.seekable():
+                return None
+            pos = f.tell()
+            end = f.seek(0, os.SEEK_END)
+            f.seek(pos)
+        except (AttributeError, OSError):
+            return None
+        return end - pos
+    
+    @property
+    def content_type(self) -> str:
+        """Value of the ``Content-Type`` header"""
+        return f'multipart/form-data; boundary={self.boundary}'
+    
+    @property
+    def length(self) -> int | None:
+        """Length of the body, ``None`` if the file size is unknown"""
+        if self.file_size is None:
+            return None
+        return len(self._head) + self.file_size + len(self._tail)
+    
+    @property
+    def len(self) -> int | None:
+        """Same as :attr:`length`, used by requests for ``Content-Length``"""
+        return self.length
+    
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        if self._path is not None:
+            with open(self._path, 'rb') as f:
+                yield from self._read_file(f)
+        elif self._is_buffer(self._file):
+            # Don't keep the view, an mmap cannot be closed while it exists
+            with memoryview(self._file) as view, view.cast('B') as buffer:
+                yield from self._read_buffer(buffer)
+        else:
+            yield from self._read_file(self._file)
+        yield self._tail
+    
+    async def aiter(self) -> AsyncIterator[bytes]:
+        """Returns the body as asynchronous iterator."""
+        # Reading a chunk from a local file is fast enough not to need a thread
+        for chunk in self:
+            yield chunk
+    
+    def _read_file(self, f: BinaryIO) -> Iterator[bytes]:
+        start = monotonic()
+        sent = 0
+        while True:
+            chunk = f.read(self.chunk_size)
+            if not chunk:
+                break
+            sent += len(chunk)
+            yield chunk
+            self._report(sent, start)
+    
+    def _read_buffer(self, buffer: memoryview) -> Iterator[bytes]:
+        start = monotonic()
+        for pos in range(0, buffer.nbytes, self.chunk_size):
+            chunk = buffer[pos:pos+self.chunk_size]
+            yield chunk.tobytes()
+            self._report(pos + chunk.nbytes, start)
+    
+    def _report(self, sent: int, start: float):
+        if self.progress is not None:
+            self.progress(sent, self.file_size, monotonic() - start)
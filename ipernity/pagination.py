@@ -0,0 +1,95 @@
+"""
+Pagination Descriptors
+========================
+
+:meth:`~ipernity.api.IpernityAPI.walk_data` needs to know where the elements
+are in the result of a list or search method, and how many elements can be
+fetched per call. This is described by a :class:`Pagination` for every
+paginated method in :data:`descriptors`. For example, the documents of
+:iper:`album.docs.getList` are returned as
+
+.. code-block:: json
+    
+    {"album": {"docs": {"page": "1", "pages": "3", "doc": [...]}}}
+
+which is described by ``Pagination(('album', 'docs'), 'doc', 100)``. The
+number of pages is taken from ``pages``, or calculated from ``total`` and
+``per_page`` if the result does not contain it.
+
+Methods that are not in :data:`descriptors` are described by guessing from
+the method name, as before. Descriptors for other methods can be added to
+:data:`descriptors`.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class Pagination(NamedTuple):
+    """Result structure of a paginated method"""
+    
+    #: Keys of the object containing the list, like ``('album', 'docs')``
+    list_keys: tuple
+    #: Key of the list of elements, like ``doc``
+    elem_key: str
+    #: Maximum ``per_page`` accepted by the method, ``None`` if unknown
+    max_per_page: int | None = None
+
+
+#: Page size limit of the Ipernity list methods
+MAX_PER_PAGE = 100
+
+#: Descriptors of the paginated methods
+descriptors = {
+    'album.docs.getList':       Pagination(('album', 'docs'), 'doc', MAX_PER_PAGE),
+    'album.getList':            Pagination(('albums',), 'album', MAX_PER_PAGE),
+    'doc.comments.getList':     Pagination(('doc', 'comments'), 'comment', MAX_PER_PAGE),
+    'doc.getList':              Pagination(('docs',), 'doc', MAX_PER_PAGE),
+    'doc.search':               Pagination(('docs',), 'doc', MAX_PER_PAGE),
+    'faves.albums.getList':     Pagination(('faves', 'albums'), 'album', MAX_PER_PAGE),
+    'faves.docs.getList':       Pagination(('faves', 'docs'), 'doc', MAX_PER_PAGE),
+    'folder.albums.getList':    Pagination(('folder', 'albums'), 'album', MAX_PER_PAGE),
+    'folder.getList':           Pagination(('folders',), 'folder', MAX_PER_PAGE),
+    'group.docs.getList':       Pagination(('group', 'docs'), 'doc', MAX_PER_PAGE),
+    'group.getList':            Pagination(('groups',), 'group', MAX_PER_PAGE),
+    'group.search':             Pagination(('groups',), 'group', MAX_PER_PAGE),
+    'network.getList':          Pagination(('networks',), 'network', MAX_PER_PAGE),
+    'post.comments.getList':    Pagination(('post', 'comments'), 'comment', MAX_PER_PAGE),
+    'post.getList':             Pagination(('posts',), 'post', MAX_PER_PAGE),
+    'post.search':              Pagination(('posts',), 'post', MAX_PER_PAGE),
+    'tags.docs.getList':        Pagination(('tags', 'docs'), 'doc', MAX_PER_PAGE),
+}
+
+
+def guess_pagination(method_name: str) -> Pagination:
+    """
+    Guesses the result structure from the method name.
+    
+    ``x.getList`` is assumed to return ``{"xs": {"x": [...]}}``, and
+    ``x.ys.getList`` to return ``{"x": {"ys": {"y": [...]}}}``.
+    """
+    mparts = method_name.split('.')
+    if len(mparts) == 2:
+        return Pagination((mparts[0] + 's',), mparts[0])
+    return Pagination(tuple(mparts[:-1]), mparts[-2][:-1])
+
+
+def get_pagination(method_name: str, elem_name: str | None = None) -> Pagination:
+    """
+    Returns the descriptor of a method.
+    
+    Args:
+        method_name:    The method.
+        elem_name:      Overrides the result keys, see
+                        :meth:`~ipernity.api.IpernityAPI.walk_data`.
+    """
+    pagination = descriptors.get(method_name) or guess_pagination(method_name)
+    if elem_name is None:
+        return pagination
+    if '.' in elem_name:
+        keys = elem_name.split('.')
+        return pagination._replace(list_keys = tuple(keys[:-1]), elem_key = keys[-1])
+    return pagination._replace(list_keys = (elem_name + 's',), elem_key = elem_name)
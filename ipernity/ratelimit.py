@@ -0,0 +1,276 @@
+"""
+Rate Limiting
+===============
+
+A :class:`RateLimiter` keeps the rate of API calls below a given limit. It
+uses the token bucket algorithm: Each call takes a token from a bucket that is
+refilled at a constant rate up to a maximum (the burst size). If the bucket is
+empty, the call waits until a token becomes available.
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.ratelimit import RateLimiter
+    
+    # 5 calls per second, uploads at most one every 2 seconds
+    limiter = RateLimiter(5, families = {'upload.*': 0.5})
+    api = IpernityAPI(key, secret, token, rate_limiter = limiter)
+
+The state of the buckets is kept by a :class:`BucketStore`. The default
+:class:`MemoryBucketStore` is shared by all threads using the same limiter.
+To share the limit between processes, use a :class:`FileBucketStore`:
+
+.. code-block:: python
+    
+    limiter = RateLimiter(5, store = FileBucketStore('/tmp/ipernity.limit'))
+
+Buckets are kept per API key, so API objects with different keys do not
+limit each other when sharing a limiter. Keys with a different quota can get
+their own rate:
+
+.. code-block:: python
+    
+    limiter = RateLimiter(5, keys = {partner_key: 20})
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from abc import ABC, abstractmethod
+from fnmatch import fnmatchcase
+from logging import getLogger
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Mapping, Tuple, Union, TYPE_CHECKING
+
+try:
+    import fcntl
+except ImportError:                                         # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+if TYPE_CHECKING:
+    rate_arg = Union[float, Tuple[float, float]]
+
+log = getLogger(__name__)
+
+
+class BucketStore(ABC):
+    """
+    Storage for token buckets
+    """
+    
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """
+        Takes a token from a bucket.
+        
+        The token is taken even if the bucket is empty, so the bucket can
+        become negative. Callers must wait for the returned time before doing
+        the limited operation.
+        
+        Args:
+            key:    Bucket identifier.
+            rate:   Number of tokens added per second.
+            burst:  Capacity of the bucket.
+        
+        Returns:
+            The number of seconds until the token is available.
+        """
+        pass
+    
+    @staticmethod
+    def _take(
+        state: tuple[float, float] | None,
+        now: float,
+        rate: float,
+        burst: float
+    ) -> tuple[tuple[float, float], float]:
+        """Computes the new bucket state and the wait time."""
+        if state is None:
+            tokens = burst
+        else:
+            tokens, last = state
+            tokens = min(burst, tokens + (now - last) * rate)
+        tokens -= 1
+        wait = -tokens / rate if tokens < 0 else 0.0
+        return (tokens, now), wait
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Keeps the buckets in memory.
+    
+    The store is thread-safe, but not shared between processes.
+    """
+    
+    def __init__(self):
+        self._buckets = {}
+        self._lock = Lock()
+    
+    def take(self, key: str, rate: float, burst: float) -> float:
+        with self._lock:
+            self._buckets[key], wait = self._take(
+                self._buckets.get(key),
+                monotonic(),
+                rate,
+                burst
+            )
+        return wait
+
+
+class FileBucketStore(BucketStore):
+    """
+    Keeps the buckets in a local file.
+    
+    All processes using the same file share the buckets. Access is serialized
+    by locking the file.
+    
+    Args:
+        path:   Name of the state file. It is created if it does not exist.
+    """
+    
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = Lock()
+    
+    @property
+    def path(self) -> str:
+        """Name of the state file"""
+        return self._path
+    
+    def take(self, key: str, rate: float, burst: float) -> float:
+        with self._lock:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+') as f:
+                self._lock_file(f)
+                try:
+                    try:
+                        buckets = json.loads(f.read() or '{}')
+                    except ValueError:
+                        log.warning('Invalid rate limit state in %s', self._path)
+                        buckets = {}
+                    state, wait = self._take(
+                        buckets.get(key),
+                        time(),
+                        rate,
+                        burst
+                    )
+                    buckets[key] = state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(buckets))
+                    f.flush()
+                finally:
+                    self._unlock_file(f)
+        return wait
+    
+    @staticmethod
+    def _lock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:                                               # pragma: no cover
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    
+    @staticmethod
+    def _unlock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:                                               # pragma: no cover
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter for API calls.
+    
+    Rates can be given as a number of calls per second, or as a tuple
+    ``(rate, burst)``, where ``burst`` is the number of calls that can be made
+    at once after a pause. If ``burst`` is not given, it is the same as
+    ``rate``, but at least 1.
+    
+    Args:
+        rate:       Rate for all API calls. ``None`` means that only the
+                    ``families`` are limited.
+        families:   Additional limits for groups of methods. The keys are
+                    method patterns like ``upload.*`` (see :mod:`fnmatch`),
+                    the values are rates. A call takes a token from the
+                    general bucket and from the bucket of the first matching
+                    family.
+        store:      Storage for the buckets, defaults to a new
+                    :class:`MemoryBucketStore`.
+        keys:       Rates for API keys that replace ``rate``. ``None`` as
+                    rate means that only the ``families`` are limited for
+                    that key.
+    """
+    
+    def __init__(
+        self,
+        rate: rate_arg | None = None,
+        families: Mapping[str, rate_arg] | None = None,
+        store: BucketStore | None = None,
+        keys: Mapping[str, rate_arg | None] | None = None,
+    ):
+        self._rate = self._parse_rate(rate) if rate is not None else None
+        self._keys = {
+            api_key: self._parse_rate(r) if r is not None else None
+            for api_key, r in (keys or {}).items()
+        }
+        self._families = [
+            (pattern, self._parse_rate(r))
+            for pattern, r in (families or {}).items()
+        ]
+        self._store = store or MemoryBucketStore()
+    
+    @staticmethod
+    def _parse_rate(rate: rate_arg) -> tuple[float, float]:
+        if isinstance(rate, tuple):
+            rate, burst = rate
+        else:
+            burst = max(rate, 1)
+        if rate <= 0 or burst < 1:
+            raise ValueError(f'Invalid rate {rate}, burst {burst}')
+        return float(rate), float(burst)
+    
+    @property
+    def store(self) -> BucketStore:
+        """The bucket store"""
+        return self._store
+    
+    def reserve(self, api_key: str, method_name: str) -> float:
+        """
+        Reserves a call.
+        
+        Returns:
+            The number of seconds the caller must wait before doing the call.
+        """
+        wait = 0.0
+        rate = self._keys.get(api_key, self._rate)
+        if rate is not None:
+            wait = self._store.take(api_key, *rate)
+        for pattern, rate in self._families:
+            if fnmatchcase(method_name, pattern):
+                wait = max(
+                    wait,
+                    self._store.take(f'{api_key}:{pattern}', *rate)
+                )
+                break
+        return wait
+    
+    def acquire(self, api_key: str, method_name: str) -> float:
+        """
+        Waits until a call is allowed.
+        
+        Returns:
+            The number of seconds waited.
+        """
+        wait = self.reserve(api_key, method_name)
+        if wait > 0:
+            log.debug('Rate limit: waiting %.3fs for %s', wait, method_name)
+            sleep(wait)
+        return wait
@@ -0,0 +1,223 @@
+"""
+Compact Records
+=================
+
+The ``walk_*`` methods normally yield the elements as returned by the API:
+nested ``dict`` objects with all values as strings. With the ``record``
+argument, they yield record objects instead, which hold only selected fields
+with converted values, like IDs and times as :class:`int`. Records use
+``__slots__``, so they need a fraction of the memory of the dicts, and the
+fields are accessed as attributes:
+
+.. code-block:: python
+    
+    from ipernity.records import Doc
+    
+    docs = list(api.walk_docs(extra = 'dates,count', record = Doc))
+    recent = [d for d in docs if d.last_update > since]
+
+:meth:`Record.project` creates a record type with fewer fields, which saves
+more memory:
+
+.. code-block:: python
+    
+    DocId = Doc.project('doc_id', 'title')
+    for doc in api.walk_album_docs(album_id, record = DocId):
+        print(doc.doc_id, doc.title)
+
+Fields that are missing in the data (e.g. because the ``extra`` argument did
+not include them) or that cannot be converted are ``None``. New record types
+are created with :func:`record_type`.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, Mapping, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Path in the data (like "dates.last_update") and conversion function
+    field_spec = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+def to_int(value: Any) -> int | None:
+    """Converts a value to :class:`int`, ``None`` for empty values."""
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def to_float(value: Any) -> float | None:
+    """Converts a value to :class:`float`, ``None`` for empty values."""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def to_bool(value: Any) -> bool | None:
+    """Converts ``"1"`` and ``"0"`` to :class:`bool`, ``None`` for empty values."""
+    if value is None or value == '':
+        return None
+    return value not in ('0', 0, False)
+
+
+class Record:
+    """
+    Base class of the record types.
+    
+    Record types are created with :func:`record_type`. They are constructed
+    with :meth:`from_data`, or with the field values as keyword arguments.
+    """
+    
+    __slots__ = ()
+    
+    #: Field names and (path keys, conversion function)
+    _fields: dict[str, tuple[tuple[str, ...], Callable[[Any], Any]]] = {}
+    _specs: dict[str, field_spec] = {}
+    _projections: dict[tuple[str, ...], type] = {}
+    
+    def __init__(self, **values: Any):
+        for name in self._fields:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f'Unknown fields for {type(self).__name__}: {", ".join(values)}')
+    
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> Record:
+        """Creates a record from an element returned by the API."""
+        obj = cls.__new__(cls)
+        for name, (path, convert) in cls._fields.items():
+            value = data
+            for key in path:
+                try:
+                    value = value[key]
+                except (KeyError, TypeError):
+                    value = None
+                    break
+            if value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    value = None
+            setattr(obj, name, value)
+        return obj
+    
+    @classmethod
+    def project(cls, *names: str) -> type:
+        """
+        Returns a record type with only the given fields.
+        
+        The types are cached, so projecting twice returns the same type.
+        """
+        try:
+            return cls._projections[names]
+        except KeyError:
+            unknown = set(names) - set(cls._fields)
+            if unknown:
+                raise ValueError(f'Unknown fields for {cls.__name__}: {", ".join(sorted(unknown))}')
+            projected = record_type(cls.__name__, {n: cls._specs[n] for n in names})
+            cls._projections[names] = projected
+            return projected
+    
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the fields as ``dict``."""
+        return {name: getattr(self, name) for name in self._fields}
+    
+    def __iter__(self) -> Iterator[Any]:
+        for name in self._fields:
+            yield getattr(self, name)
+    
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+    
+    def __hash__(self) -> int:
+        return hash((type(self), tuple(self)))
+    
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({values})'
+
+
+def record_type(name: str, fields: Mapping[str, field_spec]) -> type:
+    """
+    Creates a record type.
+    
+    Args:
+        name:   Name of the class.
+        fields: The fields of the records. The values are either the path
+                of the value in the data, with dots between nested keys
+                (like ``dates.last_update``), or a tuple of the path and a
+                function converting the value (like :func:`to_int`). Values
+                are kept as strings if there is no function.
+    """
+    parsed = {}
+    for field, spec in fields.items():
+        path, convert = spec if isinstance(spec, tuple) else (spec, str)
+        parsed[field] = (tuple(path.split('.')), convert)
+    return type(name, (Record,), {
+        '__slots__':    tuple(fields),
+        '_fields':      parsed,
+        '_specs':       dict(fields),
+        '_projections': {},
+    })
+
+
+#: Documents (:iper:`doc.getList`, :iper:`album.docs.getList`, ...)
+Doc = record_type('Doc', {
+    'doc_id':       ('doc_id', to_int),
+    'media':        'media',
+    'title':        'title',
+    'license':      ('license', to_int),
+    'owner_id':     ('owner.user_id', to_int),
+    'ispublic':     ('visibility.ispublic', to_bool),
+    'created':      ('dates.created', to_int),
+    'posted_at':    ('dates.posted_at', to_int),
+    'last_update':  ('dates.last_update', to_int),
+    'visits':       ('count.visits', to_int),
+    'faves':        ('count.faves', to_int),
+    'comments':     ('count.comments', to_int),
+    'lat':          ('geo.lat', to_float),
+    'lng':          ('geo.lng', to_float),
+})
+
+#: Albums (:iper:`album.getList`, :iper:`folder.albums.getList`, ...)
+Album = record_type('Album', {
+    'album_id':     ('album_id', to_int),
+    'title':        'title',
+    'description':  'description',
+    'owner_id':     ('owner.user_id', to_int),
+    'docs':         ('count.docs', to_int),
+    'created':      ('dates.created', to_int),
+    'last_update':  ('dates.last_update', to_int),
+})
+
+#: Folders (:iper:`folder.getList`)
+Folder = record_type('Folder', {
+    'folder_id':    ('folder_id', to_int),
+    'title':        'title',
+    'description':  'description',
+    'owner_id':     ('owner.user_id', to_int),
+    'albums':       ('count.albums', to_int),
+    'created':      ('dates.created', to_int),
+    'last_update':  ('dates.last_update', to_int),
+})
+
+#: Comments (:iper:`doc.comments.getList`, :iper:`post.comments.getList`)
+Comment = record_type('Comment', {
+    'comment_id':   ('comment_id', to_int),
+    'user_id':      ('user_id', to_int),
+    'username':     'username',
+    'content':      'content',
+    'posted_at':    ('posted_at', to_int),
+})
+
+#: Groups (:iper:`group.getList`, :iper:`group.search`)
+Group = record_type('Group', {
+    'group_id':     ('group_id', to_int),
+    'title':        'title',
+    'members':      ('count.members', to_int),
+    'docs':         ('count.docs', to_int),
+})
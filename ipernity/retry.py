@@ -0,0 +1,124 @@
+"""
+Retrying Failed Requests
+==========================
+
+A :class:`RetryPolicy` makes :class:`~ipernity.api.IpernityAPI` repeat API
+calls that failed for transient reasons, i.e. network errors and HTTP status
+codes like 502 or 503. Errors reported by Ipernity itself (like an unknown
+document) are not retried.
+
+Only read methods (methods that do not require HTTP POST according to
+:iper:`api.methods.getList`) are retried, as repeating a write operation that
+might have succeeded is not safe.
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.retry import RetryPolicy
+    
+    api = IpernityAPI(key, secret, token, retry = RetryPolicy(max_attempts = 5))
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from random import uniform
+from typing import Iterable
+
+log = getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff.
+    
+    The delay before retry number ``n`` is ``backoff * 2 ** (n - 1)``, but at
+    most ``max_backoff`` seconds. With ``jitter``, a random delay between 0
+    and this value is used, so that concurrent clients do not retry at the
+    same time. If the server sends a ``Retry-After`` header, the delay is at
+    least the requested time.
+    
+    Args:
+        max_attempts:   Maximum number of attempts, including the first one.
+        backoff:        Base delay in seconds.
+        max_backoff:    Maximum delay in seconds.
+        jitter:         Randomize the delay.
+        statuses:       HTTP status codes that are retried.
+        max_retry_after:    A ``Retry-After`` larger than this (in seconds) is
+                            not honoured, the call fails instead.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        max_retry_after: float = 300.0,
+    ):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.max_retry_after = max_retry_after
+    
+    def delay(
+        self,
+        attempt: int,
+        status: int | None = None,
+        retry_after: str | None = None,
+    ) -> float | None:
+        """
+        Determines if and when a failed request should be retried.
+        
+        Args:
+            attempt:        Number of the failed attempt, starting with 1.
+            status:         HTTP status code, ``None`` for network errors.
+            retry_after:    Value of the ``Retry-After`` response header.
+        
+        Returns:
+            The delay in seconds before the next attempt, or ``None`` if the
+            request should not be retried.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if status is not None and status not in self.statuses:
+            return None
+        
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = uniform(0, delay)
+        
+        if retry_after:
+            wait = self._parse_retry_after(retry_after)
+            if wait is not None:
+                if wait > self.max_retry_after:
+                    log.debug('Retry-After %s is too long', retry_after)
+                    return None
+                delay = max(delay, wait)
+        
+        return delay
+    
+    @staticmethod
+    def _parse_retry_after(value: str) -> float | None:
+        """Parses a ``Retry-After`` header (seconds or HTTP date)."""
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            log.debug('Invalid Retry-After %s', value)
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo = timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
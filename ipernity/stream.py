@@ -0,0 +1,201 @@
+"""
+Incremental JSON Parsing
+==========================
+
+:class:`ListStreamParser` parses an API response while it is received and
+returns the elements of the result list as soon as they are complete. This
+is used by :meth:`IpernityAPI.walk_data() <ipernity.api.IpernityAPI.walk_data>`
+with ``stream = True``.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import codecs
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, Iterator, Sequence
+
+
+# Returned by the parser when it needs more data
+_MORE = object()
+
+_whitespace = ' \t\r\n'
+_delimiters = ',]}' + _whitespace
+
+
+class ListStreamParser:
+    """
+    Incremental parser for a JSON object containing a list.
+    
+    The data is passed to the parser with :meth:`feed`, which returns the
+    list elements completed by the data. After the last chunk, :meth:`close`
+    must be called. Afterwards, :attr:`result` contains the parsed object
+    without the list elements.
+    
+    Args:
+        path:   Keys of the list in the JSON object, e.g.
+                ``['docs', 'doc']`` for the result of :iper:`doc.getList`.
+                If the data does not contain the path, the whole object is
+                parsed into :attr:`result`.
+    
+    Example:
+    
+    .. code-block:: python
+        
+        parser = ListStreamParser(['docs', 'doc'])
+        for chunk in chunks:
+            for doc in parser.feed(chunk):
+                print(doc['doc_id'])
+        parser.close()
+        print(parser.result['docs']['total'])
+    """
+    
+    def __init__(self, path: Sequence[str]):
+        self._path = list(path)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._json = JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._parser = self._parse()
+        self.result = None
+    
+    def feed(self, data: bytes) -> list:
+        """
+        Passes data to the parser.
+        
+        Returns:
+            The list elements that were completed by the data.
+        """
+        self._buf = self._buf[self._pos:] + self._text.decode(data)
+        self._pos = 0
+        return self._run()
+    
+    def close(self) -> list:
+        """
+        Finishes parsing.
+        
+        Returns:
+            The remaining list elements.
+        
+        Raises:
+            ValueError: The data was not a complete JSON object.
+        """
+        self._buf = self._buf[self._pos:] + self._text.decode(b'', final = True)
+        self._pos = 0
+        self._eof = True
+        elements = self._run()
+        if self.result is None:
+            raise ValueError('Incomplete JSON data')
+        return elements
+    
+    def _run(self) -> list:
+        elements = []
+        for item in self._parser:
+            if item is _MORE:
+                break
+            elements.append(item)
+        return elements
+    
+    def _parse(self) -> Iterator[Any]:
+        c = yield from self._skip_ws()
+        if c != '{':
+            raise ValueError(f'Expected JSON object, got {c!r}')
+        self.result = yield from self._object(0)
+        if (yield from self._skip_ws(True)) is not None:
+            raise ValueError('Extra data after JSON object')
+    
+    def _object(self, depth: int) -> Iterator[Any]:
+        """Parses an object, descending into the list path."""
+        self._pos += 1                  # '{'
+        obj = {}
+        c = yield from self._skip_ws()
+        if c == '}':
+            self._pos += 1
+            return obj
+        
+        while True:
+            key = yield from self._value()
+            if (yield from self._skip_ws()) != ':':
+                raise ValueError(f'Expected ":" after key {key!r}')
+            self._pos += 1
+            c = yield from self._skip_ws()
+            
+            if depth < len(self._path) and key == self._path[depth]:
+                if depth == len(self._path) - 1 and c == '[':
+                    yield from self._elements()
+                elif depth < len(self._path) - 1 and c == '{':
+                    obj[key] = yield from self._object(depth + 1)
+                else:
+                    value = yield from self._value()
+                    if depth == len(self._path) - 1:
+                        for elem in value:
+                            yield elem
+                    else:
+                        obj[key] = value
+            else:
+                obj[key] = yield from self._value()
+            
+            c = yield from self._skip_ws()
+            self._pos += 1
+            if c == '}':
+                return obj
+            if c != ',':
+                raise ValueError(f'Expected "," or "}}", got {c!r}')
+            yield from self._skip_ws()
+    
+    def _elements(self) -> Iterator[Any]:
+        """Parses the list, yielding the elements."""
+        self._pos += 1                  # '['
+        c = yield from self._skip_ws()
+        if c == ']':
+            self._pos += 1
+            return
+        while True:
+            yield (yield from self._value())
+            c = yield from self._skip_ws()
+            self._pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                raise ValueError(f'Expected "," or "]", got {c!r}')
+    
+    def _value(self) -> Iterator[Any]:
+        """Parses a complete JSON value."""
+        yield from self._skip_ws()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except JSONDecodeError:
+                if self._eof:
+                    raise
+                yield _MORE
+                continue
+            # A number might continue in the next chunk
+            if (
+                not self._eof and
+                isinstance(value, (int, float)) and
+                (end == len(self._buf) or self._buf[end] not in _delimiters)
+            ):
+                yield _MORE
+                continue
+            self._pos = end
+            return value
+    
+    def _skip_ws(self, eof_ok: bool = False) -> Iterator[Any]:
+        """Skips whitespace, returns the next character."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            end = len(buf)
+            while pos < end and buf[pos] in _whitespace:
+                pos += 1
+            self._pos = pos
+            if pos < end:
+                return buf[pos]
+            if self._eof:
+                if eof_ok:
+                    return None
+                raise ValueError('Unexpected end of JSON data')
+            yield _MORE
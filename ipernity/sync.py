@@ -0,0 +1,336 @@
+"""
+Directory Synchronization
+===========================
+
+:func:`sync_directory` uploads the files of a local directory that are not in
+the user's Ipernity stream yet. Files are identified by their MD5 hash, which
+is checked with :iper:`doc.checkMD5`, so renamed or moved files are not
+uploaded again. By default, 50 hashes are checked per call, and the documents
+found are verified with :iper:`doc.get`.
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    
+    api = IpernityAPI(key, secret, token)
+    for result in api.sync_directory('Photos/2024', patterns = ['*.jpg']):
+        print(result.filename, result.status)
+
+The steps overlap: files are hashed by a thread pool while the hashes of
+earlier files are checked, and the uploads start when all files have been
+checked. The MD5 hashes can be kept in a cache file, so only new or modified
+files are hashed on the next run. If the API object has a response
+:attr:`~ipernity.api.IpernityAPI.cache`, the results of :iper:`doc.checkMD5`
+are cached, too.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from fnmatch import fnmatch
+from hashlib import md5
+from logging import getLogger
+from typing import Iterable, Iterator, NamedTuple, TYPE_CHECKING
+
+from .exceptions import APIRequestError, IpernityError
+
+if TYPE_CHECKING:
+    from .api import IpernityAPI, api_arg
+
+log = getLogger(__name__)
+
+#: :attr:`SyncResult.status` of files that are already on Ipernity
+EXISTS = 'exists'
+#: :attr:`SyncResult.status` of uploaded files
+UPLOADED = 'uploaded'
+#: :attr:`SyncResult.status` of files that would be uploaded (``dry_run``)
+MISSING = 'missing'
+#: :attr:`SyncResult.status` of files that could not be checked or uploaded
+FAILED = 'failed'
+
+
+class SyncResult(NamedTuple):
+    """
+    Result for one file of :func:`sync_directory`
+    """
+    
+    #: Path of the file
+    filename: str
+    #: MD5 hash of the file, ``None`` if the file could not be read
+    md5: str | None
+    #: One of :data:`EXISTS`, :data:`UPLOADED`, :data:`MISSING` or :data:`FAILED`
+    status: str
+    #: ``doc_id`` of the uploaded or existing document
+    doc_id: str | None = None
+    #: The exception if the status is :data:`FAILED`
+    error: Exception | None = None
+
+
+def find_files(
+    path: str,
+    patterns: Iterable[str] = ('*',),
+    recursive: bool = True,
+) -> Iterator[str]:
+    """
+    Yields the files in a directory matching any of the patterns.
+    
+    Hidden files and directories (starting with ``.``) are skipped. Patterns
+    are matched against the file name, case-insensitively on Windows (see
+    :func:`fnmatch.fnmatch`).
+    """
+    patterns = list(patterns)
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for name in sorted(filenames):
+            if not name.startswith('.') and any(fnmatch(name, p) for p in patterns):
+                yield os.path.join(dirpath, name)
+        if not recursive:
+            break
+
+
+def file_md5(filename: str, chunk_size: int = 1 << 20) -> str:
+    """Returns the MD5 hash of a file as hex string"""
+    h = md5()
+    with open(filename, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashCache:
+    """
+    MD5 hashes of files, stored in a JSON file.
+    
+    A hash is reused as long as the size and modification time of the file
+    are unchanged.
+    
+    Args:
+        path:   Name of the cache file. It is created by :meth:`save` if it
+                does not exist.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'r') as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            self._data = {}
+        except ValueError:
+            log.warning('Invalid hash cache %s, ignoring it', path)
+            self._data = {}
+        self._changed = False
+    
+    def md5(self, filename: str) -> str:
+        """Returns the MD5 hash of a file, computing it if necessary."""
+        key = os.path.abspath(filename)
+        st = os.stat(filename)
+        entry = self._data.get(key)
+        if entry is not None and entry[:2] == [st.st_size, st.st_mtime_ns]:
+            return entry[2]
+        hash_ = file_md5(filename)
+        self._data[key] = [st.st_size, st.st_mtime_ns, hash_]
+        self._changed = True
+        return hash_
+    
+    def save(self):
+        """Writes the cache file if hashes were added."""
+        if not self._changed:
+            return
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.path)
+        self._changed = False
+
+
+def sync_directory(
+    api: IpernityAPI,
+    path: str,
+    patterns: Iterable[str] = ('*',),
+    recursive: bool = True,
+    hash_workers: int = 4,
+    check_workers: int = 8,
+    check_size: int = 50,
+    upload_workers: int = 4,
+    hash_cache: str | None = None,
+    dry_run: bool = False,
+    verify: bool = True,
+    **kwargs: api_arg
+) -> Iterator[SyncResult]:
+    """
+    Uploads the files of a directory that are not on Ipernity yet.
+    
+    Args:
+        api:            The API object.
+        path:           The directory.
+        patterns:       Only files matching one of these patterns (like
+                        ``*.jpg``) are synchronized.
+        recursive:      Include subdirectories.
+        hash_workers:   Number of threads computing MD5 hashes.
+        check_workers:  Number of concurrent :iper:`doc.checkMD5` calls.
+        check_size:     Number of hashes checked by one :iper:`doc.checkMD5`
+                        call.
+        upload_workers: Number of concurrent uploads.
+        hash_cache:     Name of a file for caching the MD5 hashes between
+                        runs, see :class:`HashCache`.
+        dry_run:        Only check the files, don't upload them. Missing
+                        files get the status :data:`MISSING`.
+        verify:         Check the documents found by :iper:`doc.checkMD5`
+                        with :iper:`doc.get`, as it may return deleted
+                        documents or documents of other users. These are
+                        uploaded again. Without verification, existing
+                        files need no additional calls.
+        kwargs:         Additional attributes for :iper:`upload.file`.
+    
+    Yields:
+        A :class:`SyncResult` for every file: first for the files that are
+        already on Ipernity (or could not be checked), then for the uploaded
+        files, in the order the uploads finish. Files with the same content
+        are uploaded once, and all of them get the result of the upload.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    cache = HashCache(hash_cache) if hash_cache else None
+    
+    def hash_file(filename: str) -> str | OSError:
+        try:
+            return cache.md5(filename) if cache is not None else file_md5(filename)
+        except OSError as e:
+            return e
+    
+    # Files with the same content need only one check and upload
+    groups = {}         # md5 -> filenames
+    checked = {}        # md5 -> doc_id, None or exception
+    reported = {}       # md5 -> number of files with results
+    dirty = set()       # checked md5s with new files
+    missing = {}        # md5 -> filename to upload
+    unreadable = []
+    
+    def results(hash_: str) -> Iterator[SyncResult]:
+        """Yields the results of new files with a checked hash."""
+        result = checked[hash_]
+        filenames = groups[hash_]
+        for filename in filenames[reported.get(hash_, 0):]:
+            if isinstance(result, Exception):
+                yield SyncResult(filename, hash_, FAILED, error = result)
+            elif result is not None:
+                yield SyncResult(filename, hash_, EXISTS, result)
+            elif hash_ not in missing:
+                missing[hash_] = filename
+        reported[hash_] = len(filenames)
+    
+    executor = ThreadPoolExecutor(
+        max_workers = hash_workers,
+        thread_name_prefix = 'ipernity-hash'
+    )
+    futures = []
+    try:
+        files = list(find_files(path, patterns, recursive))
+        log.debug('Found %d files in %s', len(files), path)
+        futures = [executor.submit(hash_file, filename) for filename in files]
+        call_hashes = []    # hashes of the calls
+        
+        def calls() -> Iterator[tuple[str, dict]]:
+            chunk = []
+            for filename, future in zip(files, futures):
+                hash_ = future.result()
+                if isinstance(hash_, OSError):
+                    log.warning('Cannot read %s: %s', filename, hash_)
+                    unreadable.append(SyncResult(filename, None, FAILED, error = hash_))
+                    continue
+                if hash_ in groups:
+                    groups[hash_].append(filename)
+                    if hash_ in checked:
+                        dirty.add(hash_)
+                    continue
+                groups[hash_] = [filename]
+                chunk.append(hash_)
+                if len(chunk) == check_size:
+                    call_hashes.append(chunk)
+                    yield 'doc.checkMD5', {'md5': ','.join(chunk)}
+                    chunk = []
+            if chunk:
+                call_hashes.append(chunk)
+                yield 'doc.checkMD5', {'md5': ','.join(chunk)}
+        
+        def found_docs(docs: list[dict]) -> dict[str, str]:
+            """Maps the MD5 hashes of :iper:`doc.checkMD5` results to doc_ids."""
+            found = {}
+            fetch = []
+            for doc in docs:
+                if verify or not doc.get('md5'):
+                    fetch.append(doc['doc_id'])
+                else:
+                    found[doc['md5'].lower()] = doc['doc_id']
+            if not fetch:
+                return found
+            
+            user = api.user_info
+            calls = [('doc.get', {'doc_id': doc_id, 'extra': 'md5'}) for doc_id in fetch]
+            for _, result in api.batch(calls, max_workers = check_workers):
+                if isinstance(result, APIRequestError) and result.status != 'httperror':
+                    # Deleted document
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+                doc = result['doc']
+                if user is not None and doc['owner']['user_id'] != user['user_id']:
+                    continue
+                if doc.get('md5'):
+                    found[doc['md5'].lower()] = doc['doc_id']
+            return found
+        
+        for index, result in api.batch(calls(), max_workers = check_workers, ordered = False):
+            chunk = call_hashes[index]
+            if not isinstance(result, Exception):
+                try:
+                    found = found_docs(result['docs'].get('doc', []))
+                except Exception as e:
+                    result = e
+            if isinstance(result, Exception):
+                log.warning('Checking %d files failed: %s', len(chunk), result)
+            for hash_ in chunk:
+                checked[hash_] = result if isinstance(result, Exception) else found.get(hash_)
+                yield from results(hash_)
+            while dirty:
+                yield from results(dirty.pop())
+            yield from unreadable
+            unreadable.clear()
+        
+        while dirty:
+            yield from results(dirty.pop())
+        yield from unreadable
+    finally:
+        # Don't hash the remaining files if the consumer stops early
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+        if cache is not None:
+            cache.save()
+    
+    # Copies of missing files are reported with the uploaded file
+    def copies(
+        hash_: str,
+        status: str,
+        doc_id: str | None = None,
+        error: Exception | None = None
+    ) -> Iterator[SyncResult]:
+        for filename in groups[hash_]:
+            yield SyncResult(filename, hash_, status, doc_id, error)
+    
+    if dry_run:
+        for hash_ in missing:
+            yield from copies(hash_, MISSING)
+        return
+    
+    hashes = {filename: hash_ for hash_, filename in missing.items()}
+    for filename, result in api.upload_files(hashes, max_workers = upload_workers, **kwargs):
+        hash_ = hashes[filename]
+        if isinstance(result, IpernityError):
+            yield from copies(hash_, FAILED, error = result)
+        else:
+            yield from copies(hash_, UPLOADED, result)
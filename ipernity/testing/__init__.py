@@ -0,0 +1,36 @@
+"""
+Fake Ipernity Server
+======================
+
+The ``ipernity.testing`` package contains a local HTTP server imitating the
+Ipernity API, for offline tests and for load tests of applications using the
+API, without an Ipernity account:
+
+.. code-block:: python
+    
+    from ipernity import IpernityAPI
+    from ipernity.testing import FakeIpernity
+    
+    with FakeIpernity(latency = (0.05, 0.2), error_rate = 0.01) as server:
+        server.store.populate(docs = 1000, albums = 10)
+        api = IpernityAPI(**server.api_args())
+        docs = list(api.walk_docs())
+
+The server implements the methods for documents, albums, folders, tags,
+comments, uploads with tickets and the desktop authentication flow on an
+in-memory :class:`~ipernity.testing.store.Store`, with the pagination of
+Ipernity. Other methods in ``methods.json`` return an error. The data
+structures follow those returned by Ipernity, but only contain the most
+important fields.
+
+The server can also run standalone:
+
+.. code-block:: shell-session
+    
+    $ python -m ipernity.testing --port 8080 --docs 5000 --latency 0.1
+
+.. versionadded:: 0.4.0
+"""
+
+from .server import FakeIpernity
+from .store import FakeAPIError, Store
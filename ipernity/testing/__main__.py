@@ -0,0 +1,60 @@
+"""
+Runs the fake Ipernity server, see :mod:`ipernity.testing`.
+"""
+
+from argparse import ArgumentParser
+
+from .server import FakeIpernity
+
+
+def main():
+    """Command line interface for :class:`~ipernity.testing.server.FakeIpernity`."""
+    parser = ArgumentParser(
+        'python -m ipernity.testing',
+        description = 'Run a local fake Ipernity API server'
+    )
+    parser.add_argument('--host', default = '127.0.0.1', help = 'Address to listen on')
+    parser.add_argument('--port', type = int, default = 8080, help = 'Port to listen on')
+    parser.add_argument('--api-key', default = 'fake-api-key', help = 'Accepted API key')
+    parser.add_argument('--api-secret', default = 'fake-api-secret', help = 'Secret of the API key')
+    parser.add_argument(
+        '--latency',
+        type = float,
+        nargs = '+',
+        default = [0],
+        metavar = 'SECONDS',
+        help = 'Delay of the responses, or minimum and maximum delay'
+    )
+    parser.add_argument('--error-rate', type = float, default = 0, help = 'Probability of HTTP 503')
+    parser.add_argument('--rate-limit', type = float, help = 'Maximum requests per second')
+    parser.add_argument('--docs', type = int, default = 0, help = 'Number of generated documents')
+    parser.add_argument('--albums', type = int, default = 0, help = 'Number of generated albums')
+    opts = parser.parse_args()
+    
+    if len(opts.latency) > 2:
+        parser.error('--latency takes one or two values')
+    server = FakeIpernity(
+        opts.api_key,
+        opts.api_secret,
+        opts.host,
+        opts.port,
+        latency = opts.latency[0] if len(opts.latency) == 1 else tuple(opts.latency),
+        error_rate = opts.error_rate,
+        rate_limit = opts.rate_limit,
+    )
+    server.store.populate(opts.docs, opts.albums)
+    print(f'URL:        {server.url}')
+    print(f'Auth URL:   {server.auth_url_base}')
+    print(f'API key:    {opts.api_key}')
+    print(f'API secret: {opts.api_secret}')
+    print(f'Token:      {server.create_token()}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
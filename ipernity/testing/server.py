@@ -0,0 +1,301 @@
+"""
+Fake Server
+=============
+
+:class:`FakeIpernity` serves the API methods of a :class:`~ipernity.testing.store.Store`
+over HTTP on a local port, in a background thread. Requests are checked like
+by Ipernity: the API key must be known, and ``api_sig`` must be the
+signature computed by :func:`~ipernity.auth.api_signature`. Methods that
+need a signature or a token (according to ``methods.json``) fail without.
+
+For load tests, the server can simulate a slow or unreliable API:
+
+*   ``latency`` delays every response, by a fixed time or a random time in a
+    range.
+*   ``error_rate`` is the probability of an HTTP 503 response.
+*   ``rate_limit`` limits the number of requests per second. Requests above
+    the limit get HTTP 429 with a ``Retry-After`` header.
+
+The counters in :attr:`FakeIpernity.stats` show how many requests were
+served, failed or throttled.
+
+:meth:`FakeIpernity.app` handles requests without HTTP, for tests with an
+:class:`~ipernity.transport.InProcessTransport`.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from collections import deque
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from math import ceil
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any, Mapping, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from ..transport import Headers, Request
+from .store import FakeAPIError, Store
+
+log = getLogger(__name__)
+
+latency_arg = Union[float, Tuple[float, float]]
+
+
+class FakeIpernity:
+    """
+    Local HTTP server imitating the Ipernity API.
+    
+    Args:
+        api_key:        API key accepted by the server.
+        api_secret:     The secret of the API key.
+        host:           Address to listen on.
+        port:           Port to listen on, 0 (the default) selects a free
+                        port.
+        latency:        Delay of every response in seconds, or a tuple
+                        ``(min, max)`` for random delays.
+        error_rate:     Probability of an HTTP 503 response.
+        rate_limit:     Maximum number of requests per second, ``None`` for
+                        no limit.
+        seed:           Seed for the random latency and errors.
+        store:          The data, default is a new :class:`~ipernity.testing.store.Store`.
+    
+    The server is started by :meth:`start` or by using it as context manager:
+    
+    .. code-block:: python
+        
+        with FakeIpernity() as server:
+            api = IpernityAPI(**server.api_args())
+            ...
+    """
+    
+    def __init__(
+        self,
+        api_key: str = 'fake-api-key',
+        api_secret: str = 'fake-api-secret',
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: latency_arg = 0,
+        error_rate: float = 0,
+        rate_limit: float | None = None,
+        seed: int | None = None,
+        store: Store | None = None,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.store = store or Store({api_key: api_secret})
+        self.store.apps.setdefault(api_key, api_secret)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        #: Number of ``requests``, ``errors`` (HTTP 503) and ``throttled``
+        #: requests (HTTP 429)
+        self.stats = {'requests': 0, 'errors': 0, 'throttled': 0}
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._recent = deque()
+        self._httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+    
+    def __enter__(self) -> FakeIpernity:
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    @property
+    def url(self) -> str:
+        """API URL, for the ``url`` argument of the API object"""
+        return f'{self.base_url}/api/'
+    
+    @property
+    def auth_url_base(self) -> str:
+        """Authorization URL, for the ``auth_url_base`` argument of the API object"""
+        return f'{self.base_url}/apps/authorize'
+    
+    def start(self) -> FakeIpernity:
+        """Starts the server in a background thread."""
+        if self._thread is None:
+            self._thread = Thread(
+                target = self._httpd.serve_forever,
+                name = 'ipernity-fake-server',
+                daemon = True
+            )
+            self._thread.start()
+            log.info('Fake Ipernity server listening on %s', self.url)
+        return self
+    
+    def stop(self):
+        """Stops the server."""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+    
+    def serve_forever(self):
+        """Runs the server in the current thread."""
+        self._httpd.serve_forever()
+    
+    def create_token(self, user_id: str = '1', permissions: Mapping[str, str] | None = None) -> str:
+        """Creates an authentication token, see :meth:`Store.create_token`."""
+        return self.store.create_token(user_id, permissions)
+    
+    def api_args(self, token: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        """
+        Returns the arguments for an API object using this server.
+        
+        Args:
+            token:  Authentication token, default is a new token for user
+                    ``1``.
+            kwargs: More arguments for the API object.
+        """
+        return {
+            'api_key':          self.api_key,
+            'api_secret':       self.api_secret,
+            'token':            token or self.create_token(),
+            'url':              self.url,
+            'auth_url_base':    self.auth_url_base,
+            **kwargs,
+        }
+    
+    def _delay(self) -> float:
+        if isinstance(self.latency, tuple):
+            return self._random.uniform(*self.latency)
+        return self.latency
+    
+    def _fault(self) -> tuple[int, dict[str, str]] | None:
+        """Returns the HTTP status and headers of a simulated failure."""
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit is not None:
+                now = monotonic()
+                while self._recent and self._recent[0] <= now - 1:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.stats['throttled'] += 1
+                    retry_after = max(1, ceil(self._recent[0] + 1 - now))
+                    return 429, {'Retry-After': str(retry_after)}
+                self._recent.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 503, {}
+        return None
+    
+    def app(self, request: Request) -> tuple[int, dict[str, str], bytes]:
+        """
+        Handles a request without HTTP, for
+        :class:`~ipernity.transport.InProcessTransport`.
+        
+        The server does not need to be started:
+        
+        .. code-block:: python
+            
+            server = FakeIpernity()
+            api = IpernityAPI(**server.api_args(transport = InProcessTransport(server.app)))
+        
+        Returns:
+            A tuple ``(status, headers, body)``.
+        """
+        params = request_params(request)
+        delay = self._delay()
+        if delay:
+            sleep(delay)
+        fault = self._fault()
+        if fault is not None:
+            status, headers = fault
+            return status, {'Content-Type': 'text/plain', **headers}, b'Service unavailable'
+        
+        path = urlsplit(request.url).path
+        if path.startswith('/api/'):
+            method_name = path[5:].split('/')[0]
+            result = self.store.call(method_name, params)
+            body = json.dumps(result).encode('utf-8')
+            return 200, {'Content-Type': 'application/json; charset=utf-8'}, body
+        if path == '/apps/authorize':
+            return self._authorize(params)
+        return 404, {'Content-Type': 'text/plain'}, b'Not found'
+    
+    def _authorize(self, params: Mapping[str, Any]) -> tuple[int, dict[str, str], bytes]:
+        """Authorizes a frob as if user 1 confirmed it in the browser."""
+        try:
+            self.store.check_signature(params, None, True)
+            permissions = {k[5:]: v for k, v in params.items() if k.startswith('perm_')}
+            self.store.authorize_frob(params.get('frob', ''), '1', permissions)
+        except FakeAPIError as e:
+            return 403, {'Content-Type': 'text/plain'}, e.message.encode('utf-8')
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, b'<div class="ok">Authorized</div>'
+
+
+def request_params(request: Request) -> dict[str, Any]:
+    """Returns the parameters from the query string and the body of a request."""
+    params = dict(parse_qsl(urlsplit(request.url).query, keep_blank_values = True))
+    if request.method != 'POST':
+        return params
+    content_type = request.headers.get('Content-Type', '')
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy = policy.HTTP).parsebytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + request.body
+        )
+        for part in message.iter_parts():
+            name = part.get_param('name', header = 'content-disposition')
+            content = part.get_payload(decode = True)
+            filename = part.get_filename()
+            if filename is None:
+                params[name] = content.decode('utf-8')
+            else:
+                params[name] = (filename, content)
+    else:
+        params.update(parse_qsl(request.body.decode('utf-8'), keep_blank_values = True))
+    return params
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeIpernity'
+    # Headers and body are written separately, avoid delayed ACKs
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        # Read the body first, so the connection can be reused after errors
+        body = self._body() if self.command == 'POST' else b''
+        request = Request(self.command, self.path, Headers(dict(self.headers.items())), body)
+        status, headers, body = self.server.fake.app(request)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    do_POST = do_GET
+    
+    def log_message(self, format: str, *args: Any):
+        log.debug(format, *args)
+    
+    def _body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if not size:
+                    # Skip trailers
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
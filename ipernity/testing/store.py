@@ -0,0 +1,1067 @@
+"""
+In-Memory Store
+=================
+
+The :class:`Store` holds the data of the fake server (users, documents,
+albums, folders, comments, tags and upload tickets) and implements the API
+methods on it. Every method is a function registered with
+:func:`api_method`, taking the store, the request context and the
+parameters, and returning the result without the ``api`` status, in the
+structure returned by Ipernity.
+
+Errors are raised as :class:`FakeAPIError` and returned like Ipernity does,
+with HTTP status 200 and ``"status": "error"``. The error codes are those of
+the fake server:
+
+=========================== ==================================================
+:data:`ERR_NOT_FOUND`       Object not found, or not owned by the user
+:data:`ERR_MISSING_ARG`     A required argument is missing or invalid
+:data:`ERR_UNKNOWN_METHOD`  The method is not in ``methods.json``
+:data:`ERR_INVALID_KEY`     Unknown API key
+:data:`ERR_INVALID_SIG`     Missing or incorrect ``api_sig``
+:data:`ERR_INVALID_TOKEN`   Missing or unknown ``auth_token``, or frob not
+                            authorized
+:data:`ERR_NOT_IMPLEMENTED` The method is not implemented by the fake server
+=========================== ==================================================
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from hashlib import md5
+from itertools import count
+from logging import getLogger
+from math import ceil
+from threading import RLock
+from time import time
+from typing import Any, Callable, Iterable, Mapping
+from uuid import uuid4
+
+from ..api import IpernityAPI
+from ..auth import api_signature
+from ..pagination import MAX_PER_PAGE
+
+log = getLogger(__name__)
+
+ERR_NOT_FOUND = 1
+ERR_MISSING_ARG = 2
+ERR_UNKNOWN_METHOD = 3
+ERR_INVALID_KEY = 100
+ERR_INVALID_SIG = 101
+ERR_INVALID_TOKEN = 102
+ERR_NOT_IMPLEMENTED = 104
+
+#: Default number of elements per page
+DEFAULT_PER_PAGE = 50
+
+#: Implemented methods by name
+handlers: dict[str, Callable[[Store, Context, Mapping[str, Any]], dict]] = {}
+
+
+class FakeAPIError(Exception):
+    """An error returned by the fake server"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class Context:
+    """Authentication data of a request"""
+    
+    __slots__ = ('api_key', 'user_id', 'permissions')
+    
+    def __init__(self, api_key: str, user_id: str | None, permissions: Mapping[str, str]):
+        self.api_key = api_key
+        self.user_id = user_id
+        self.permissions = permissions
+    
+    def require_user(self) -> str:
+        """Returns the user ID of the token."""
+        if self.user_id is None:
+            raise FakeAPIError(ERR_INVALID_TOKEN, 'Token required')
+        return self.user_id
+
+
+def api_method(name: str):
+    """Registers a function implementing an API method."""
+    def decorator(func: Callable[[Store, Context, Mapping[str, Any]], dict]):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def _arg(params: Mapping[str, Any], name: str) -> str:
+    try:
+        return params[name]
+    except KeyError:
+        raise FakeAPIError(ERR_MISSING_ARG, f'Missing argument {name}') from None
+
+
+def _int_arg(params: Mapping[str, Any], name: str, default: int | None = None) -> int:
+    value = params.get(name)
+    if value in (None, ''):
+        if default is None:
+            raise FakeAPIError(ERR_MISSING_ARG, f'Missing argument {name}')
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise FakeAPIError(ERR_MISSING_ARG, f'Invalid argument {name}') from None
+
+
+def _ids(value: str) -> list[str]:
+    """Splits a comma-separated list of IDs."""
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def paginate(items: list[dict], params: Mapping[str, Any], elem_key: str) -> dict:
+    """Returns one page of a list with the pagination fields of Ipernity."""
+    per_page = min(max(_int_arg(params, 'per_page', DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+    page = max(_int_arg(params, 'page', 1), 1)
+    total = len(items)
+    elements = items[(page - 1) * per_page:page * per_page]
+    return {
+        'total':    str(total),
+        'page':     str(page),
+        'per_page': str(per_page),
+        'pages':    str(ceil(total / per_page)),
+        'count':    str(len(elements)),
+        elem_key:   elements,
+    }
+
+
+class Store:
+    """
+    Data of the fake server.
+    
+    Args:
+        apps:   API keys and their secrets.
+    
+    A user with ID ``1`` is created, more can be added with :meth:`add_user`.
+    All methods are thread-safe.
+    """
+    
+    def __init__(self, apps: Mapping[str, str]):
+        self.lock = RLock()
+        self.apps = dict(apps)
+        self.users = {}
+        self.tokens = {}            # token -> (user_id, permissions)
+        self.frobs = {}             # frob -> (api_key, token or None)
+        self.docs = {}
+        self.albums = {}
+        self.folders = {}
+        self.comments = {}
+        self.tags = {}              # tag -> tag_id
+        self.tickets = {}           # ticket -> (doc_id, ready time)
+        #: Seconds until an uploaded document is processed
+        self.ticket_delay = 0.0
+        self._ids = count(1000)
+        self.add_user('1', 'Test User')
+    
+    def new_id(self) -> str:
+        """Returns a new object ID."""
+        return str(next(self._ids))
+    
+    def add_user(self, user_id: str, username: str) -> dict:
+        """Adds a user."""
+        with self.lock:
+            user = self.users[user_id] = {
+                'user_id':  user_id,
+                'username': username,
+                'realname': username,
+                'is_pro':   '1',
+                'is_online': '0',
+                'is_closed': '0',
+            }
+            return user
+    
+    def create_token(
+        self,
+        user_id: str = '1',
+        permissions: Mapping[str, str] | None = None,
+    ) -> str:
+        """Creates an authentication token for a user."""
+        if user_id not in self.users:
+            raise KeyError(f'Unknown user {user_id}')
+        token = uuid4().hex
+        with self.lock:
+            self.tokens[token] = (user_id, dict(permissions or {'doc': 'delete'}))
+        return token
+    
+    def authorize_frob(self, frob: str, user_id: str = '1', permissions: Mapping[str, str] | None = None):
+        """Authorizes a frob as if the user confirmed the authorization URL."""
+        with self.lock:
+            try:
+                api_key, _ = self.frobs[frob]
+            except KeyError:
+                raise FakeAPIError(ERR_INVALID_TOKEN, 'Invalid frob') from None
+            self.frobs[frob] = (api_key, self.create_token(user_id, permissions))
+    
+    def check_signature(self, params: Mapping[str, Any], method_name: str | None, required: bool) -> str:
+        """
+        Checks the API key and signature of a request.
+        
+        Returns:
+            The API key.
+        """
+        api_key = params.get('api_key')
+        secret = self.apps.get(api_key)
+        if secret is None:
+            raise FakeAPIError(ERR_INVALID_KEY, 'Invalid API key')
+        sig = params.get('api_sig')
+        if sig is None:
+            if required:
+                raise FakeAPIError(ERR_INVALID_SIG, 'Missing signature')
+            return api_key
+        unsigned = {k: v for k, v in params.items() if k != 'api_sig'}
+        if sig != api_signature(unsigned, secret, method_name):
+            raise FakeAPIError(ERR_INVALID_SIG, 'Invalid signature')
+        return api_key
+    
+    def call(self, method_name: str, params: Mapping[str, Any]) -> dict:
+        """
+        Runs an API method.
+        
+        Returns:
+            The result, including the ``api`` status.
+        """
+        try:
+            with self.lock:
+                result = self._call(method_name, params)
+                # Serialize while holding the lock, the result may be shared
+                result = json.loads(json.dumps(result))
+        except FakeAPIError as e:
+            log.debug('%s failed: %s %s', method_name, e.code, e.message)
+            return {'api': {'status': 'error', 'code': str(e.code), 'message': e.message}}
+        result['api'] = {'status': 'ok', 'at': str(int(time()))}
+        return result
+    
+    def _call(self, method_name: str, params: Mapping[str, Any]) -> dict:
+        methods = IpernityAPI.__methods__
+        if method_name not in methods:
+            raise FakeAPIError(ERR_UNKNOWN_METHOD, f'Method {method_name} not found')
+        authentication = methods[method_name]['authentication']
+        api_key = self.check_signature(params, method_name, bool(int(authentication.get('sign', '0'))))
+        
+        user_id, permissions = None, {}
+        token = params.get('auth_token')
+        if token is not None:
+            try:
+                user_id, permissions = self.tokens[token]
+            except KeyError:
+                raise FakeAPIError(ERR_INVALID_TOKEN, 'Invalid token') from None
+        elif int(authentication.get('token', '0')):
+            raise FakeAPIError(ERR_INVALID_TOKEN, 'Token required')
+        
+        try:
+            handler = handlers[method_name]
+        except KeyError:
+            raise FakeAPIError(ERR_NOT_IMPLEMENTED, f'Method {method_name} not implemented') from None
+        return handler(self, Context(api_key, user_id, permissions), params)
+    
+    # Access to objects
+    
+    def _get(self, kind: str, table: dict, obj_id: str, user_id: str | None = None) -> dict:
+        """Returns an object, optionally only if it is owned by the user."""
+        obj = table.get(obj_id)
+        if obj is None or (user_id is not None and obj['owner_id'] != user_id):
+            raise FakeAPIError(ERR_NOT_FOUND, f'{kind} not found')
+        return obj
+    
+    def doc(self, doc_id: str, user_id: str | None = None) -> dict:
+        return self._get('Document', self.docs, doc_id, user_id)
+    
+    def album(self, album_id: str, user_id: str | None = None) -> dict:
+        return self._get('Album', self.albums, album_id, user_id)
+    
+    def folder(self, folder_id: str, user_id: str | None = None) -> dict:
+        return self._get('Folder', self.folders, folder_id, user_id)
+    
+    def comment(self, comment_id: str) -> dict:
+        comment = self.comments.get(comment_id)
+        if comment is None:
+            raise FakeAPIError(ERR_NOT_FOUND, 'Comment not found')
+        return comment
+    
+    def _owner(self, user_id: str) -> dict:
+        user = self.users[user_id]
+        return {'user_id': user_id, 'username': user['username']}
+    
+    def _list_user(self, ctx: Context, params: Mapping[str, Any]) -> str:
+        """Returns the ``user_id`` argument, default is the user of the token."""
+        user_id = params.get('user_id') or ctx.user_id
+        if user_id is None:
+            raise FakeAPIError(ERR_MISSING_ARG, 'Missing argument user_id')
+        return user_id
+    
+    # Views in the structure returned by Ipernity
+    
+    def doc_view(self, doc: dict, extra: str = '') -> dict:
+        view = {
+            'doc_id':       doc['doc_id'],
+            'media':        doc['media'],
+            'title':        doc['title'],
+            'description':  doc['description'],
+            'license':      doc['license'],
+            'owner':        self._owner(doc['owner_id']),
+            'visibility':   dict(doc['visibility']),
+            'dates': {
+                'created':          doc['created'],
+                'posted_at':        doc['posted_at'],
+                'last_comment_at':  doc['last_comment_at'],
+                'last_update':      doc['last_update'],
+            },
+            'count': {
+                'visits':   '0',
+                'faves':    '0',
+                'comments': str(sum(1 for c in self.comments.values() if c['doc_id'] == doc['doc_id'])),
+            },
+        }
+        extras = set(extra.split(','))
+        if 'md5' in extras:
+            view['md5'] = doc['md5']
+        if doc['geo'] is not None and 'geo' in extras:
+            view['geo'] = dict(doc['geo'])
+        if 'tags' in extras:
+            view['tags'] = {'tag': [self.tag_view(t) for t in doc['tags']]}
+        return view
+    
+    def album_view(self, album: dict) -> dict:
+        view = {
+            'album_id':     album['album_id'],
+            'title':        album['title'],
+            'description':  album['description'],
+            'owner':        self._owner(album['owner_id']),
+            'count':        {'docs': str(len(album['docs']))},
+            'dates': {
+                'created':      album['created'],
+                'last_update':  album['last_update'],
+            },
+        }
+        if album['cover_id'] is not None:
+            view['cover'] = {'doc_id': album['cover_id']}
+        return view
+    
+    def folder_view(self, folder: dict) -> dict:
+        return {
+            'folder_id':    folder['folder_id'],
+            'title':        folder['title'],
+            'description':  folder['description'],
+            'owner':        self._owner(folder['owner_id']),
+            'count':        {'albums': str(len(folder['albums']))},
+            'dates': {
+                'created':      folder['created'],
+                'last_update':  folder['last_update'],
+            },
+        }
+    
+    def comment_view(self, comment: dict) -> dict:
+        return {
+            'comment_id':   comment['comment_id'],
+            'doc_id':       comment['doc_id'],
+            'user_id':      comment['user_id'],
+            'username':     self.users[comment['user_id']]['username'],
+            'content':      comment['content'],
+            'posted_at':    comment['posted_at'],
+            'parent_id':    comment['parent_id'],
+        }
+    
+    def tag_view(self, tag: str) -> dict:
+        return {'tag_id': self.tags[tag], 'tag': tag, 'type': 'keyword'}
+    
+    # Modifications
+    
+    def add_doc(
+        self,
+        user_id: str,
+        content: bytes = b'',
+        filename: str = 'file.jpg',
+        title: str | None = None,
+        description: str = '',
+        public: bool = True,
+    ) -> dict:
+        """Adds a document, like an upload."""
+        now = str(int(time()))
+        with self.lock:
+            doc_id = self.new_id()
+            doc = self.docs[doc_id] = {
+                'doc_id':           doc_id,
+                'owner_id':         user_id,
+                'media':            'photo',
+                'title':            os.path.splitext(filename)[0] if title is None else title,
+                'description':      description,
+                'license':          '0',
+                'visibility':       {
+                    'ispublic': '1' if public else '0',
+                    'isfriend': '0',
+                    'isfamily': '0',
+                },
+                'created':          now,
+                'posted_at':        now,
+                'last_comment_at':  '0',
+                'last_update':      now,
+                'md5':              md5(content).hexdigest(),
+                'size':             len(content),
+                'geo':              None,
+                'tags':             [],
+            }
+            return doc
+    
+    def add_album(self, user_id: str, title: str, description: str = '') -> dict:
+        now = str(int(time()))
+        with self.lock:
+            album_id = self.new_id()
+            album = self.albums[album_id] = {
+                'album_id':     album_id,
+                'owner_id':     user_id,
+                'title':        title,
+                'description':  description,
+                'cover_id':     None,
+                'created':      now,
+                'last_update':  now,
+                'docs':         [],
+            }
+            return album
+    
+    def add_folder(self, user_id: str, title: str, description: str = '') -> dict:
+        now = str(int(time()))
+        with self.lock:
+            folder_id = self.new_id()
+            folder = self.folders[folder_id] = {
+                'folder_id':    folder_id,
+                'owner_id':     user_id,
+                'title':        title,
+                'description':  description,
+                'created':      now,
+                'last_update':  now,
+                'albums':       [],
+            }
+            return folder
+    
+    def add_tags(self, doc: dict, keywords: Iterable[str]):
+        for keyword in keywords:
+            keyword = keyword.strip()
+            if not keyword:
+                continue
+            if keyword not in self.tags:
+                self.tags[keyword] = self.new_id()
+            if keyword not in doc['tags']:
+                doc['tags'].append(keyword)
+        touch(doc)
+    
+    def delete_doc(self, doc_id: str):
+        del self.docs[doc_id]
+        for album in self.albums.values():
+            if doc_id in album['docs']:
+                album['docs'].remove(doc_id)
+                touch(album)
+            if album['cover_id'] == doc_id:
+                album['cover_id'] = None
+        for comment_id in [c for c, comment in self.comments.items() if comment['doc_id'] == doc_id]:
+            del self.comments[comment_id]
+    
+    def populate(self, docs: int, albums: int = 0, user_id: str = '1'):
+        """
+        Adds generated documents and albums for load tests.
+        
+        The documents are distributed evenly across the albums.
+        """
+        with self.lock:
+            created = [
+                self.add_doc(user_id, str(i).encode('ascii'), f'photo{i:06}.jpg')
+                for i in range(docs)
+            ]
+            for i in range(albums):
+                album = self.add_album(user_id, f'Album {i + 1}')
+                album['docs'] = [d['doc_id'] for d in created[i::albums]]
+
+
+def touch(obj: dict):
+    """Updates the modification time of an object."""
+    obj['last_update'] = str(int(time()))
+
+
+def _sorted_docs(docs: Iterable[dict], sort: str) -> list[dict]:
+    field, _, order = sort.partition('-')
+    key = {'posted': 'posted_at', 'created': 'created', 'updated': 'last_update'}.get(field, 'posted_at')
+    # IDs break ties, so the order is stable
+    return sorted(docs, key = lambda d: (int(d[key]), int(d['doc_id'])), reverse = order != 'asc')
+
+
+# Test and API methods
+
+@api_method('test.echo')
+def _test_echo(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return {'echo': params.get('echo', '')}
+
+
+@api_method('test.hello')
+def _test_hello(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return {'hello': 'hello world!'}
+
+
+@api_method('api.methods.getList')
+def _api_methods_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    methods = IpernityAPI.__methods__
+    return {'methods': {'method': [dict(methods[name]) for name in methods]}}
+
+
+@api_method('api.methods.get')
+def _api_methods_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    name = _arg(params, 'method')
+    if name not in IpernityAPI.__methods__:
+        raise FakeAPIError(ERR_NOT_FOUND, 'Method not found')
+    return {'method': dict(IpernityAPI.__methods__[name])}
+
+
+# Authentication and users
+
+@api_method('auth.getFrob')
+def _auth_getfrob(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    frob = uuid4().hex
+    store.frobs[frob] = (ctx.api_key, None)
+    return {'auth': {'frob': frob}}
+
+
+def _auth_view(store: Store, token: str) -> dict:
+    user_id, permissions = store.tokens[token]
+    return {
+        'auth': {
+            'token':        token,
+            'permissions':  dict(permissions),
+            'user':         store._owner(user_id),
+        },
+    }
+
+
+@api_method('auth.getToken')
+def _auth_gettoken(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    api_key, token = store.frobs.get(_arg(params, 'frob'), (None, None))
+    if token is None or api_key != ctx.api_key:
+        raise FakeAPIError(ERR_INVALID_TOKEN, 'Frob not authorized')
+    del store.frobs[params['frob']]
+    return _auth_view(store, token)
+
+
+@api_method('auth.checkToken')
+def _auth_checktoken(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return _auth_view(store, params['auth_token'])
+
+
+@api_method('user.get')
+def _user_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = params.get('user_id') or ctx.require_user()
+    try:
+        user = dict(store.users[user_id])
+    except KeyError:
+        raise FakeAPIError(ERR_NOT_FOUND, 'User not found') from None
+    user['count'] = {
+        'docs':     str(sum(1 for d in store.docs.values() if d['owner_id'] == user_id)),
+        'albums':   str(sum(1 for a in store.albums.values() if a['owner_id'] == user_id)),
+    }
+    return {'user': user}
+
+
+@api_method('account.getQuota')
+def _account_getquota(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = ctx.require_user()
+    size = sum(d['size'] for d in store.docs.values() if d['owner_id'] == user_id)
+    return {
+        'quota': {
+            'is_pro':   '1',
+            'upload': {
+                'used':     {'kb': str(size // 1024)},
+                'max':      {'kb': '0', 'unlimited': '1'},
+            },
+        },
+    }
+
+
+# Documents
+
+@api_method('doc.get')
+def _doc_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'))
+    return {'doc': store.doc_view(doc, params.get('extra', ''))}
+
+
+@api_method('doc.getList')
+def _doc_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = store._list_user(ctx, params)
+    docs = _sorted_docs(
+        (d for d in store.docs.values() if d['owner_id'] == user_id),
+        params.get('sort', 'posted-desc')
+    )
+    extra = params.get('extra', '')
+    return {'docs': paginate([store.doc_view(d, extra) for d in docs], params, 'doc')}
+
+
+@api_method('doc.search')
+def _doc_search(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = params.get('user_id')
+    text = params.get('text', '').lower()
+    tags = set(_ids(params.get('tags', '')))
+    ranges = [
+        (field, _int_arg(params, f'{arg}_min', 0), _int_arg(params, f'{arg}_max', 2**63))
+        for arg, field in (('posted', 'posted_at'), ('created', 'created'), ('updated', 'last_update'))
+    ]
+    docs = [
+        d for d in store.docs.values()
+        if (user_id is None or d['owner_id'] == user_id)
+        and (not text or text in d['title'].lower() or text in d['description'].lower())
+        and tags <= set(d['tags'])
+        and all(low <= int(d[field]) <= high for field, low, high in ranges)
+    ]
+    docs = _sorted_docs(docs, params.get('sort', 'posted-desc'))
+    extra = params.get('extra', '')
+    return {'docs': paginate([store.doc_view(d, extra) for d in docs], params, 'doc')}
+
+
+@api_method('doc.checkMD5')
+def _doc_checkmd5(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = ctx.require_user()
+    hashes = set(_ids(_arg(params, 'md5')))
+    return {
+        'docs': {
+            'doc': [
+                {'doc_id': d['doc_id'], 'md5': d['md5']}
+                for d in store.docs.values()
+                if d['owner_id'] == user_id and d['md5'] in hashes
+            ],
+        },
+    }
+
+
+@api_method('doc.set')
+def _doc_set(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    for key in ('title', 'description'):
+        if key in params:
+            doc[key] = params[key]
+    touch(doc)
+    return {'doc': store.doc_view(doc)}
+
+
+@api_method('doc.setLicense')
+def _doc_setlicense(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    doc['license'] = str(_int_arg(params, 'license'))
+    touch(doc)
+    return {'doc': store.doc_view(doc)}
+
+
+@api_method('doc.setPerms')
+def _doc_setperms(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    for key in ('ispublic', 'isfriend', 'isfamily'):
+        if key in params:
+            doc['visibility'][key] = '1' if _int_arg(params, key) else '0'
+    touch(doc)
+    return {'doc': store.doc_view(doc)}
+
+
+@api_method('doc.setGeo')
+def _doc_setgeo(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    doc['geo'] = {'lat': _arg(params, 'lat'), 'lng': _arg(params, 'lng')}
+    touch(doc)
+    return {'doc': store.doc_view(doc, 'geo')}
+
+
+@api_method('doc.delete')
+def _doc_delete(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    store.delete_doc(doc['doc_id'])
+    return {'doc': {'doc_id': doc['doc_id'], 'deleted': '1'}}
+
+
+@api_method('doc.getContainers')
+def _doc_getcontainers(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'))
+    return {
+        'albums': {
+            'album': [
+                store.album_view(a)
+                for a in store.albums.values()
+                if doc['doc_id'] in a['docs']
+            ],
+        },
+        'groups': {'group': []},
+    }
+
+
+# Tags
+
+@api_method('doc.tags.add')
+def _doc_tags_add(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    store.add_tags(doc, _arg(params, 'keywords').split(','))
+    return {'doc': {'doc_id': doc['doc_id'], 'tags': {'tag': [store.tag_view(t) for t in doc['tags']]}}}
+
+
+@api_method('doc.tags.edit')
+def _doc_tags_edit(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    doc['tags'] = []
+    store.add_tags(doc, _arg(params, 'keywords').split(','))
+    return {'doc': {'doc_id': doc['doc_id'], 'tags': {'tag': [store.tag_view(t) for t in doc['tags']]}}}
+
+
+@api_method('doc.tags.remove')
+def _doc_tags_remove(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    if 'tag_id' in params:
+        tag_ids = set(_ids(params['tag_id']))
+        doc['tags'] = [t for t in doc['tags'] if store.tags[t] not in tag_ids]
+    else:
+        keywords = {k.strip() for k in _arg(params, 'keywords').split(',')}
+        doc['tags'] = [t for t in doc['tags'] if t not in keywords]
+    touch(doc)
+    return {'doc': {'doc_id': doc['doc_id'], 'tags': {'tag': [store.tag_view(t) for t in doc['tags']]}}}
+
+
+@api_method('doc.tags.getList')
+def _doc_tags_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'))
+    return {'doc': {'doc_id': doc['doc_id'], 'tags': {'tag': [store.tag_view(t) for t in doc['tags']]}}}
+
+
+@api_method('tags.user.getList')
+def _tags_user_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = store._list_user(ctx, params)
+    counts = {}
+    for doc in store.docs.values():
+        if doc['owner_id'] == user_id:
+            for tag in doc['tags']:
+                counts[tag] = counts.get(tag, 0) + 1
+    return {
+        'tags': {
+            'tag': [
+                dict(store.tag_view(tag), count = str(n))
+                for tag, n in sorted(counts.items())
+            ],
+        },
+    }
+
+
+@api_method('tags.docs.getList')
+def _tags_docs_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = params.get('user_id')
+    tags = set(_ids(_arg(params, 'tags')))
+    docs = _sorted_docs(
+        (
+            d for d in store.docs.values()
+            if (user_id is None or d['owner_id'] == user_id) and tags & set(d['tags'])
+        ),
+        params.get('sort', 'posted-desc')
+    )
+    extra = params.get('extra', '')
+    return {'tags': {'docs': paginate([store.doc_view(d, extra) for d in docs], params, 'doc')}}
+
+
+# Comments
+
+@api_method('doc.comments.add')
+def _doc_comments_add(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'))
+    return {'comment': {'comment_id': _add_comment(store, ctx, doc, params)}}
+
+
+@api_method('doc.comments.reply')
+def _doc_comments_reply(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    parent = store.comment(_arg(params, 'comment_id'))
+    doc = store.doc(parent['doc_id'])
+    return {'comment': {'comment_id': _add_comment(store, ctx, doc, params, parent['comment_id'])}}
+
+
+def _add_comment(
+    store: Store,
+    ctx: Context,
+    doc: dict,
+    params: Mapping[str, Any],
+    parent_id: str = '0',
+) -> str:
+    now = str(int(time()))
+    comment_id = store.new_id()
+    store.comments[comment_id] = {
+        'comment_id':   comment_id,
+        'doc_id':       doc['doc_id'],
+        'user_id':      ctx.require_user(),
+        'content':      _arg(params, 'content'),
+        'posted_at':    now,
+        'parent_id':    parent_id,
+    }
+    doc['last_comment_at'] = now
+    return comment_id
+
+
+@api_method('doc.comments.get')
+def _doc_comments_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return {'comment': store.comment_view(store.comment(_arg(params, 'comment_id')))}
+
+
+@api_method('doc.comments.getList')
+def _doc_comments_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'))
+    comments = [
+        store.comment_view(c)
+        for c in sorted(store.comments.values(), key = lambda c: int(c['comment_id']))
+        if c['doc_id'] == doc['doc_id']
+    ]
+    return {'doc': {'doc_id': doc['doc_id'], 'comments': paginate(comments, params, 'comment')}}
+
+
+def _own_comment(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    """Returns a comment that the user wrote or that is on the user's document."""
+    comment = store.comment(_arg(params, 'comment_id'))
+    user_id = ctx.require_user()
+    if user_id not in (comment['user_id'], store.docs[comment['doc_id']]['owner_id']):
+        raise FakeAPIError(ERR_NOT_FOUND, 'Comment not found')
+    return comment
+
+
+@api_method('doc.comments.edit')
+def _doc_comments_edit(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    comment = _own_comment(store, ctx, params)
+    comment['content'] = _arg(params, 'content')
+    return {'comment': store.comment_view(comment)}
+
+
+@api_method('doc.comments.delete')
+def _doc_comments_delete(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    comment = _own_comment(store, ctx, params)
+    del store.comments[comment['comment_id']]
+    return {'comment': {'comment_id': comment['comment_id'], 'deleted': '1'}}
+
+
+# Albums
+
+@api_method('album.create')
+def _album_create(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.add_album(ctx.require_user(), _arg(params, 'title'), params.get('description', ''))
+    return {'album': store.album_view(album)}
+
+
+@api_method('album.get')
+def _album_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return {'album': store.album_view(store.album(_arg(params, 'album_id')))}
+
+
+@api_method('album.edit')
+def _album_edit(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.album(_arg(params, 'album_id'), ctx.require_user())
+    for key in ('title', 'description'):
+        if key in params:
+            album[key] = params[key]
+    if 'cover_id' in params:
+        album['cover_id'] = store.doc(params['cover_id'])['doc_id']
+    touch(album)
+    return {'album': store.album_view(album)}
+
+
+@api_method('album.delete')
+def _album_delete(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.album(_arg(params, 'album_id'), ctx.require_user())
+    del store.albums[album['album_id']]
+    for folder in store.folders.values():
+        if album['album_id'] in folder['albums']:
+            folder['albums'].remove(album['album_id'])
+            touch(folder)
+    return {'album': {'album_id': album['album_id'], 'deleted': '1'}}
+
+
+@api_method('album.getList')
+def _album_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = store._list_user(ctx, params)
+    albums = [
+        store.album_view(a)
+        for a in sorted(store.albums.values(), key = lambda a: int(a['album_id']))
+        if a['owner_id'] == user_id
+    ]
+    return {'albums': paginate(albums, params, 'album')}
+
+
+@api_method('album.docs.add')
+def _album_docs_add(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = ctx.require_user()
+    album = store.album(_arg(params, 'album_id'), user_id)
+    result = []
+    for doc_id in _ids(_arg(params, 'doc_id')):
+        added = doc_id in store.docs and doc_id not in album['docs']
+        if added:
+            album['docs'].append(doc_id)
+        result.append({'doc_id': doc_id, 'added': '1' if added else '0'})
+    touch(album)
+    return {'album': {'album_id': album['album_id'], 'doc': result}}
+
+
+@api_method('album.docs.remove')
+def _album_docs_remove(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.album(_arg(params, 'album_id'), ctx.require_user())
+    result = []
+    for doc_id in _ids(_arg(params, 'doc_id')):
+        removed = doc_id in album['docs']
+        if removed:
+            album['docs'].remove(doc_id)
+        result.append({'doc_id': doc_id, 'removed': '1' if removed else '0'})
+    touch(album)
+    return {'album': {'album_id': album['album_id'], 'doc': result}}
+
+
+@api_method('album.docs.setList')
+def _album_docs_setlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.album(_arg(params, 'album_id'), ctx.require_user())
+    album['docs'] = [d for d in dict.fromkeys(_ids(_arg(params, 'doc_id'))) if d in store.docs]
+    touch(album)
+    return {'album': store.album_view(album)}
+
+
+@api_method('album.docs.getList')
+def _album_docs_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    album = store.album(_arg(params, 'album_id'))
+    extra = params.get('extra', '')
+    docs = [store.doc_view(store.docs[d], extra) for d in album['docs']]
+    return {'album': {'album_id': album['album_id'], 'docs': paginate(docs, params, 'doc')}}
+
+
+# Folders
+
+@api_method('folder.create')
+def _folder_create(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    folder = store.add_folder(ctx.require_user(), _arg(params, 'title'), params.get('description', ''))
+    return {'folder': store.folder_view(folder)}
+
+
+@api_method('folder.get')
+def _folder_get(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    return {'folder': store.folder_view(store.folder(_arg(params, 'folder_id')))}
+
+
+@api_method('folder.edit')
+def _folder_edit(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    folder = store.folder(_arg(params, 'folder_id'), ctx.require_user())
+    for key in ('title', 'description'):
+        if key in params:
+            folder[key] = params[key]
+    touch(folder)
+    return {'folder': store.folder_view(folder)}
+
+
+@api_method('folder.delete')
+def _folder_delete(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    folder = store.folder(_arg(params, 'folder_id'), ctx.require_user())
+    del store.folders[folder['folder_id']]
+    return {'folder': {'folder_id': folder['folder_id'], 'deleted': '1'}}
+
+
+@api_method('folder.getList')
+def _folder_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = store._list_user(ctx, params)
+    folders = [
+        store.folder_view(f)
+        for f in sorted(store.folders.values(), key = lambda f: int(f['folder_id']))
+        if f['owner_id'] == user_id
+    ]
+    return {'folders': paginate(folders, params, 'folder')}
+
+
+@api_method('folder.albums.add')
+def _folder_albums_add(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    user_id = ctx.require_user()
+    folder = store.folder(_arg(params, 'folder_id'), user_id)
+    result = []
+    for album_id in _ids(_arg(params, 'album_id')):
+        added = album_id not in folder['albums']
+        if added:
+            store.album(album_id, user_id)
+            folder['albums'].append(album_id)
+        result.append({'album_id': album_id, 'added': '1' if added else '0'})
+    touch(folder)
+    return {'folder': {'folder_id': folder['folder_id'], 'album': result}}
+
+
+@api_method('folder.albums.remove')
+def _folder_albums_remove(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    folder = store.folder(_arg(params, 'folder_id'), ctx.require_user())
+    result = []
+    for album_id in _ids(_arg(params, 'album_id')):
+        removed = album_id in folder['albums']
+        if removed:
+            folder['albums'].remove(album_id)
+        result.append({'album_id': album_id, 'removed': '1' if removed else '0'})
+    touch(folder)
+    return {'folder': {'folder_id': folder['folder_id'], 'album': result}}
+
+
+@api_method('folder.albums.getList')
+def _folder_albums_getlist(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    folder = store.folder(_arg(params, 'folder_id'))
+    albums = [store.album_view(store.albums[a]) for a in folder['albums']]
+    return {'folder': {'folder_id': folder['folder_id'], 'albums': paginate(albums, params, 'album')}}
+
+
+# Uploads
+
+def _file_arg(params: Mapping[str, Any]) -> tuple[str, bytes]:
+    file = params.get('file')
+    if not isinstance(file, tuple):
+        raise FakeAPIError(ERR_MISSING_ARG, 'Missing argument file')
+    return file
+
+
+def _new_ticket(store: Store, doc_id: str) -> str:
+    ticket = store.new_id()
+    store.tickets[ticket] = (doc_id, time() + store.ticket_delay)
+    return ticket
+
+
+@api_method('upload.file')
+def _upload_file(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    filename, content = _file_arg(params)
+    doc = store.add_doc(
+        ctx.require_user(),
+        content,
+        filename,
+        params.get('title'),
+        params.get('description', ''),
+        bool(_int_arg(params, 'public', 1)),
+    )
+    if 'keywords' in params:
+        store.add_tags(doc, params['keywords'].split(','))
+    return {'ticket': _new_ticket(store, doc['doc_id'])}
+
+
+@api_method('upload.replace')
+def _upload_replace(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    doc = store.doc(_arg(params, 'doc_id'), ctx.require_user())
+    _, content = _file_arg(params)
+    doc['md5'] = md5(content).hexdigest()
+    doc['size'] = len(content)
+    touch(doc)
+    return {'ticket': _new_ticket(store, doc['doc_id'])}
+
+
+@api_method('upload.checkTickets')
+def _upload_checktickets(store: Store, ctx: Context, params: Mapping[str, Any]) -> dict:
+    now = time()
+    result = []
+    for ticket in _ids(_arg(params, 'tickets')):
+        doc_id, ready = store.tickets.get(ticket, (None, 0))
+        if doc_id is None or doc_id not in store.docs:
+            result.append({'id': ticket, 'done': '0', 'invalid': '1'})
+        elif ready > now:
+            result.append({'id': ticket, 'done': '0', 'eta': str(ceil(ready - now))})
+        else:
+            result.append({'id': ticket, 'done': '1', 'doc_id': doc_id})
+    return {
+        'tickets': {
+            'done':     str(sum(1 for t in result if t['done'] == '1')),
+            'total':    str(len(result)),
+            'ticket':   result,
+        },
+    }
@@ -0,0 +1,773 @@
+"""
+HTTP Transports
+=================
+
+A transport sends the HTTP requests of an API object. The authentication
+handler signs the arguments of an API call and decides between GET, a form
+POST and a multipart upload; the transport only sends the request and
+returns a :class:`Response`. Different HTTP libraries can be used by passing
+the ``transport`` argument to the API object, either as name or as instance:
+
+=============== ================================================ =============
+Name            Class                                            Requires
+=============== ================================================ =============
+``requests``    :class:`RequestsTransport` (default)             requests
+``httpx``       :class:`HTTPXTransport`                          httpx
+``urllib3``     :class:`URLLib3Transport`                        urllib3
+=============== ================================================ =============
+
+.. code-block:: python
+    
+    api = IpernityAPI(key, secret, token, transport = 'urllib3')
+
+:class:`~ipernity.aio.AsyncIpernityAPI` uses asynchronous transports,
+:class:`AsyncHTTPXTransport` (``httpx``) by default.
+
+:class:`InProcessTransport` and :class:`AsyncInProcessTransport` pass the
+encoded request to a function instead of sending it, e.g. the fake server
+of :mod:`ipernity.testing` or a test double:
+
+.. code-block:: python
+    
+    def app(request: Request) -> tuple[int, dict, bytes]:
+        return 200, {'Content-Type': 'application/json'}, b'{"api": {"status": "ok"}}'
+    
+    api = IpernityAPI(key, secret, transport = InProcessTransport(app))
+
+Other HTTP libraries can be used by subclassing :class:`Transport` or
+:class:`AsyncTransport`. Network errors must be raised as
+:class:`~ipernity.exceptions.TransportError`, HTTP errors are returned as
+responses. After :meth:`Transport.close`, the transport must still be
+usable, it may open new connections.
+
+.. versionadded:: 0.4.0
+"""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable as AwaitableABC
+from http import HTTPStatus
+from logging import getLogger
+from threading import Lock
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Iterator, Mapping, NamedTuple,
+    Tuple, Union, TYPE_CHECKING
+)
+from urllib.parse import urlencode
+
+from .exceptions import TransportError
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    import urllib3
+    
+    from .api import api_arg, timeout_arg
+    from .multipart import MultipartEncoder
+    
+    in_process_app = Callable[
+        ['Request'],
+        Union[Tuple[int, Mapping[str, str], bytes], Awaitable[Tuple[int, Mapping[str, str], bytes]]]
+    ]
+
+log = getLogger(__name__)
+
+# Size of the chunks read by Response.content from streamed responses
+_read_chunk_size = 65536
+
+
+class Headers(Mapping[str, str]):
+    """Case-insensitive HTTP headers"""
+    
+    def __init__(self, headers: Mapping[str, str] | None = None):
+        self._data = {k.lower(): (k, v) for k, v in (headers or {}).items()}
+    
+    def __getitem__(self, name: str) -> str:
+        return self._data[name.lower()][1]
+    
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self._data
+    
+    def __iter__(self) -> Iterator[str]:
+        return (k for k, _ in self._data.values())
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __repr__(self) -> str:
+        return f'Headers({dict(self.items())!r})'
+
+
+class Request(NamedTuple):
+    """An encoded HTTP request, see :class:`InProcessTransport`"""
+    
+    #: ``GET`` or ``POST``
+    method: str
+    #: URL including the query string
+    url: str
+    #: Request headers
+    headers: Headers
+    #: Request body
+    body: bytes
+
+
+class Response:
+    """
+    HTTP response returned by the transports.
+    
+    The body is read on creation, or later for streamed responses (requests
+    with ``stream = True``). Streamed responses of synchronous transports
+    are read with :meth:`iter_content` or :attr:`content`, those of
+    asynchronous transports with :meth:`aiter_bytes` or :meth:`aread`.
+    
+    Args:
+        status_code:        HTTP status.
+        reason:             HTTP reason phrase.
+        headers:            Response headers, as case-insensitive mapping.
+        url:                The request URL, including the query string.
+        request_headers:    Headers of the request.
+        content:            The response body if it has been read.
+        stream:             Function returning an iterator over the body in
+                            chunks of a given size, for streamed responses.
+        close:              Function releasing the connection.
+        native:             The response object of the HTTP library.
+    """
+    
+    def __init__(
+        self,
+        status_code: int,
+        reason: str,
+        headers: Mapping[str, str],
+        url: str,
+        request_headers: Mapping[str, str] | None = None,
+        content: bytes | None = None,
+        stream: Callable[[int], Iterator[bytes] | AsyncIterator[bytes]] | None = None,
+        close: Callable[[], Any] | None = None,
+        native: Any = None,
+    ):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.url = url
+        self.request_headers = request_headers if request_headers is not None else Headers()
+        #: The response object of the HTTP library, ``None`` for in-process
+        #: and replayed responses
+        self.native = native
+        self._content = content
+        self._stream = stream
+        self._close = close
+    
+    def __repr__(self) -> str:
+        return f'<Response [{self.status_code}]>'
+    
+    @property
+    def ok(self) -> bool:
+        """``True`` unless the HTTP status is an error"""
+        return self.status_code < 400
+    
+    @property
+    def content(self) -> bytes:
+        """The response body"""
+        if self._content is None:
+            try:
+                self._content = b''.join(self._stream(_read_chunk_size))
+            finally:
+                self.close()
+        return self._content
+    
+    @property
+    def text(self) -> str:
+        """The response body as text"""
+        return self.content.decode('utf-8', errors = 'replace')
+    
+    def json(self) -> Any:
+        """Decodes the response body as JSON."""
+        return json.loads(self.content)
+    
+    def raise_for_status(self):
+        """Raises :class:`~ipernity.exceptions.TransportError` for HTTP errors."""
+        if not self.ok:
+            raise TransportError(f'HTTP status {self.status_code} {self.reason}')
+    
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """Yields the body in chunks."""
+        if self._content is not None:
+            for pos in range(0, len(self._content), chunk_size):
+                yield self._content[pos:pos+chunk_size]
+            return
+        try:
+            yield from self._stream(chunk_size)
+        finally:
+            self.close()
+    
+    def close(self):
+        """Releases the connection."""
+        if self._close is not None:
+            close, self._close = self._close, None
+            close()
+    
+    async def aread(self) -> bytes:
+        """Reads the body of a streamed response from an asynchronous transport."""
+        if self._content is None:
+            self._content = b''.join([c async for c in self.aiter_bytes(_read_chunk_size)])
+        return self._content
+    
+    async def aiter_bytes(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yields the body in chunks, for asynchronous transports."""
+        if self._content is not None:
+            for chunk in self.iter_content(chunk_size):
+                yield chunk
+            return
+        try:
+            async for chunk in self._stream(chunk_size):
+                yield chunk
+        finally:
+            await self.aclose()
+    
+    async def aclose(self):
+        """Releases the connection of an asynchronous transport."""
+        if self._close is not None:
+            close, self._close = self._close, None
+            result = close()
+            # inspect.isawaitable() would be equivalent, but inspect is slow to import
+            if isinstance(result, AwaitableABC):
+                await result
+
+
+class Transport(ABC):
+    """Base class of the transports"""
+    
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        """
+        Sends a request.
+        
+        Args:
+            method:     ``GET`` or ``POST``.
+            url:        Request URL without query string.
+            params:     Query parameters.
+            data:       Form data, sent URL-encoded.
+            encoder:    Multipart body with a file, sent instead of ``data``.
+            timeout:    Timeout in seconds, a tuple ``(connect timeout, read
+                        timeout)`` or ``None``.
+            stream:     Don't read the response body immediately.
+        
+        Raises:
+            TransportError: The request failed due to a network error.
+        """
+    
+    def close(self):
+        """Closes the connections."""
+
+
+class AsyncTransport(ABC):
+    """Base class of the asynchronous transports"""
+    
+    @abstractmethod
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        """Sends a request, see :meth:`Transport.request`."""
+    
+    def close(self):
+        """Does nothing, asynchronous transports are closed by :meth:`aclose`."""
+    
+    async def aclose(self):
+        """Closes the connections."""
+
+
+def _failed(e: Exception) -> TransportError:
+    # The exception message may contain the signed URL
+    error = TransportError(f'Request failed ({e.__class__.__name__})')
+    error.__cause__ = e
+    return error
+
+
+def _wrap_stream(
+    stream: Callable[[int], Iterator[bytes]],
+    errors: type | tuple[type, ...],
+) -> Callable[[int], Iterator[bytes]]:
+    """Converts the errors of a body iterator to :class:`TransportError`."""
+    def wrapped(chunk_size: int) -> Iterator[bytes]:
+        try:
+            yield from stream(chunk_size)
+        except errors as e:
+            raise _failed(e) from e
+    return wrapped
+
+
+class RequestsTransport(Transport):
+    """
+    Transport using a :class:`requests.Session`.
+    
+    Args:
+        pool_size:  Maximum number of keep-alive connections.
+    """
+    
+    def __init__(self, pool_size: int = 10):
+        self._pool_size = pool_size
+        self._session = None
+        self._lock = Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        """The session, created on first use"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    
+                    log.debug('Creating HTTP session, pool size %d', self._pool_size)
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections = self._pool_size,
+                        pool_maxsize = self._pool_size
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        import requests
+        
+        headers = None
+        if encoder is not None:
+            data = encoder
+            headers = {'Content-Type': encoder.content_type}
+        try:
+            response = self.session.request(
+                method,
+                url,
+                params = params,
+                data = data,
+                headers = headers,
+                timeout = timeout,
+                stream = stream
+            )
+        except requests.RequestException as e:
+            raise _failed(e) from e
+        return Response(
+            response.status_code,
+            response.reason,
+            response.headers,
+            response.request.url,
+            response.request.headers,
+            None if stream else response.content,
+            _wrap_stream(response.iter_content, requests.RequestException),
+            response.close,
+            response,
+        )
+    
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            log.debug('Closing HTTP session')
+            session.close()
+
+
+def _httpx_timeout(timeout: timeout_arg) -> httpx.Timeout:
+    import httpx
+    
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(timeout[1], connect = timeout[0])
+    return httpx.Timeout(timeout)
+
+
+def _httpx_request(
+    client: httpx.Client | httpx.AsyncClient,
+    method: str,
+    url: str,
+    params: Mapping[str, api_arg] | None,
+    data: Mapping[str, api_arg] | None,
+    encoder: MultipartEncoder | None,
+    timeout: timeout_arg,
+    content: Any = None,
+) -> httpx.Request:
+    headers = None
+    if encoder is not None:
+        headers = {'Content-Type': encoder.content_type}
+        if encoder.length is not None:
+            # Otherwise, httpx uses chunked encoding
+            headers['Content-Length'] = str(encoder.length)
+        data = None
+    return client.build_request(
+        method,
+        url,
+        params = params,
+        data = data,
+        content = content,
+        headers = headers,
+        timeout = _httpx_timeout(timeout)
+    )
+
+
+def _httpx_response(response: httpx.Response, content: bytes | None, stream: Callable, close: Callable) -> Response:
+    return Response(
+        response.status_code,
+        response.reason_phrase,
+        response.headers,
+        str(response.request.url),
+        response.request.headers,
+        content,
+        stream,
+        close,
+        response,
+    )
+
+
+class HTTPXTransport(Transport):
+    """
+    Transport using a synchronous :class:`httpx.Client`.
+    
+    Args:
+        pool_size:  Maximum number of connections.
+    """
+    
+    def __init__(self, pool_size: int = 10):
+        self._pool_size = pool_size
+        self._client = None
+        self._lock = Lock()
+    
+    @property
+    def client(self) -> httpx.Client:
+        """The client, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    
+                    log.debug('Creating HTTP client, max. %d connections', self._pool_size)
+                    self._client = httpx.Client(limits = httpx.Limits(
+                        max_connections = self._pool_size,
+                        max_keepalive_connections = self._pool_size
+                    ))
+        return self._client
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        import httpx
+        
+        client = self.client
+        request = _httpx_request(
+            client, method, url, params, data, encoder, timeout,
+            None if encoder is None else iter(encoder)
+        )
+        try:
+            response = client.send(request, stream = stream)
+        except httpx.TransportError as e:
+            raise _failed(e) from e
+        return _httpx_response(
+            response,
+            None if stream else response.content,
+            _wrap_stream(response.iter_bytes, httpx.TransportError),
+            response.close,
+        )
+    
+    def close(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            log.debug('Closing HTTP client')
+            client.close()
+
+
+class AsyncHTTPXTransport(AsyncTransport):
+    """
+    Transport using an :class:`httpx.AsyncClient`.
+    
+    Args:
+        pool_size:  Maximum number of connections.
+    """
+    
+    def __init__(self, pool_size: int = 10):
+        self._pool_size = pool_size
+        self._client = None
+        self._lock = Lock()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The client, created on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    
+                    log.debug('Creating HTTP client, max. %d connections', self._pool_size)
+                    self._client = httpx.AsyncClient(limits = httpx.Limits(
+                        max_connections = self._pool_size,
+                        max_keepalive_connections = self._pool_size
+                    ))
+        return self._client
+    
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        import httpx
+        
+        client = self.client
+        request = _httpx_request(
+            client, method, url, params, data, encoder, timeout,
+            None if encoder is None else encoder.aiter()
+        )
+        try:
+            response = await client.send(request, stream = stream)
+        except httpx.TransportError as e:
+            raise _failed(e) from e
+        
+        async def chunks(chunk_size: int) -> AsyncIterator[bytes]:
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    yield chunk
+            except httpx.TransportError as e:
+                raise _failed(e) from e
+        
+        return _httpx_response(
+            response,
+            None if stream else response.content,
+            chunks,
+            response.aclose,
+        )
+    
+    async def aclose(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            log.debug('Closing HTTP client')
+            await client.aclose()
+
+
+class URLLib3Transport(Transport):
+    """
+    Transport using a :class:`urllib3.PoolManager`.
+    
+    Args:
+        pool_size:  Maximum number of keep-alive connections per host.
+    """
+    
+    def __init__(self, pool_size: int = 10):
+        self._pool_size = pool_size
+        self._pool = None
+        self._lock = Lock()
+    
+    @property
+    def pool(self) -> urllib3.PoolManager:
+        """The pool manager, created on first use"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    import urllib3
+                    
+                    log.debug('Creating connection pool, pool size %d', self._pool_size)
+                    self._pool = urllib3.PoolManager(maxsize = self._pool_size, retries = False)
+        return self._pool
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        import urllib3
+        
+        if params:
+            url = f'{url}?{urlencode(params)}'
+        headers = {}
+        body = None
+        if encoder is not None:
+            headers['Content-Type'] = encoder.content_type
+            if encoder.length is not None:
+                headers['Content-Length'] = str(encoder.length)
+            body = iter(encoder)
+        elif data is not None:
+            body = urlencode(data).encode('ascii')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Content-Length'] = str(len(body))
+        
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect = timeout[0], read = timeout[1])
+        else:
+            timeout = urllib3.Timeout(connect = timeout, read = timeout)
+        try:
+            response = self.pool.urlopen(
+                method,
+                url,
+                body = body,
+                headers = headers,
+                timeout = timeout,
+                chunked = encoder is not None and encoder.length is None,
+                preload_content = not stream,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise _failed(e) from e
+        
+        def close():
+            response.drain_conn()
+            response.release_conn()
+        
+        return Response(
+            response.status,
+            response.reason or '',
+            response.headers,
+            url,
+            Headers(headers),
+            None if stream else response.data,
+            _wrap_stream(response.stream, urllib3.exceptions.HTTPError),
+            close,
+            response,
+        )
+    
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            log.debug('Closing connection pool')
+            pool.clear()
+
+
+def encode_request(
+    method: str,
+    url: str,
+    params: Mapping[str, api_arg] | None = None,
+    data: Mapping[str, api_arg] | None = None,
+    encoder: MultipartEncoder | None = None,
+) -> Request:
+    """Encodes a request like an HTTP client would send it."""
+    headers = {}
+    body = b''
+    if params:
+        url = f'{url}?{urlencode(params)}'
+    if encoder is not None:
+        body = b''.join(encoder)
+        headers['Content-Type'] = encoder.content_type
+    elif data is not None:
+        body = urlencode(data).encode('ascii')
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    if method == 'POST':
+        headers['Content-Length'] = str(len(body))
+    return Request(method, url, Headers(headers), body)
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ''
+
+
+class InProcessTransport(Transport):
+    """
+    Transport passing the requests to a function.
+    
+    Args:
+        app:    Function receiving a :class:`Request` and returning a tuple
+                ``(status, headers, body)``.
+    """
+    
+    def __init__(self, app: in_process_app):
+        self.app = app
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        request = encode_request(method, url, params, data, encoder)
+        status, headers, body = self.app(request)
+        return Response(int(status), _reason(status), Headers(headers), request.url, request.headers, body)
+
+
+class AsyncInProcessTransport(AsyncTransport):
+    """
+    Asynchronous transport passing the requests to a function.
+    
+    Args:
+        app:    Function or coroutine function receiving a :class:`Request`
+                and returning a tuple ``(status, headers, body)``.
+    """
+    
+    def __init__(self, app: in_process_app):
+        self.app = app
+    
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, api_arg] | None = None,
+        data: Mapping[str, api_arg] | None = None,
+        encoder: MultipartEncoder | None = None,
+        timeout: timeout_arg = None,
+        stream: bool = False,
+    ) -> Response:
+        request = encode_request(method, url, params, data, encoder)
+        result = self.app(request)
+        if isinstance(result, AwaitableABC):
+            result = await result
+        status, headers, body = result
+        return Response(int(status), _reason(status), Headers(headers), request.url, request.headers, body)
+
+
+#: Transports by name
+transports = {
+    'requests': RequestsTransport,
+    'httpx':    HTTPXTransport,
+    'urllib3':  URLLib3Transport,
+}
+
+#: Asynchronous transports by name
+async_transports = {
+    'httpx':    AsyncHTTPXTransport,
+}
@@ -93,3 +93,23 @@ def test_incomplete_token(test_config, test_data, permissions, api):
     assert api._user is None
     assert api._perm is None
 
+
+
+def test_session(test_config):
+    config = test_config['auth']['desktop']
+    with IpernityAPI(
+        config['api_key'],
+        config['api_secret'],
+        pool_size = 2,
+        timeout = (10, 60)
+    ) as api:
+        session = api.session
+        assert api.test.hello()['hello'] == 'hello world!'
+        assert api.test.echo(echo = 'Hallo')['echo'] == 'Hallo'
+        assert api.session is session
+    assert api.transport._session is None
+    
+    # A closed API object opens a new session on the next call
+    assert api.test.hello()['hello'] == 'hello world!'
+    assert api.session is not session
+    api.close()
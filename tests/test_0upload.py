@@ -1,8 +1,14 @@
 
+import asyncio
 import os
+from hashlib import md5
 
 import pytest
 
+from ipernity import IpernityAPI, UploadError
+from ipernity.aio import AsyncIpernityAPI
+from ipernity.testing import FakeIpernity
+
 
 def test_00clean(tabula_rasa, api):
     assert int(api.user.get()['user']['count']['docs']) == 0
@@ -16,3 +22,64 @@ def test_upload(images, test_data, changes):
         changes.update({'replace_docid': img['doc_id']})
 
 
+
+
+def test_ticket_results():
+    tickets = {'1': 'a.jpg', '2': 'b.jpg', '3': 'c.jpg'}
+    res = {'tickets': {'ticket': [
+        {'id': '1', 'done': '1', 'doc_id': '4711'},
+        {'id': '2', 'done': '0', 'eta': '5'},
+        {'id': '3', 'invalid': '1'},
+    ]}}
+    results, eta = IpernityAPI._ticket_results(res, tickets)
+    assert results[0] == ('a.jpg', '4711')
+    assert results[1][0] == 'c.jpg'
+    assert isinstance(results[1][1], UploadError)
+    assert tickets == {'2': 'b.jpg'}
+    assert eta == 5
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    files = []
+    for n in range(6):
+        path = str(tmp_path / f'{n}.jpg')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(1000))
+        files.append(path)
+    files.insert(2, str(tmp_path / 'nonexistent.jpg'))
+    return files
+
+
+def check_uploads(server, files, results):
+    # Every file is reported once, a missing file doesn't stop the others
+    assert sorted(filename for filename, _ in results) == sorted(files)
+    for filename, result in results:
+        if filename.endswith('nonexistent.jpg'):
+            assert isinstance(result, UploadError)
+            assert isinstance(result.__cause__, FileNotFoundError)
+        else:
+            with open(filename, 'rb') as f:
+                assert server.store.docs[result]['md5'] == md5(f.read()).hexdigest()
+
+
+def test_upload_files(upload_dir):
+    with FakeIpernity() as server:
+        server.store.ticket_delay = 0.5
+        with IpernityAPI(**server.api_args()) as api:
+            results = list(api.upload_files(upload_dir, max_workers = 2))
+        check_uploads(server, upload_dir, results)
+        
+        async def run():
+            async with AsyncIpernityAPI(**server.api_args()) as api:
+                return [r async for r in api.upload_files(upload_dir, max_workers = 2)]
+        
+        check_uploads(server, upload_dir, asyncio.run(run()))
+
+
+def test_upload_files_timeout(upload_dir):
+    with FakeIpernity() as server:
+        server.store.ticket_delay = 60
+        with IpernityAPI(**server.api_args()) as api:
+            results = dict(api.upload_files(upload_dir[:2], ticket_timeout = 0.5))
+        assert all(isinstance(r, UploadError) and r.ticket for r in results.values())
@@ -1,3 +1,13 @@
+import importlib.util
+import os
+
+import pytest
+
+import ipernity
+from ipernity import IpernityAPI, UnknownMethod
+from ipernity.method import IpernityMethod
+
+
 
 
 def test_method_list(api):
@@ -14,3 +24,24 @@ def test_method(api):
     minfo = api.api.methods.get(method = name)
     assert minfo['method']['name'] == name
 
+
+def test_generated_module():
+    # ipernity/_generated.py must be regenerated after updating methods.json
+    root = os.path.dirname(os.path.dirname(ipernity.__file__))
+    spec = importlib.util.spec_from_file_location(
+        'update_api_data',
+        os.path.join(root, 'update-api-data.py')
+    )
+    update = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(update)
+    with open(update.generated_file) as f:
+        assert f.read() == update.generate_module(update.read_methods())
+
+def test_method_objects():
+    api = IpernityAPI('key', 'secret')
+    assert isinstance(api.doc.tags, IpernityMethod)
+    assert api.doc.tags is api.doc.tags
+    assert api.doc.tags.add.__doc__
+    assert api.unknown.method is api.unknown.method
+    with pytest.raises(UnknownMethod):
+        api.unknown.method()
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from ipernity import AsyncIpernityAPI, APIRequestError, UnknownMethod
+
+
+@pytest.fixture
+def async_api(test_config, api):
+    config = test_config['auth']['desktop']
+    return AsyncIpernityAPI(
+        config['api_key'],
+        config['api_secret'],
+        api.token,
+        **test_config.get('api_args', {})
+    )
+
+
+def test_async_call(async_api, test_config):
+    async def run():
+        async with async_api:
+            hello, echo = await asyncio.gather(
+                async_api.test.hello(),
+                async_api.call('test.echo', echo = 'Hallo Echo!'),
+            )
+            assert hello['hello'] == 'hello world!'
+            assert echo['echo'] == 'Hallo Echo!'
+            
+            auth = await async_api.check_token()
+            assert auth['user']['user_id'] == test_config['user']['user_id']
+            assert async_api.user_info['username'] == test_config['user']['username']
+    
+    asyncio.run(run())
+
+
+def test_async_errors(async_api):
+    async def run():
+        async with async_api:
+            with pytest.raises(UnknownMethod):
+                await async_api.unknown.method()
+            with pytest.raises(APIRequestError):
+                await async_api.doc.get(doc_id = 1)
+    
+    asyncio.run(run())
+
+
+def test_async_walk(async_api, api):
+    async def run():
+        async with async_api:
+            return [doc['doc_id'] async for doc in async_api.walk_docs()]
+    
+    docs = asyncio.run(run())
+    assert docs == [doc['doc_id'] for doc in api.walk_docs()]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from ipernity import APIRequestError, IpernityAPI
+from ipernity.aio import AsyncIpernityAPI
+from ipernity.testing import FakeIpernity
+from ipernity.transport import AsyncInProcessTransport, InProcessTransport
+
+
+def test_batch(api, changes):
+    calls = [('doc.get', {'doc_id': doc_id}) for doc_id in changes['docs']]
+    calls.append(('doc.get', {'doc_id': 1}))
+    
+    results = list(api.batch(calls, max_workers = 4))
+    assert [index for index, _ in results] == list(range(len(calls)))
+    for (index, result), doc_id in zip(results, changes['docs']):
+        assert result['doc']['doc_id'] == doc_id
+    assert isinstance(results[-1][1], APIRequestError)
+
+
+def test_batch_unordered(api, changes):
+    calls = (
+        ('test.echo', {'echo': f'Echo {n}'})
+        for n in range(10)
+    )
+    results = dict(api.batch(calls, max_workers = 4, ordered = False))
+    assert sorted(results) == list(range(10))
+    for index, result in results.items():
+        assert result['echo'] == f'Echo {index}'
+
+
+def test_batch_exceptions():
+    # Unstarted, requests are passed in-process
+    server = FakeIpernity()
+    
+    def app(request):
+        if 'echo=html' in request.url:
+            return 200, {'Content-Type': 'text/html'}, b'<html>Maintenance</html>'
+        return server.app(request)
+    
+    calls = [('test.echo', {'echo': echo}) for echo in ('a', 'html', 'b')]
+    with IpernityAPI(**server.api_args(transport = InProcessTransport(app))) as api:
+        results = list(api.batch(calls, max_workers = 2))
+    assert [index for index, _ in results] == [0, 1, 2]
+    assert results[0][1]['echo'] == 'a'
+    assert isinstance(results[1][1], ValueError)
+    assert results[2][1]['echo'] == 'b'
+    
+    async def run():
+        api = AsyncIpernityAPI(**server.api_args(transport = AsyncInProcessTransport(app)))
+        return [result async for result in api.batch(calls, max_workers = 2)]
+    
+    results = asyncio.run(run())
+    assert isinstance(results[1][1], ValueError)
+    assert results[2][1]['echo'] == 'b'
+    server.stop()
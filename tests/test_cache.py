@@ -0,0 +1,91 @@
+import os
+import random
+
+import pytest
+
+from ipernity.cache import MemoryCache, SQLiteCache
+
+
+def test_memory_cache():
+    cache = MemoryCache(maxsize = 4)
+    cache.set('doc.get', 'doc', {'doc_id': 1}, 'token', {'doc': {'doc_id': '1'}})
+    cache.set('doc.get', 'doc', {'doc_id': 2}, 'token', {'doc': {'doc_id': '2'}})
+    cache.set('doc.getList', 'doc', {}, 'token', {'docs': {}})
+    cache.set('album.get', 'album', {'album_id': 3}, 'token', {'album': {}})
+    
+    result = cache.get('doc.get', {'doc_id': '1'}, 'token')
+    assert result == {'doc': {'doc_id': '1'}}
+    result['doc']['title'] = 'Changed'
+    assert cache.get('doc.get', {'doc_id': 1}, 'token') == {'doc': {'doc_id': '1'}}
+    assert cache.get('doc.get', {'doc_id': 1}, 'other token') is None
+    
+    # Least recently used entry is removed
+    cache.set('album.get', 'album', {'album_id': 4}, 'token', {'album': {}})
+    assert len(cache) == 4
+    assert cache.get('doc.get', {'doc_id': 2}, 'token') is None
+    
+    cache.invalidate('album.docs.add', 'album', {'album_id': 3, 'doc_id': 1})
+    assert cache.get('doc.get', {'doc_id': 1}, 'token') is None
+    assert cache.get('album.get', {'album_id': 3}, 'token') is None
+    assert cache.get('album.get', {'album_id': 4}, 'token') is not None
+    assert cache.get('doc.getList', {}, 'token') is not None
+    
+    cache.invalidate('upload.file', 'upload', {})
+    assert cache.get('doc.getList', {}, 'token') is None
+    assert len(cache) == 1
+    
+    assert cache.cacheable('doc.get')
+    assert not cache.cacheable('upload.checkTickets')
+
+
+def test_api_cache(api, changes):
+    # The api fixture is created for each test, so the cache needs no cleanup
+    api.cache = MemoryCache()
+    docid = random.choice(changes['docs'])
+    
+    doc = api.doc.get(doc_id = docid)['doc']
+    assert api.doc.get(doc_id = docid)['doc'] == doc
+    
+    api.doc.set(doc_id = docid, title = 'Cached Title')
+    assert api.doc.get(doc_id = docid)['doc']['title'] == 'Cached Title'
+    api.doc.set(doc_id = docid, title = doc['title'])
+
+
+def test_sqlite_cache(tmp_path):
+    path = os.path.join(tmp_path, 'cache.db')
+    cache = SQLiteCache(path, ttls = {'doc.getExif': 0})
+    cache.set('doc.get', 'doc', {'doc_id': 1}, 'token', {'doc': {'doc_id': '1'}})
+    cache.set('doc.getExif', 'doc', {'doc_id': 1}, 'token', {'exif': []})
+    cache.set('album.get', 'album', {'album_id': 3}, 'token', {'album': {}})
+    cache.close()
+    
+    # Entries survive reopening
+    cache = SQLiteCache(path, max_size = 1000)
+    assert cache.get('doc.get', {'doc_id': 1}, 'token') == {'doc': {'doc_id': '1'}}
+    assert cache.get('doc.get', {'doc_id': 1}, 'other token') is None
+    assert cache.stats()['expired'] == 1
+    assert cache.purge() == 1
+    
+    cache.invalidate('doc.set', 'doc', {'doc_id': 1})
+    assert cache.get('doc.get', {'doc_id': 1}, 'token') is None
+    assert len(cache) == 1
+    
+    for n in range(200):
+        cache.set('doc.get', 'doc', {'doc_id': n}, 'token', {'doc': {'doc_id': n}})
+    cache.purge()
+    assert cache.stats()['size'] <= 1000
+    
+    cache.clear('doc.*')
+    assert 'doc.get' not in cache.stats()['methods']
+    cache.close()
+
+
+def test_sqlite_cache_size(tmp_path):
+    cache = SQLiteCache(os.path.join(tmp_path, 'cache.db'), max_size = 20000)
+    for n in range(40):
+        data = {'doc': {'doc_id': n, 'title': os.urandom(2000).hex()}}
+        cache.set('doc.get', 'doc', {'doc_id': n}, 'token', data)
+        # At most one check interval and one entry above the limit
+        assert cache.stats()['size'] <= 20000 * 1.05 + 3000
+    assert cache.get('doc.get', {'doc_id': 39}, 'token') is not None
+    cache.close()
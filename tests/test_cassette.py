@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from ipernity import IpernityAPI
+from ipernity.cassette import Cassette, REDACTED
+from ipernity.exceptions import CassetteError
+from ipernity.transport import Headers, Response
+
+
+def make_response(data, status = 200):
+    return Response(
+        status,
+        'OK',
+        Headers({'Content-Type': 'application/json'}),
+        'https://api.ipernity.com/api/',
+        content = json.dumps(data).encode()
+    )
+
+
+def test_record_replay(tmp_path):
+    path = str(tmp_path / 'cassette.json.gz')
+    api = IpernityAPI('0123456789abcdef', 'fedcba9876543210', 'token-0123456789')
+    url = 'https://api.ipernity.com/api/test.echo/json'
+    
+    sent = []
+    def send(data):
+        sent.append(data)
+        return lambda: make_response(data)
+    
+    with Cassette(path, mode = 'record') as cassette:
+        for i in (1, 2):
+            data = {'echo': i, 'api': {'status': 'ok'}, 'auth': {'token': 'token-0123456789'}}
+            args = {'echo': 'x', 'api_key': api.api_key, 'api_sig': str(i)}
+            response = cassette.do_request(api, url, 'test.echo', args, send(data))
+            assert response.json()['echo'] == i
+        cassette.do_request(api, url, 'doc.get', {'doc_id': 1, 'file': b'x'}, send({'doc': 1}))
+        assert len(cassette) == 3
+    
+    with open(path, 'rb') as f:
+        assert b'0123456789' not in f.read()
+    
+    cassette = Cassette(path)
+    args = {'echo': 'x', 'api_key': 'other', 'api_sig': 'other'}
+    results = [cassette.do_request(api, url, 'test.echo', args, None).json() for _ in range(3)]
+    assert [r['echo'] for r in results] == [1, 2, 2]
+    assert results[0]['auth']['token'] == REDACTED
+    response = cassette.do_request(api, url, 'doc.get', {'doc_id': '1', 'file': b'y'}, None)
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.json() == {'doc': 1}
+    with pytest.raises(CassetteError):
+        cassette.do_request(api, url, 'doc.get', {'doc_id': '2'}, None)
+    assert len(sent) == 3
+    
+    cassette = Cassette(path, mode = 'auto')
+    cassette.do_request(api, url, 'doc.get', {'doc_id': '2'}, send({'doc': 2}))
+    assert len(sent) == 4
+    assert len(cassette) == 4
+    
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / 'missing.json'))
+    with pytest.raises(ValueError):
+        Cassette(path, mode = 'invalid')
+
+
+def test_api_cassette(api, tmp_path):
+    path = str(tmp_path / 'cassette.json')
+    with Cassette(path, mode = 'record') as cassette:
+        api.cassette = cassette
+        try:
+            result = api.test.echo(echo = 'cassette')
+        finally:
+            api.cassette = None
+    
+    replay_api = IpernityAPI('key', 'secret', cassette = Cassette(path))
+    assert replay_api.test.echo(echo = 'cassette') == result
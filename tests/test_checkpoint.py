@@ -0,0 +1,51 @@
+from ipernity.checkpoint import FileCheckpoint, MemoryCheckpoint, WalkProgress
+
+
+def walk(docs, checkpoint, per_page = 3, stop = None):
+    """Walks a list of IDs like walk_data, stopping after ``stop`` elements"""
+    progress = WalkProgress(checkpoint, 'doc.getList', 'doc', {'per_page': per_page})
+    pages = (len(docs) + per_page - 1) // per_page
+    walked = []
+    for page in range(progress.page, pages + 1):
+        progress.start_page(page)
+        elements = [{'doc_id': d} for d in docs[(page - 1) * per_page:page * per_page]]
+        for elem in progress.filter(elements):
+            if len(walked) == stop:
+                return walked
+            walked.append(elem['doc_id'])
+        progress.page_done(page, pages)
+    return walked
+
+
+def test_resume():
+    docs = [str(i) for i in range(10, 24)]
+    checkpoint = MemoryCheckpoint()
+    
+    walked = walk(docs, checkpoint, stop = 7)
+    assert walked == docs[:7]
+    assert checkpoint.load()['page'] == 2
+    
+    # Documents were added in front: the walk continues with page 2, skips
+    # the elements seen before and repeats the incomplete page
+    docs[:0] = ['1', '2']
+    assert walk(docs, checkpoint) == ['16', '17', '18', '19', '20', '21', '22', '23']
+    assert checkpoint.load() is None
+    
+    # Without a checkpoint, the walk starts at page 1
+    assert walk(docs, checkpoint) == docs
+
+
+def test_different_walk():
+    checkpoint = MemoryCheckpoint()
+    walk([str(i) for i in range(10)], checkpoint, stop = 4)
+    assert walk([str(i) for i in range(10)], checkpoint, per_page = 5) == [str(i) for i in range(10)]
+
+
+def test_file_checkpoint(tmp_path):
+    checkpoint = FileCheckpoint(str(tmp_path / 'walk.json'))
+    assert checkpoint.load() is None
+    checkpoint.save({'page': 3})
+    assert FileCheckpoint(checkpoint.path).load() == {'page': 3}
+    checkpoint.clear()
+    checkpoint.clear()
+    assert checkpoint.load() is None
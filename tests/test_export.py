@@ -0,0 +1,65 @@
+import csv
+import json
+
+import pytest
+
+from ipernity.export import export, flatten
+from ipernity.records import Doc
+
+
+def docs(n):
+    for i in range(n):
+        doc = {
+            'doc_id': str(i),
+            'title': f'Dok {i}',
+            'dates': {'created': str(1700000000 + i)},
+            'tags': [{'tag': 'a'}],
+        }
+        if i % 2:
+            doc['dates']['last_update'] = str(1700000100 + i)
+        yield doc
+
+
+def test_flatten():
+    assert flatten({'a': '1', 'b': {'c': '2', 'd': {'e': '3'}}, 'f': [1]}) == {
+        'a': '1', 'b.c': '2', 'b.d.e': '3', 'f': '[1]'
+    }
+
+
+def test_csv(tmp_path):
+    path = str(tmp_path / 'docs.csv')
+    assert export(docs(25), path, batch_size = 10) == 25
+    with open(path, newline = '', encoding = 'utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 25
+    assert list(rows[0]) == ['doc_id', 'title', 'dates.created', 'tags', 'dates.last_update']
+    assert rows[0]['dates.last_update'] == ''
+    assert rows[3]['dates.last_update'] == '1700000103'
+    assert json.loads(rows[0]['tags']) == [{'tag': 'a'}]
+    
+    # Columns that only appear after the first batch are left out
+    export(docs(3), path, batch_size = 1)
+    with open(path, newline = '', encoding = 'utf-8') as f:
+        assert f.readline().strip() == 'doc_id,title,dates.created,tags'
+    
+    with pytest.raises(ValueError):
+        export(docs(1), str(tmp_path / 'docs.xyz'))
+
+
+def test_arrow(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    
+    path = str(tmp_path / 'docs.parquet')
+    assert export(docs(25), path, batch_size = 10) == 25
+    table = pq.read_table(path)
+    assert table.num_rows == 25
+    assert table.column('dates.last_update').to_pylist()[:2] == [None, '1700000101']
+    
+    path = str(tmp_path / 'docs.arrow')
+    records = (Doc.from_data(d) for d in docs(5))
+    assert export(records, path, columns = ['doc_id', 'created']) == 5
+    with pa.ipc.open_file(path) as reader:
+        table = reader.read_all()
+    assert table.column('doc_id').to_pylist() == [0, 1, 2, 3, 4]
+    assert pa.types.is_integer(table.schema.field('created').type)
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+# Modules that must not be imported by "import ipernity"
+heavy_modules = [
+    'requests',
+    'urllib3',
+    'asyncio',
+    'httpx',
+    'concurrent.futures',
+    'readline',
+]
+
+# Upper limit for the cumulative import time of ipernity in microseconds.
+# Generous, as CI machines are slow; the module checks above are stricter.
+import_budget = 250_000
+
+
+def import_times(*args: str) -> dict:
+    """Runs Python with -X importtime, returns the cumulative import times"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        stdout = subprocess.DEVNULL,
+        stderr = subprocess.PIPE,
+        universal_newlines = True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_time():
+    times = import_times(
+        '-c',
+        'import sys, ipernity; sys.exit(ipernity.api._methods._data is not None)'
+    )
+    for module in heavy_modules:
+        assert module not in times, f'import ipernity imports {module}'
+    assert times['ipernity'] < import_budget
+
+
+def test_cli_import_time():
+    times = import_times('-m', 'ipernity', '--help')
+    for module in heavy_modules:
+        assert module not in times, f'ipernity --help imports {module}'
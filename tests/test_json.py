@@ -0,0 +1,24 @@
+import pytest
+
+from ipernity import IpernityAPI
+from ipernity.jsonlib import JSONBackend, backends, get_backend
+
+
+def test_backends():
+    data = {'docs': {'doc': [{'doc_id': '1', 'title': 'Grüße'}], 'total': 1}}
+    for name, backend in backends.items():
+        assert get_backend(name) is backend
+        assert backend.loads(b'{"docs": {"doc": [{"doc_id": "1", "title": "Gr\\u00fc\\u00dfe"}], "total": 1}}') == data
+        assert backend.loads(backend.dumps(data)) == data
+        assert backend.loads(backend.dumps(data, indent = 4)) == data
+        assert 'Grüße' in backend.dumps(data)
+    
+    assert get_backend() is next(iter(backends.values()))
+    with pytest.raises(ValueError):
+        get_backend('simplejson')
+    
+    custom = JSONBackend('custom', backends['json'].loads, backends['json'].dumps)
+    api = IpernityAPI('key', 'secret', json_backend = custom)
+    assert api.json_backend is custom
+    api.json_backend = 'json'
+    assert api.json_backend.name == 'json'
@@ -0,0 +1,61 @@
+import pytest
+
+from ipernity.exceptions import APIRequestError
+from ipernity.metrics import MetricsRegistry
+
+
+def test_registry():
+    metrics = MetricsRegistry(buckets = [1.0, 0.1])
+    with metrics.track_call('doc.get'):
+        assert metrics.snapshot()['doc.get']['calls_in_progress'] == 1
+    with pytest.raises(APIRequestError):
+        with metrics.track_call('doc.get'):
+            raise APIRequestError('error', 1, 'Doc not found')
+    metrics.count_cached('doc.get')
+    
+    with metrics.track_request('doc.get') as info:
+        info.set_response(
+            'https://api.ipernity.com/api/doc.get/json?doc_id=1',
+            {},
+            200,
+            {'Content-Length': '42'}
+        )
+    with pytest.raises(OSError):
+        with metrics.track_request('doc.get'):
+            raise OSError()
+    
+    stats = metrics.snapshot()['doc.get']
+    assert stats['calls'] == {'ok': 1, 'error': 1, 'cached': 1}
+    assert stats['errors'] == {'error/1': 1}
+    assert stats['calls_in_progress'] == 0
+    assert stats['call_duration']['count'] == 2
+    assert stats['call_duration']['buckets'] == {0.1: 2, 1.0: 2, float('inf'): 2}
+    assert stats['requests'] == {200: 1, 0: 1}
+    assert stats['request_bytes'] == len('doc_id=1')
+    assert stats['response_bytes'] == 42
+    
+    text = metrics.prometheus()
+    assert '# TYPE ipernity_calls_total counter\n' in text
+    assert 'ipernity_calls_total{method="doc.get",outcome="cached"} 1\n' in text
+    assert 'ipernity_call_errors_total{method="doc.get",status="error",code="1"} 1\n' in text
+    assert 'ipernity_call_duration_seconds_bucket{method="doc.get",le="+Inf"} 2\n' in text
+    assert 'ipernity_requests_total{method="doc.get",status="0"} 1\n' in text
+    assert 'ipernity_response_bytes_total{method="doc.get"} 42\n' in text
+    
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_api_metrics(api):
+    api.metrics = MetricsRegistry()
+    try:
+        api.test.hello()
+        with pytest.raises(APIRequestError):
+            api.doc.get(doc_id = 1)
+        stats = api.metrics.snapshot()
+    finally:
+        api.metrics = None
+    assert stats['test.hello']['calls'] == {'ok': 1}
+    assert stats['test.hello']['requests'] == {200: 1}
+    assert stats['test.hello']['response_bytes'] > 0
+    assert stats['doc.get']['calls'] == {'error': 1}
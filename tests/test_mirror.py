@@ -0,0 +1,131 @@
+import pytest
+
+from ipernity.mirror import Mirror
+
+
+class AccountData:
+    """Stands in for the walk methods of the API object"""
+    
+    user_info = {'user_id': '1'}
+    
+    def __init__(self):
+        self.docs = {
+            str(i): {'doc_id': str(i), 'title': f'Doc {i}', 'dates': {'last_update': '100'}}
+            for i in range(1, 6)
+        }
+        self.albums = {'10': {'album_id': '10', 'count': {'docs': '2'}}}
+        self.album_docs = {'10': ['3', '1']}
+        self.folders = {'20': {'folder_id': '20', 'count': {'albums': '1'}}}
+        self.folder_albums = {'20': ['10']}
+        self.calls = []
+        self.fail = set()
+    
+    def walk_docs(self, **kwargs):
+        self.calls.append('walk_docs')
+        return list(self.docs.values())
+    
+    def walk_doc_search(self, updated_min, **kwargs):
+        self.calls.append('walk_doc_search')
+        return [d for d in self.docs.values() if int(d['dates']['last_update']) >= updated_min]
+    
+    @property
+    def doc(self):
+        return self
+    
+    def getList(self, **kwargs):
+        self.calls.append('doc.getList')
+        return {'docs': {'total': str(len(self.docs))}}
+    
+    def walk_albums(self, **kwargs):
+        return list(self.albums.values())
+    
+    def walk_album_docs(self, album_id, **kwargs):
+        self.calls.append(f'walk_album_docs {album_id}')
+        if album_id in self.fail:
+            raise RuntimeError(f'Album {album_id} failed')
+        return [self.docs[d] for d in self.album_docs[album_id]]
+    
+    def walk_folders(self, **kwargs):
+        return list(self.folders.values())
+    
+    def walk_folder_albums(self, folder_id, **kwargs):
+        self.calls.append(f'walk_folder_albums {folder_id}')
+        return [self.albums[a] for a in self.folder_albums[folder_id]]
+
+
+def test_mirror(tmp_path):
+    account = AccountData()
+    with Mirror(account, str(tmp_path / 'mirror.db'), margin = 0) as mirror:
+        stats = mirror.sync()
+        assert stats == {'docs': 5, 'albums': 1, 'folders': 1, 'deleted': 0}
+        assert [d['doc_id'] for d in mirror.docs()] == ['1', '2', '3', '4', '5']
+        assert [d['doc_id'] for d in mirror.album_docs('10')] == ['3', '1']
+        assert [a['album_id'] for a in mirror.folder_albums('20')] == ['10']
+        assert [a['album_id'] for a in mirror.doc_albums('3')] == ['10']
+        assert mirror.last_sync is not None
+        
+        # Nothing changed: no document lists or album contents are fetched
+        account.calls.clear()
+        mirror._set_state('last_sync', 1000)
+        assert mirror.sync() == {'docs': 0, 'albums': 0, 'folders': 0, 'deleted': 0}
+        assert account.calls == ['walk_doc_search', 'doc.getList']
+        
+        # Changed and deleted documents, changed album
+        account.docs['2'] = {'doc_id': '2', 'title': 'New', 'dates': {'last_update': '2000'}}
+        del account.docs['5']
+        account.albums['10'] = {'album_id': '10', 'count': {'docs': '3'}}
+        account.album_docs['10'] = ['2', '3', '1']
+        account.calls.clear()
+        mirror._set_state('last_sync', 1000)
+        assert mirror.sync() == {'docs': 1, 'albums': 1, 'folders': 0, 'deleted': 1}
+        assert 'walk_album_docs 10' in account.calls
+        assert mirror.doc('2')['title'] == 'New'
+        assert mirror.doc('5') is None
+        assert [d['doc_id'] for d in mirror.album_docs('10')] == ['2', '3', '1']
+        
+        # Deleted album
+        del account.albums['10']
+        account.folder_albums['20'] = []
+        account.folders['20'] = {'folder_id': '20', 'count': {'albums': '0'}}
+        mirror.sync()
+        assert list(mirror.albums()) == []
+        assert list(mirror.album_docs('10')) == []
+        assert list(mirror.folder_albums('20')) == []
+
+
+def test_mirror_member_error(tmp_path):
+    account = AccountData()
+    with Mirror(account, str(tmp_path / 'mirror.db'), margin = 0) as mirror:
+        mirror.sync()
+        
+        # The album is fetched again after its contents failed
+        account.albums['10'] = {'album_id': '10', 'count': {'docs': '3'}}
+        account.album_docs['10'] = ['2', '3', '1']
+        account.fail.add('10')
+        mirror._set_state('last_sync', 1000)
+        with pytest.raises(RuntimeError):
+            mirror.sync()
+        assert [a['count']['docs'] for a in mirror.albums()] == ['2']
+        assert [d['doc_id'] for d in mirror.album_docs('10')] == ['3', '1']
+        
+        account.fail.clear()
+        assert mirror.sync()['albums'] == 1
+        assert [d['doc_id'] for d in mirror.album_docs('10')] == ['2', '3', '1']
+        
+        # A full sync fetches the contents of all albums and folders
+        account.album_docs['10'] = ['1']
+        account.calls.clear()
+        assert mirror.sync(full = True)['albums'] == 0
+        assert 'walk_album_docs 10' in account.calls
+        assert 'walk_folder_albums 20' in account.calls
+        assert [d['doc_id'] for d in mirror.album_docs('10')] == ['1']
+
+
+def test_mirror_live(api, images, tmp_path):
+    with Mirror(api, str(tmp_path / 'mirror.db')) as mirror:
+        stats = mirror.sync()
+        assert stats['docs'] >= len(images)
+        for img in images:
+            assert mirror.doc(img['doc_id']) is not None
+        stats = mirror.sync()
+        assert stats['deleted'] == 0
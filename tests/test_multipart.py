@@ -0,0 +1,60 @@
+import email.parser
+import io
+import mmap
+
+from ipernity.multipart import MultipartEncoder
+
+
+def parse(encoder: MultipartEncoder, body: bytes) -> dict:
+    msg = email.parser.BytesParser().parsebytes(
+        f'Content-Type: {encoder.content_type}\r\n\r\n'.encode('ascii') + body
+    )
+    return {
+        part.get_param('name', header = 'content-disposition'): part
+        for part in msg.get_payload()
+    }
+
+
+def test_multipart(tmp_path):
+    data = bytes(range(256)) * 1000
+    path = tmp_path / 'test.jpg'
+    path.write_bytes(data)
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+        for file, filename in [
+            (str(path), 'test.jpg'),
+            (io.BytesIO(data), 'file'),
+            (('bild.png', data), 'bild.png'),
+            (mm, 'file'),
+        ]:
+            progress = []
+            encoder = MultipartEncoder(
+                {'title': 'Grüße', 'api_key': 'key'},
+                'file',
+                file,
+                progress = lambda *args: progress.append(args),
+                chunk_size = 10000
+            )
+            body = b''.join(encoder)
+            assert len(body) == encoder.length
+            parts = parse(encoder, body)
+            assert parts['title'].get_payload(decode = True).decode('utf-8') == 'Grüße'
+            assert parts['file'].get_filename() == filename
+            assert parts['file'].get_payload(decode = True) == data
+            assert len(progress) == 26
+            assert progress[-1][:2] == (len(data), len(data))
+
+
+def test_multipart_unknown_size():
+    class Stream(io.RawIOBase):
+        def __init__(self):
+            self.data = io.BytesIO(b'x' * 100)
+        def readable(self):
+            return True
+        def read(self, size = -1):
+            return self.data.read(size)
+    
+    encoder = MultipartEncoder({}, 'file', Stream())
+    assert encoder.length is None
+    parts = parse(encoder, b''.join(encoder))
+    assert parts['file'].get_payload(decode = True) == b'x' * 100
@@ -0,0 +1,32 @@
+import json
+
+from ipernity.api import methodsfile
+from ipernity.pagination import Pagination, descriptors, get_pagination, guess_pagination
+
+# List methods that return all elements at once
+unpaginated = {'api.methods.getList', 'doc.tags.getList', 'tags.user.getList'}
+
+
+def test_descriptors():
+    with open(methodsfile, 'r') as f:
+        methods = json.load(f)
+    listing = {
+        name for name in methods
+        if name.endswith('.getList') or name.endswith('.search')
+    }
+    assert set(descriptors) <= set(methods)
+    assert listing - unpaginated == set(descriptors)
+    for desc in descriptors.values():
+        assert desc.max_per_page
+
+
+def test_get_pagination():
+    assert get_pagination('group.getList') == Pagination(('groups',), 'group', 100)
+    assert get_pagination('album.docs.getList').list_keys == ('album', 'docs')
+    assert guess_pagination('album.docs.getList') == Pagination(('album', 'docs'), 'doc')
+    assert guess_pagination('foo.getList') == Pagination(('foos',), 'foo')
+    
+    # elem_name overrides the keys, not the page size
+    assert get_pagination('doc.getList', 'item') == Pagination(('items',), 'item', 100)
+    assert get_pagination('doc.getList', 'a.b.c') == Pagination(('a', 'b'), 'c', 100)
+    assert get_pagination('foo.bars.getList', 'a.b') == Pagination(('a',), 'b')
@@ -0,0 +1,55 @@
+import os
+from time import monotonic
+
+import pytest
+
+from ipernity.ratelimit import FileBucketStore, MemoryBucketStore, RateLimiter
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(10, families = {'upload.*': (1, 2)})
+    
+    # The burst is available immediately
+    assert [limiter.reserve('key', 'doc.get') for _ in range(10)] == [0] * 10
+    assert limiter.reserve('key', 'doc.get') > 0
+    
+    # Other API keys have their own buckets
+    assert limiter.reserve('key2', 'doc.get') == 0
+    
+    assert limiter.reserve('key2', 'upload.file') == 0
+    assert limiter.reserve('key2', 'upload.file') == 0
+    assert limiter.reserve('key2', 'upload.file') == pytest.approx(1, abs = 0.1)
+    
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_key_rates():
+    limiter = RateLimiter((1, 1), keys = {'fast': (10, 3), 'free': None})
+    
+    assert limiter.reserve('slow', 'doc.get') == 0
+    assert limiter.reserve('slow', 'doc.get') == pytest.approx(1, abs = 0.1)
+    
+    assert [limiter.reserve('fast', 'doc.get') for _ in range(3)] == [0] * 3
+    assert limiter.reserve('fast', 'doc.get') == pytest.approx(0.1, abs = 0.05)
+    
+    assert [limiter.reserve('free', 'doc.get') for _ in range(20)] == [0] * 20
+    
+    with pytest.raises(ValueError):
+        RateLimiter(1, keys = {'key': 0})
+
+
+def test_file_bucket_store(tmp_path):
+    path = os.path.join(tmp_path, 'limit')
+    limiter1 = RateLimiter((5, 1), store = FileBucketStore(path))
+    limiter2 = RateLimiter((5, 1), store = FileBucketStore(path))
+    assert limiter1.reserve('key', 'doc.get') == 0
+    assert limiter2.reserve('key', 'doc.get') == pytest.approx(0.2, abs = 0.05)
+
+
+def test_api_rate_limit(api):
+    api.rate_limiter = RateLimiter((4, 1))
+    start = monotonic()
+    for _ in range(5):
+        api.test.hello()
+    assert monotonic() - start >= 0.9
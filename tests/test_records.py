@@ -0,0 +1,49 @@
+import pytest
+
+from ipernity.records import Doc, record_type, to_bool, to_int
+
+
+def test_from_data():
+    data = {
+        'doc_id': '4711',
+        'title': 'Tischdecke',
+        'visibility': {'ispublic': '0'},
+        'dates': {'created': '1700000000', 'last_update': ''},
+        'geo': {'lat': '48.1', 'lng': 'x'},
+    }
+    doc = Doc.from_data(data)
+    assert doc.doc_id == 4711
+    assert doc.title == 'Tischdecke'
+    assert doc.ispublic is False
+    assert doc.created == 1700000000
+    assert doc.last_update is None      # empty
+    assert doc.posted_at is None        # missing
+    assert doc.lat == 48.1
+    assert doc.lng is None              # invalid
+    assert not hasattr(doc, '__dict__')
+    with pytest.raises(AttributeError):
+        doc.other = 1
+    assert doc == Doc.from_data(data)
+    assert doc.as_dict()['doc_id'] == 4711
+
+
+def test_project():
+    DocId = Doc.project('doc_id', 'title')
+    assert Doc.project('doc_id', 'title') is DocId
+    doc = DocId.from_data({'doc_id': '1', 'title': 'A', 'media': 'photo'})
+    assert tuple(doc) == (1, 'A')
+    assert repr(doc) == "Doc(doc_id=1, title='A')"
+    assert doc == DocId(doc_id = 1, title = 'A')
+    assert doc != Doc.from_data({'doc_id': '1', 'title': 'A'})
+    with pytest.raises(ValueError):
+        Doc.project('doc_id', 'size')
+
+
+def test_record_type():
+    Tag = record_type('Tag', {'tag': 'tag', 'uses': ('count.uses', to_int), 'mine': ('mine', to_bool)})
+    tag = Tag.from_data({'tag': 'blume', 'count': {'uses': '3'}, 'mine': '1'})
+    assert tuple(tag) == ('blume', 3, True)
+    same = Tag.from_data({'tag': 'blume', 'count': {'uses': '3'}, 'mine': '1'})
+    assert len({tag, same}) == 1
+    with pytest.raises(TypeError):
+        Tag(name = 'x')
@@ -0,0 +1,39 @@
+import pytest
+
+from ipernity import IpernityAPI, APIRequestError
+from ipernity.retry import RetryPolicy
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_attempts = 3, backoff = 1, jitter = False)
+    assert policy.delay(1) == 1
+    assert policy.delay(2, 503) == 2
+    assert policy.delay(3, 503) is None
+    assert policy.delay(1, 404) is None
+    assert policy.delay(1, 429, '10') == 10
+    assert policy.delay(1, 429, 'Wed, 21 Oct 2015 07:28:00 GMT') == 1
+    assert policy.delay(1, 429, '3600') is None
+    
+    policy = RetryPolicy(backoff = 1, max_backoff = 2)
+    for attempt in range(1, 3):
+        assert 0 <= policy.delay(attempt) <= 2
+
+
+def test_read_methods():
+    assert IpernityAPI.is_read_method('doc.get')
+    assert IpernityAPI.is_read_method('album.docs.getList')
+    assert not IpernityAPI.is_read_method('doc.set')
+    assert not IpernityAPI.is_read_method('upload.file')
+
+
+def test_network_error():
+    api = IpernityAPI(
+        'key',
+        'secret',
+        url = 'http://127.0.0.1:1/api/',
+        retry = RetryPolicy(max_attempts = 2, backoff = 0.01)
+    )
+    with pytest.raises(APIRequestError) as e:
+        api.test.hello()
+    assert e.value.status == 'httperror'
+    assert e.value.code == 0
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from ipernity.stream import ListStreamParser
+
+
+def test_stream_parser():
+    data = {
+        'docs': {
+            'page': '1',
+            'pages': '3',
+            'doc': [{'doc_id': str(i), 'title': f'Dok ü {i}', 'n': i * 1.5} for i in range(20)],
+            'total': '60',
+        },
+        'api': {'status': 'ok'},
+    }
+    raw = json.dumps(data, ensure_ascii = False, indent = 1).encode('utf-8')
+    for size in (1, 3, 7, len(raw)):
+        parser = ListStreamParser(['docs', 'doc'])
+        docs = []
+        for i in range(0, len(raw), size):
+            docs.extend(parser.feed(raw[i:i+size]))
+        docs.extend(parser.close())
+        assert docs == data['docs']['doc']
+        assert parser.result['docs'] == {'page': '1', 'pages': '3', 'total': '60'}
+        assert parser.result['api'] == data['api']
+    
+    # Error responses don't contain the list
+    parser = ListStreamParser(['docs', 'doc'])
+    assert parser.feed(b'{"api": {"status": "error", "code": "1"}}') == []
+    assert parser.close() == []
+    assert parser.result['api']['code'] == '1'
+    
+    parser = ListStreamParser(['docs', 'doc'])
+    parser.feed(b'{"docs": {"doc": [{"doc_id": "1"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_walk_stream(api, changes):
+    albid = changes['albums'][0]
+    docs = [doc['doc_id'] for doc in api.walk_album_docs(albid, per_page = 1)]
+    assert docs == [
+        doc['doc_id']
+        for doc in api.walk_album_docs(albid, per_page = 1, stream = True)
+    ]
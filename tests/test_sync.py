@@ -0,0 +1,138 @@
+import json
+import os
+from hashlib import md5
+
+from ipernity import IpernityAPI
+from ipernity.sync import EXISTS, MISSING, UPLOADED, HashCache, file_md5, find_files
+from ipernity.testing import FakeIpernity
+from ipernity.transport import InProcessTransport
+
+
+def test_find_files(tmp_path):
+    for name in ['a.jpg', 'b.JPG', 'c.txt', '.hidden.jpg', 'sub/d.jpg', '.git/e.jpg']:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok = True)
+        path.write_bytes(name.encode('ascii'))
+    
+    names = [
+        os.path.relpath(f, tmp_path)
+        for f in find_files(str(tmp_path), ['*.jpg', '*.JPG'])
+    ]
+    assert names == ['a.jpg', 'b.JPG', os.path.join('sub', 'd.jpg')]
+    assert len(list(find_files(str(tmp_path), recursive = False))) == 3
+
+
+def test_hash_cache(tmp_path):
+    filename = str(tmp_path / 'a.jpg')
+    with open(filename, 'wb') as f:
+        f.write(b'Tischdecke')
+    
+    cache = HashCache(str(tmp_path / 'hashes.json'))
+    assert cache.md5(filename) == file_md5(filename)
+    cache.save()
+    
+    # The cached hash is used while size and mtime are unchanged
+    cache = HashCache(str(tmp_path / 'hashes.json'))
+    cache._data[os.path.abspath(filename)][2] = 'cached'
+    assert cache.md5(filename) == 'cached'
+    with open(filename, 'wb') as f:
+        f.write(b'Tischdecke 2')
+    assert cache.md5(filename) == file_md5(filename)
+
+
+def test_sync_directory(api, images):
+    results = list(api.sync_directory(
+        os.path.dirname(__file__),
+        patterns = ['tischdecke*.jpg'],
+        dry_run = True
+    ))
+    docs = {img['filename']: img['doc_id'] for img in images}
+    assert results
+    for result in results:
+        name = os.path.basename(result.filename)
+        if name in docs:
+            assert result.status == EXISTS
+            assert result.doc_id == docs[name]
+
+
+def test_sync_directory_offline(tmp_path):
+    server = FakeIpernity()
+    files = {}
+    for n in range(120):
+        content = os.urandom(100)
+        files[str(tmp_path / f'{n:03}.jpg')] = content
+        (tmp_path / f'{n:03}.jpg').write_bytes(content)
+    (tmp_path / 'copy.jpg').write_bytes(files[str(tmp_path / '000.jpg')])
+    existing = {
+        server.store.add_doc('1', files[str(tmp_path / f'{n:03}.jpg')])['doc_id']
+        for n in range(0, 120, 3)
+    }
+    
+    methods = []
+    def app(request):
+        methods.append(request.url.split('/api/')[1].split('/')[0])
+        return server.app(request)
+    
+    api = IpernityAPI(**server.api_args(transport = InProcessTransport(app)))
+    results = list(api.sync_directory(str(tmp_path), dry_run = True))
+    assert len(results) == 121
+    assert {r.doc_id for r in results if r.status == EXISTS} == existing
+    assert sum(r.status == EXISTS for r in results) == 41
+    assert sum(r.status == MISSING for r in results) == 80
+    # 120 unique hashes in chunks of 50
+    assert methods.count('doc.checkMD5') == 3
+    
+    results = api.sync_directory(str(tmp_path), hash_workers = 1)
+    next(results)
+    results.close()
+    
+    results = list(api.sync_directory(str(tmp_path)))
+    assert sum(r.status == UPLOADED for r in results) == 80
+    assert len({r.doc_id for r in results}) == 120
+    server.stop()
+
+
+def test_sync_directory_verify(tmp_path):
+    server = FakeIpernity()
+    server.store.add_user('2', 'Other User')
+    contents = [os.urandom(100) for n in range(4)]
+    for n, content in enumerate(contents):
+        (tmp_path / f'{n}.jpg').write_bytes(content)
+    own = server.store.add_doc('1', contents[0])['doc_id']
+    other = server.store.add_doc('2', contents[1])['doc_id']
+    deleted = server.store.add_doc('1', contents[2])['doc_id']
+    
+    # doc.checkMD5 returns deleted documents, documents of other users and
+    # entries without md5
+    def app(request):
+        status, headers, body = server.app(request)
+        if '/doc.checkMD5/' in request.url:
+            data = json.loads(body)
+            data['docs']['doc'] = [
+                {'doc_id': own},
+                {'doc_id': other, 'md5': md5(contents[1]).hexdigest()},
+                {'doc_id': deleted, 'md5': md5(contents[2]).hexdigest()},
+            ]
+            body = json.dumps(data).encode('utf-8')
+        return status, headers, body
+    
+    del server.store.docs[deleted]
+    api = IpernityAPI(**server.api_args(transport = InProcessTransport(app)))
+    for verify in (True, False):
+        results = {
+            os.path.basename(r.filename): r
+            for r in api.sync_directory(str(tmp_path), dry_run = True, verify = verify)
+        }
+        assert results['0.jpg'].status == EXISTS
+        assert results['0.jpg'].doc_id == own
+        assert results['3.jpg'].status == MISSING
+    assert results['1.jpg'].status == EXISTS
+    assert results['2.jpg'].status == EXISTS
+    
+    results = {
+        os.path.basename(r.filename): r
+        for r in api.sync_directory(str(tmp_path), dry_run = True)
+    }
+    assert results['1.jpg'].status == MISSING
+    assert results['2.jpg'].status == MISSING
+    server.stop()
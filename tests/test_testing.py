@@ -0,0 +1,112 @@
+from hashlib import md5
+
+import pytest
+import requests
+
+from ipernity import APIRequestError, IpernityAPI
+from ipernity.auth import api_signature
+from ipernity.testing import FakeIpernity
+
+
+@pytest.fixture
+def server():
+    with FakeIpernity() as server:
+        yield server
+
+
+@pytest.fixture
+def fake_api(server):
+    with IpernityAPI(**server.api_args()) as api:
+        yield api
+
+
+def test_signature(server, fake_api):
+    params = {'doc_id': 1, 'api_key': 'key', 'file': 'ignored'}
+    expected = md5(b'api_keykeydoc_id1doc.getsecret').hexdigest()
+    assert api_signature(params, 'secret', 'doc.get') == expected
+    
+    assert fake_api.test.echo(echo = 'Hallo')['echo'] == 'Hallo'
+    with IpernityAPI(**server.api_args(api_secret = 'wrong')) as api:
+        with pytest.raises(APIRequestError) as excinfo:
+            api.doc.getList()
+        assert excinfo.value.code == 101
+    with IpernityAPI(**server.api_args(api_key = 'unknown')) as api:
+        with pytest.raises(APIRequestError) as excinfo:
+            api.test.hello()
+        assert excinfo.value.code == 100
+    with IpernityAPI(server.api_key, server.api_secret, url = server.url) as api:
+        with pytest.raises(APIRequestError) as excinfo:
+            api.album.create(title = 'No token')
+        assert excinfo.value.code == 102
+
+
+def test_auth_flow(server):
+    with IpernityAPI(
+        server.api_key,
+        server.api_secret,
+        url = server.url,
+        auth_url_base = server.auth_url_base
+    ) as api:
+        frob = api.auth.getFrob()['auth']['frob']
+        assert requests.get(api.auth.auth_url({'doc': 'write'}, frob)).status_code == 200
+        auth = api.auth.getToken(frob)['auth']
+        assert auth['permissions'] == {'doc': 'write'}
+        assert api.auth.checkToken(auth['token'])['auth']['user']['user_id'] == '1'
+
+
+def test_docs(server, fake_api):
+    server.store.ticket_delay = 0.5
+    doc_id = fake_api.upload_file(
+        'tests/tischdecke.jpg',
+        title = 'Tischdecke',
+        keywords = 'tisch,decke'
+    )
+    doc = fake_api.doc.get(doc_id = doc_id, extra = 'md5,tags')['doc']
+    assert doc['title'] == 'Tischdecke'
+    assert [t['tag'] for t in doc['tags']['tag']] == ['tisch', 'decke']
+    assert fake_api.doc.checkMD5(md5 = doc['md5'])['docs']['doc'][0]['doc_id'] == doc_id
+    
+    fake_api.doc.set(doc_id = doc_id, title = 'Neu')
+    assert fake_api.doc.get(doc_id = doc_id)['doc']['title'] == 'Neu'
+    
+    comment_id = fake_api.doc.comments.add(doc_id = doc_id, content = 'Schön')['comment']['comment_id']
+    comments = fake_api.doc.comments.getList(doc_id = doc_id)['doc']['comments']
+    assert comments['comment'][0]['comment_id'] == comment_id
+    
+    fake_api.doc.delete(doc_id = doc_id)
+    with pytest.raises(APIRequestError):
+        fake_api.doc.get(doc_id = doc_id)
+
+
+def test_walk(server, fake_api):
+    server.store.populate(docs = 250, albums = 2)
+    docs = list(fake_api.walk_docs(per_page = 30))
+    assert len(docs) == 250
+    assert len({d['doc_id'] for d in docs}) == 250
+    assert len(list(fake_api.walk_docs(prefetch = 3))) == 250
+    
+    albums = list(fake_api.walk_albums())
+    assert len(albums) == 2
+    album_docs = list(fake_api.walk_album_docs(albums[0]['album_id']))
+    assert len(album_docs) == 125
+    
+    folder = fake_api.folder.create(title = 'Ordner')['folder']
+    fake_api.folder.albums.add(folder_id = folder['folder_id'], album_id = albums[1]['album_id'])
+    assert [a['album_id'] for a in fake_api.walk_folder_albums(folder['folder_id'])] == [albums[1]['album_id']]
+
+
+def test_faults():
+    with FakeIpernity(error_rate = 1) as server:
+        with IpernityAPI(**server.api_args()) as api:
+            with pytest.raises(APIRequestError) as excinfo:
+                api.test.hello()
+            assert excinfo.value.status == 'httperror'
+        assert server.stats['errors'] == 1
+    
+    with FakeIpernity(rate_limit = 2) as server:
+        with IpernityAPI(**server.api_args()) as api:
+            api.test.hello()
+            api.test.hello()
+            with pytest.raises(APIRequestError):
+                api.test.hello()
+        assert server.stats == {'requests': 3, 'errors': 0, 'throttled': 1}
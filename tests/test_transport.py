@@ -0,0 +1,108 @@
+import asyncio
+import io
+
+import pytest
+
+from ipernity import APIRequestError, IpernityAPI
+from ipernity.aio import AsyncIpernityAPI
+from ipernity.exceptions import TransportError
+from ipernity.testing import FakeIpernity
+from ipernity.transport import (
+    AsyncInProcessTransport, Headers, InProcessTransport, Response, transports
+)
+
+
+@pytest.fixture
+def server():
+    with FakeIpernity() as server:
+        server.store.populate(docs = 120)
+        yield server
+
+
+@pytest.fixture(params = [*transports, 'in-process'])
+def transport(request, server):
+    if request.param == 'in-process':
+        return InProcessTransport(server.app)
+    return request.param
+
+
+def test_transport(server, transport):
+    with IpernityAPI(**server.api_args(transport = transport, timeout = (5, 30))) as api:
+        assert api.test.echo(echo = 'Hallo')['echo'] == 'Hallo'
+        docs = list(api.walk_docs())
+        assert list(api.walk_docs(stream = True)) == docs
+        
+        # Multipart upload, with unknown length (chunked) and known length
+        result = api.upload.file(file = ('a.jpg', io.BufferedReader(io.BytesIO(b'x' * 70000))))
+        assert result['ticket']
+        result = api.upload.file(file = ('b.jpg', b'y' * 100), title = 'B')
+        assert result['ticket']
+        
+        with pytest.raises(APIRequestError) as excinfo:
+            api.doc.get(doc_id = 0)
+        assert excinfo.value.status != 'httperror'
+        
+        # Transports can be used after closing
+        api.close()
+        assert api.test.echo(echo = 'again')['echo'] == 'again'
+
+
+def test_errors(server):
+    server.error_rate = 1
+    try:
+        with IpernityAPI(**server.api_args(transport = 'urllib3')) as api:
+            with pytest.raises(APIRequestError) as excinfo:
+                api.test.echo(echo = 'x')
+            assert excinfo.value.code == 503
+    finally:
+        server.error_rate = 0
+    
+    with IpernityAPI('key', 'secret', url = 'http://127.0.0.1:1/api/', transport = 'urllib3') as api:
+        with pytest.raises(APIRequestError) as excinfo:
+            api.test.echo(echo = 'x')
+        assert excinfo.value.code == 0
+        assert isinstance(excinfo.value.__cause__, TransportError)
+    
+    with pytest.raises(ValueError):
+        IpernityAPI('key', 'secret', transport = 'invalid')
+
+
+def test_async(server):
+    async def run(transport):
+        async with AsyncIpernityAPI(**server.api_args(transport = transport)) as api:
+            assert (await api.test.echo(echo = 'Hallo'))['echo'] == 'Hallo'
+            docs = [doc async for doc in api.walk_docs(stream = True)]
+            result = await api.upload.file(file = ('c.jpg', b'z' * 1000))
+            return len(docs), bool(result['ticket'])
+    
+    assert asyncio.run(run(None)) == (120, True)
+    # Including the upload of the first run
+    assert asyncio.run(run(AsyncInProcessTransport(server.app))) == (121, True)
+
+
+def test_response():
+    response = Response(
+        404,
+        'Not Found',
+        Headers({'Content-Type': 'application/json'}),
+        'http://localhost/',
+        stream = lambda size: iter([b'{"a"', b': 1}'])
+    )
+    assert response.headers['content-type'] == 'application/json'
+    assert not response.ok
+    assert response.json() == {'a': 1}
+    assert list(response.iter_content(3)) == [b'{"a', b'": ', b'1}']
+    with pytest.raises(TransportError):
+        response.raise_for_status()
+
+
+@pytest.mark.parametrize('name', list(transports))
+def test_concurrent_creation(name):
+    from concurrent.futures import ThreadPoolExecutor
+    
+    transport = transports[name]()
+    attr = {'requests': 'session', 'httpx': 'client', 'urllib3': 'pool'}[name]
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        created = set(executor.map(lambda _: id(getattr(transport, attr)), range(64)))
+    assert len(created) == 1
+    transport.close()
@@ -1,6 +1,9 @@
 
 import pytest
 
+from ipernity.checkpoint import FileCheckpoint
+from ipernity.records import Doc
+
 def test_walk_albums(api, test_config):
     n = 0
     for album in api.walk_albums():
@@ -18,6 +21,39 @@ def test_walk_album_docs(api, changes):
         n += 1
     assert n == len(changes['docs'])
 
+def test_walk_prefetch(api, changes):
+    albid = changes['albums'][0]
+    docs = [doc['doc_id'] for doc in api.walk_album_docs(albid, per_page = 1)]
+    assert docs == [
+        doc['doc_id']
+        for doc in api.walk_album_docs(albid, per_page = 1, prefetch = 4)
+    ]
+
+def test_walk_records(api, changes):
+    albid = changes['albums'][0]
+    docs = [int(doc['doc_id']) for doc in api.walk_album_docs(albid)]
+    records = list(api.walk_album_docs(albid, record = Doc.project('doc_id', 'title')))
+    assert [doc.doc_id for doc in records] == docs
+
+
+def test_walk_checkpoint(api, changes, tmp_path):
+    albid = changes['albums'][0]
+    docs = [doc['doc_id'] for doc in api.walk_album_docs(albid, per_page = 1)]
+    checkpoint = FileCheckpoint(str(tmp_path / 'walk.json'))
+    walked = []
+    for doc in api.walk_album_docs(albid, per_page = 1, checkpoint = checkpoint):
+        walked.append(doc['doc_id'])
+        if len(walked) == 2:
+            break
+    # The first page is complete, the second one is walked again
+    assert checkpoint.load()['page'] == 1
+    walked = walked[:1] + [
+        doc['doc_id']
+        for doc in api.walk_album_docs(albid, per_page = 1, checkpoint = checkpoint)
+    ]
+    assert walked == docs
+    assert checkpoint.load() is None
+
 
 @pytest.mark.skip('Does not work - need a better test case')
 def test_walk_doc_search(api, changes):
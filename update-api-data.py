@@ -1,10 +1,27 @@
-"""Regenerates the method list"""
+"""
+Regenerates the method list and the generated method module
+
+Usage::
+    
+    python update-api-data.py [--no-fetch]
+
+With ``--no-fetch``, only ``ipernity/_generated.py`` is regenerated from the
+existing ``ipernity/methods.json``.
+"""
 
 import json
 import os
+from argparse import ArgumentParser
 
 import requests
 
+package_dir = os.path.join(os.path.dirname(__file__), 'ipernity')
+methods_file = os.path.join(package_dir, 'methods.json')
+generated_file = os.path.join(package_dir, '_generated.py')
+
+# Top-level namespaces that are attributes of IpernityAPI already
+reserved = {'auth'}
+
 
 def sorted_dict(data: dict) -> dict:
     return {
@@ -13,26 +30,140 @@ def sorted_dict(data: dict) -> dict:
     }
 
 
-res = requests.get('http://api.ipernity.com/api/api.methods.getList/json')
+def fetch_methods() -> dict:
+    res = requests.get('http://api.ipernity.com/api/api.methods.getList/json')
+    
+    methods = sorted(
+        res.json()['methods']['method'],
+        key = lambda x: x['name']
+    )
+    
+    return {
+        m['name']: sorted_dict(m)
+        for m in methods
+    }
+
+
+def write_methods(methods: dict):
+    with open(methods_file, 'w') as df:
+        json.dump(methods, df, indent = 4)
+
+
+def read_methods() -> dict:
+    with open(methods_file, 'r') as mf:
+        return json.load(mf)
+
+
+def class_name(namespace: str) -> str:
+    return '_' + ''.join(p[0].upper() + p[1:] for p in namespace.split('.'))
+
 
-methods = sorted(
-    res.json()['methods']['method'],
-    key = lambda x: x['name']
-)
+def docstring(lines: list, indent: str) -> list:
+    return [f'{indent}"""'] + [
+        (indent + line.replace('\\', '\\\\').replace('"""', '\\"\\"\\"')).rstrip() or indent
+        for line in lines
+    ] + [f'{indent}"""']
 
-destfile = os.path.join(
-    os.path.dirname(__file__),
-    'ipernity',
-    'methods.json'
-)
 
-methods2 = {
-    m['name']: sorted_dict(m)
-    for m in methods
-}
+def generate_module(methods: dict) -> str:
+    """Creates the source of ipernity/_generated.py"""
+    # Children of each namespace: name -> full name, namespace flag
+    tree = {'': {}}
+    for name in methods:
+        parts = name.split('.')
+        for i in range(1, len(parts) + 1):
+            parent = '.'.join(parts[:i-1])
+            full = '.'.join(parts[:i])
+            is_namespace = i < len(parts)
+            tree.setdefault(parent, {})[parts[i-1]] = (full, is_namespace)
+            if is_namespace:
+                tree.setdefault(full, {})
+    
+    lines = [
+        '"""',
+        'Generated Method Classes',
+        '==========================',
+        '',
+        'Generated by ``update-api-data.py`` from ``methods.json``, do not edit.',
+        '',
+        'Each API namespace (like ``doc.tags``) is a subclass of',
+        ':class:`~ipernity.method.IpernityMethod` with a method for every API',
+        'method. The namespace objects are created once per API object.',
+        '',
+        '.. versionadded:: 0.4.0',
+        '"""',
+        '',
+        'from __future__ import annotations',
+        '',
+        'from functools import cached_property',
+        'from typing import Any, TYPE_CHECKING',
+        '',
+        'from .method import IpernityMethod',
+        '',
+        'if TYPE_CHECKING:',
+        '    from .api import api_arg',
+    ]
+    
+    def namespace_property(name: str, full: str, owner: str) -> list:
+        return [
+            '    @cached_property',
+            f'    def {name}(self) -> {class_name(full)}:',
+            f'        """Methods ``{full}.*``"""',
+            f'        return {class_name(full)}({owner}, {full!r})',
+        ]
+    
+    # Children before parents, so the annotations refer to defined classes
+    for namespace in sorted(tree, key = lambda n: (-n.count('.'), n)):
+        if not namespace:
+            continue
+        lines += ['', '', f'class {class_name(namespace)}(IpernityMethod):']
+        lines.append(f'    """Methods ``{namespace}.*``"""')
+        for name, (full, is_namespace) in sorted(tree[namespace].items()):
+            lines.append('    ')
+            if is_namespace:
+                lines += namespace_property(name, full, 'self._api')
+                continue
+            lines.append(f'    def {name}(self, **kwargs: api_arg) -> Any:')
+            title = methods[full].get('title', '').strip()
+            doc = [title, ''] if title else []
+            lines += docstring(doc + [f'See :iper:`{full}`.'], '        ')
+            lines.append(f'        return self._api.call({full!r}, **kwargs)')
+    
+    lines += [
+        '',
+        '',
+        'class GeneratedMethods:',
+        '    """',
+        '    Mixin with the top-level namespaces for :class:`~ipernity.api.IpernityAPI`',
+        '    """',
+    ]
+    for name, (full, is_namespace) in sorted(tree[''].items()):
+        if not is_namespace or name in reserved:
+            continue
+        lines.append('    ')
+        lines += namespace_property(name, full, 'self')
+    
+    return '\n'.join(lines) + '\n'
 
-with open(destfile, 'w') as df:
-    json.dump(methods2, df, indent = 4)
 
+def main():
+    a = ArgumentParser(description = __doc__.splitlines()[1])
+    a.add_argument(
+        '--no-fetch',
+        help = 'Only regenerate ipernity/_generated.py from methods.json',
+        action = 'store_true'
+    )
+    opts = a.parse_args()
+    
+    if opts.no_fetch:
+        methods = read_methods()
+    else:
+        methods = fetch_methods()
+        write_methods(methods)
+    
+    with open(generated_file, 'w') as gf:
+        gf.write(generate_module(methods))
 
 
+if __name__ == '__main__':
+    main()